@@ -0,0 +1,116 @@
+"""Shared helpers for the benchmark scripts (isolated databases, query counting, timing)."""
+import atexit
+import contextlib
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Allow running as `python benchmarks/bench_x.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from budget_planner.models.database import create_storage_engine
+from budget_planner.models.data_models import create_tables, User, Category, Transaction, TransactionType
+from budget_planner.core.rollup_management import rebuild_monthly_rollups
+
+
+def _remove_database_files(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def make_engine(path: str | None = None, profile: str = "default"):
+    """
+    Creates a throwaway SQLite database (a temp file unless 'path' is given) with all tables,
+    configured with the given storage profile (see budget_planner.models.database).
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="budget_bench_")
+        os.close(fd)
+        atexit.register(_remove_database_files, path)
+    bench_engine = create_storage_engine(f"sqlite:///{path}", profile)
+    create_tables(bench_engine)
+    return bench_engine
+
+
+def make_session(bench_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)()
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine while active."""
+
+    def __init__(self, bench_engine):
+        self.engine = bench_engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextlib.contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def seed_user(db, username: str = "bench_user", months: int = 24, tx_per_month: int = 200,
+              category_names=("Food", "Rent", "Fun", "Travel", "Utilities", "Salary"),
+              descriptions: list[str] | None = None) -> int:
+    """
+    Creates a user with categories and synthetic transactions spread over the last 'months' months.
+    Descriptions are "bench <category>" unless a list is given to pick them from at random.
+    """
+    user = User(username=username, password_hash="x")
+    db.add(user)
+    db.flush()
+    categories = [Category(name=name, user_id=user.id) for name in category_names]
+    db.add_all(categories)
+    db.flush()
+
+    rng = random.Random(42)
+    today = datetime.date.today()
+    rows = []
+    for i in range(months):
+        year, month = today.year, today.month - i
+        while month <= 0:
+            month += 12
+            year -= 1
+        for _ in range(tx_per_month):
+            category = rng.choice(categories)
+            is_income = category.name == "Salary"
+            rows.append({
+                "amount_minor": rng.randint(100, 300000 if is_income else 30000), # Cents
+                "type": TransactionType.INCOME if is_income else TransactionType.EXPENSE,
+                "date": datetime.datetime(year, month, rng.randint(1, 28), rng.randint(0, 23)),
+                "description": rng.choice(descriptions) if descriptions else f"bench {category.name}",
+                "category_id": category.id,
+                "user_id": user.id,
+            })
+    db.bulk_insert_mappings(Transaction, rows)
+    db.commit()
+    rebuild_monthly_rollups(db, user.id) # Bulk inserts bypass the incremental rollup maintenance
+    return user.id
+
+
+def report(title: str, header: list[str], rows: list[list]):
+    print(title)
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
+    print()
@@ -0,0 +1,125 @@
+"""
+Benchmark: API throughput and memory at high concurrency, sync (threadpool) vs async (aiosqlite) database mode.
+
+Each mode runs in its own process (BUDGET_PLANNER_DB_MODE is read at import) against an isolated database.
+'connections' concurrent clients hammer GET /transactions/ and GET /categories/ with a POST /transactions/
+every tenth request, in-process through httpx's ASGI transport. Reports requests/s, latency, peak RSS
+and the peak number of threads.
+
+Run from the project root: python benchmarks/bench_async_db.py [connections] [seconds]
+"""
+import json
+import os
+import subprocess
+import sys
+from _common import report
+
+
+def child(connections: int, seconds: float):
+    import asyncio
+    import resource
+    import threading
+    import time
+    import httpx
+    from _common import make_engine, make_session, seed_user
+    from budget_planner.api.main import app
+    from budget_planner.core import token_management
+    from budget_planner.models.data_models import Category
+
+    bench_engine = make_engine(profile="production")
+    db = make_session(bench_engine)
+    user_id = seed_user(db, months=6, tx_per_month=200)
+    category_id = db.query(Category.id).filter(Category.user_id == user_id).first()[0]
+    db.close()
+    database_path = bench_engine.url.database
+    bench_engine.dispose()
+
+    # Point the app at the seeded database on whichever path this process runs
+    from budget_planner.api import dependencies
+    from budget_planner.models import database
+    from sqlalchemy.orm import sessionmaker
+    if database.DB_MODE == "async":
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        async_sessions = async_sessionmaker(
+            database.create_async_storage_engine(f"sqlite:///{database_path}", "production"), autoflush=False)
+
+        async def override_get_db_runner():
+            session = async_sessions()
+            try:
+                yield database.AsyncSessionRunner(session)
+            finally:
+                await session.close()
+        app.dependency_overrides[dependencies.get_db_runner] = override_get_db_runner
+    else:
+        sync_sessions = sessionmaker(autocommit=False, autoflush=False,
+                                     bind=database.create_storage_engine(f"sqlite:///{database_path}", "production"))
+
+        def override_get_db():
+            session = sync_sessions()
+            try:
+                yield session
+            finally:
+                session.close()
+        app.dependency_overrides[dependencies.get_db] = override_get_db
+
+    headers = {"Authorization": f"Bearer {token_management.create_access_token(user_id, 'bench_user')}"}
+    latencies, errors = [], 0
+    peak_threads = threading.active_count()
+
+    async def client_loop(client, index, deadline):
+        nonlocal errors, peak_threads
+        i = index
+        while time.perf_counter() < deadline:
+            i += 1
+            start = time.perf_counter()
+            if i % 10 == 0:
+                response = await client.post("/transactions/", headers=headers, json={
+                    "amount": 5, "type": "expense", "category_id": category_id})
+            elif i % 2:
+                response = await client.get("/transactions/?limit=20", headers=headers)
+            else:
+                response = await client.get("/categories/", headers=headers)
+            if response.status_code >= 400:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(*(client_loop(client, i, deadline) for i in range(connections)))
+
+    asyncio.run(main())
+    latencies.sort()
+    print(json.dumps({
+        "requests": len(latencies),
+        "rps": len(latencies) / seconds,
+        "p50": latencies[len(latencies) // 2] if latencies else 0,
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0,
+        "errors": errors,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_threads": peak_threads,
+    }))
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rows = []
+    for mode in ("sync", "async"):
+        env = dict(os.environ, BUDGET_PLANNER_DB_MODE=mode, BUDGET_PLANNER_DB_PROFILE="production")
+        output = subprocess.run([sys.executable, "-W", "ignore", __file__, "--child", str(connections), str(seconds)],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append([mode, result["requests"], f"{result['rps']:.0f}", f"{result['p50']:.1f}",
+                     f"{result['p95']:.1f}", result["errors"], f"{result['peak_rss_mb']:.1f}", result["peak_threads"]])
+    report(f"API at {connections} concurrent connections for {seconds:.0f}s",
+           ["db mode", "requests", "req/s", "p50 ms", "p95 ms", "errors", "peak RSS MB", "peak threads"], rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(int(sys.argv[2]), float(sys.argv[3]))
+    else:
+        main()
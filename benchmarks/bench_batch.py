@@ -0,0 +1,83 @@
+"""
+Benchmark: syncing offline edits one request (commit) at a time vs one batch.
+
+Seeds a user, then applies the same 500 mixed edits (creates, updates and deletes of transactions)
+  - one at a time through create_transaction / update_transaction / delete_transaction
+  - as one apply_batch call (one DB transaction, a SAVEPOINT per operation)
+reporting wall time, COMMITs and SQL statements, on both storage profiles (see bench_sqlite_profiles:
+"default" fsyncs on every commit, "production" is WAL with synchronous=NORMAL).
+
+Run from the project root: python benchmarks/bench_batch.py [edits]
+"""
+import datetime
+import sys
+import time
+from sqlalchemy import event
+from _common import make_engine, make_session, seed_user, report, QueryCounter
+from budget_planner.models.data_models import Category, Transaction, TransactionType
+from budget_planner.core.transaction_management import create_transaction, update_transaction, delete_transaction
+from budget_planner.core.batch_management import apply_batch
+
+
+def edits(db, user_id, count):
+    """'count' operations: 60% creates, 30% updates and 10% deletes of seeded transactions."""
+    category_ids = [category_id for (category_id,) in db.query(Category.id).filter_by(user_id=user_id)]
+    existing = [tx_id for (tx_id,) in db.query(Transaction.id).filter_by(user_id=user_id).order_by(Transaction.id).limit(count)]
+    db.rollback()
+    date = datetime.datetime.now().replace(microsecond=0)
+    operations = []
+    for i in range(count):
+        if i % 10 < 6:
+            operations.append({"action": "create", "entity": "transaction",
+                               "data": {"amount": 1 + i % 50, "type": TransactionType.EXPENSE, "date": date,
+                                        "category_id": category_ids[i % len(category_ids)], "description": f"offline {i}"}})
+        elif i % 10 < 9:
+            operations.append({"action": "update", "entity": "transaction", "id": existing[i], "data": {"amount": 2 + i % 30}})
+        else:
+            operations.append({"action": "delete", "entity": "transaction", "id": existing[i]})
+    return operations
+
+
+def one_by_one(db, user_id, operations):
+    for op in operations:
+        if op["action"] == "create":
+            create_transaction(db, user_id=user_id, **op["data"])
+        elif op["action"] == "update":
+            update_transaction(db, op["id"], user_id, **op["data"])
+        else:
+            delete_transaction(db, op["id"], user_id)
+
+
+def measure(bench_engine, run):
+    commits = []
+    listener = lambda conn: commits.append(1)
+    event.listen(bench_engine, "commit", listener)
+    try:
+        with QueryCounter(bench_engine) as counter:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(bench_engine, "commit", listener)
+    return elapsed, len(commits), counter.count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rows = []
+    for profile in ("default", "production"):
+        for label, apply in (("one request per edit", one_by_one),
+                             ("one batch", lambda db, user_id, operations: apply_batch(db, user_id, operations))):
+            bench_engine = make_engine(profile=profile)
+            db = make_session(bench_engine)
+            user_id = seed_user(db, months=12, tx_per_month=200)
+            operations = edits(db, user_id, count)
+            elapsed, commits, statements = measure(bench_engine, lambda: apply(db, user_id, operations))
+            rows.append([profile, label, f"{elapsed * 1000:.0f}", f"{elapsed / count * 1000:.2f}", commits, statements])
+            db.close()
+            bench_engine.dispose()
+    report(f"Applying {count} offline edits", ["profile", "method", "total ms", "ms/edit", "commits", "statements"], rows)
+
+
+if __name__ == "__main__":
+    main()
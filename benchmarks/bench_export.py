@@ -0,0 +1,83 @@
+"""
+Benchmark: streaming export vs paging through the listing, and memory as the export grows.
+
+For each size, seeds one user and exports all transactions through the same path the endpoint uses
+(keyset pages through ThreadSessionRunner + api.exports) as CSV, gzip-compressed CSV and NDJSON, reporting rows/s,
+output size and peak Python memory (tracemalloc). The 100k size is also exported by paging through
+get_transactions_by_user 100 rows at a time with offsets, as a client of GET /transactions/ would
+(offset paging is quadratic, so it is not repeated on the largest size).
+
+Run from the project root: python benchmarks/bench_export.py [largest size]
+"""
+import asyncio
+import functools
+import sys
+import time
+import tracemalloc
+from _common import make_engine, make_session, seed_user, report
+from budget_planner.models.database import ThreadSessionRunner
+from budget_planner.core.export_management import transaction_export_query
+from budget_planner.core.transaction_management import get_transactions_by_user
+from budget_planner.api.exports import export_response
+
+VARIANTS = [("csv", None), ("csv", "gzip"), ("ndjson", None)]
+PAGE = 100
+PAGED_SIZE = 100_000
+
+
+def export(db, user_id, file_format, accept_encoding):
+    """Drains one export; returns (seconds, bytes sent, peak traced bytes)."""
+    response = export_response(ThreadSessionRunner(db), functools.partial(transaction_export_query, user_id), file_format,
+                               "transactions", "transactions", accept_encoding)
+
+    async def drain():
+        size = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+        return size
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(drain())
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def page_through(db, user_id):
+    start = time.perf_counter()
+    skip = rows = 0
+    while True:
+        page = get_transactions_by_user(db, user_id, skip=skip, limit=PAGE)
+        rows += len(page)
+        db.expunge_all()
+        if len(page) < PAGE:
+            break
+        skip += PAGE
+    return time.perf_counter() - start, rows
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [size for size in (1_000, PAGED_SIZE, 1_000_000) if size < largest] + [largest]
+    rows = []
+    for size in sizes:
+        db = make_session(make_engine())
+        user_id = seed_user(db, months=24, tx_per_month=-(-size // 24))
+        for file_format, accept_encoding in VARIANTS:
+            elapsed, output, peak = export(db, user_id, file_format, accept_encoding)
+            label = file_format + ("+gzip" if accept_encoding else "")
+            rows.append([f"{size:,}", label, f"{size / elapsed:,.0f}", f"{output / 2 ** 20:.1f}", f"{peak / 2 ** 20:.2f}"])
+        if size == PAGED_SIZE:
+            paged_s, paged_rows = page_through(db, user_id)
+            paged = f"Paging {paged_rows:,} rows through the listing at {PAGE} per request: {paged_s:.1f}s " \
+                    f"({paged_rows / paged_s:,.0f} rows/s, {-(-paged_rows // PAGE):,} requests)"
+        db.close()
+    report("Streaming export", ["rows", "format", "rows/s", "output MiB", "peak Python MiB"], rows)
+    if PAGED_SIZE in sizes:
+        print(paged)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: contributing to one goal from many threads at once, and applying many contributions at once.
+
+Per storage profile, N threads each make M contributions to the same goal, through:
+  - read-modify-write (what update_goal_progress did: SELECT the goal, add in Python, UPDATE, refresh)
+  - update_goal_progress (UPDATE ... SET current_amount_minor = current_amount_minor + :x RETURNING)
+reporting throughput, statements per contribution, failed contributions and lost updates (expected total
+minus final total). Then 1000 contributions across 100 goals: one call each vs one contribute_to_goals call.
+
+Run from the project root: python benchmarks/bench_goal_contributions.py [threads] [contributions_per_thread]
+"""
+import sys
+import threading
+import time
+from sqlalchemy.orm import sessionmaker
+from _common import make_engine, seed_user, report, QueryCounter
+from budget_planner.core import money
+from budget_planner.core.goal_management import create_goal, get_goal_by_id, update_goal_progress, contribute_to_goals
+from budget_planner.core.user_management import bump_data_version
+
+def read_modify_write(db, goal_id, user_id, contributed_amount):
+    """The previous update_goal_progress."""
+    goal = get_goal_by_id(db, goal_id, user_id)
+    goal.current_amount_minor += money.to_minor(contributed_amount)
+    goal.change_seq = bump_data_version(db, user_id)
+    db.commit()
+    db.refresh(goal)
+    return goal
+
+def contend(Session, bench_engine, contribute, threads: int, per_thread: int):
+    db = Session()
+    user_id = seed_user(db, username=f"bench_{contribute.__name__}", months=1, tx_per_month=1)
+    goal_id = create_goal(db, user_id=user_id, name="Shared", target_amount=1_000_000).id
+    failures = []
+
+    def worker():
+        session = Session()
+        for _ in range(per_thread):
+            try:
+                contribute(session, goal_id, user_id, 1.0)
+            except Exception as error: # e.g. "database is locked" when a stale read tries to write
+                session.rollback()
+                failures.append(error)
+        session.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    with QueryCounter(bench_engine) as counter:
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    applied = threads * per_thread - len(failures)
+    final = get_goal_by_id(db, goal_id, user_id).current_amount_minor
+    db.close()
+    return [f"{applied / elapsed:,.0f}", f"{counter.count / threads / per_thread:.1f}", len(failures),
+            applied * 100 - final]
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rows = []
+    for profile in ("default", "production"):
+        bench_engine = make_engine(profile=profile)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+        for contribute in (read_modify_write, update_goal_progress):
+            rows.append([profile, contribute.__name__] + contend(Session, bench_engine, contribute, threads, per_thread))
+    report(f"{threads} threads x {per_thread} contributions to one goal",
+           ["profile", "method", "contributions/s", "statements each", "failed", "lost (cents)"], rows)
+
+    bench_engine = make_engine()
+    db = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)()
+    user_id = seed_user(db, months=1, tx_per_month=1)
+    goal_ids = [create_goal(db, user_id=user_id, name=f"Envelope {i}", target_amount=500).id for i in range(100)]
+    contributions = [(goal_ids[i % 100], 1.25) for i in range(1000)]
+    rows = []
+    for label, apply in (("1000 update_goal_progress calls",
+                          lambda: [update_goal_progress(db, goal_id, user_id, amount) for goal_id, amount in contributions]),
+                         ("1 contribute_to_goals call", lambda: contribute_to_goals(db, user_id, contributions))):
+        with QueryCounter(bench_engine) as counter:
+            start = time.perf_counter()
+            apply()
+            elapsed = time.perf_counter() - start
+        rows.append([label, f"{elapsed * 1000:.1f}", counter.count])
+    db.close()
+    report("1000 contributions across 100 goals", ["method", "ms", "statements"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: GET /goals/ for users with thousands of goals (envelope budgets split into sub-goals).
+
+Through the API (TestClient against a throwaway database), per goal count:
+  - per-row models: the previous read_goals_api, mounted here at /bench/goals (ORM objects, then
+    GoalResponse.from_orm and a Python progress calculation per goal, then response_model validation)
+  - GET /goals/: rows with amounts and progress_percentage computed by SQL, serialized as dicts by one
+    TypeAdapter call (goal_list_json)
+checking both return the same goals and reporting latency and SQL statements.
+
+Run from the project root: python benchmarks/bench_goal_listing.py [goals ...]
+"""
+import datetime
+import sys
+import time
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from _common import make_engine, seed_user, report, QueryCounter
+from budget_planner.api.main import app
+from budget_planner.api import dependencies, schemas
+from budget_planner.core.token_management import create_access_token
+from budget_planner.models.data_models import Goal, User
+
+REPEATS = 5
+
+def calculate_progress(current: int, target: int) -> float:
+    if target <= 0:
+        return 0.0
+    return round(min(current / target * 100, 100.0), 2)
+
+bench_router = APIRouter(prefix="/bench")
+
+@bench_router.get("/goals", response_model=List[schemas.GoalResponse])
+async def read_goals_per_row(
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    def load(session, user_id):
+        return session.query(Goal).filter(Goal.user_id == user_id).order_by(Goal.creation_date.desc()).all()
+    response_goals = []
+    for goal_orm in await db.run(load, current_user.id):
+        response_goal = schemas.GoalResponse.from_orm(goal_orm)
+        response_goal.progress_percentage = calculate_progress(goal_orm.current_amount_minor, goal_orm.target_amount_minor)
+        response_goals.append(response_goal)
+    return response_goals
+
+def measure(client, bench_engine, url):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        response = client.get(url)
+    elapsed = (time.perf_counter() - start) / REPEATS
+    with QueryCounter(bench_engine) as counter:
+        client.get(url)
+    assert response.status_code == 200, response.text
+    return elapsed * 1000, counter.count, response.json()
+
+def main():
+    goal_counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 5_000, 20_000]
+    app.include_router(bench_router)
+    rows = []
+    for goals in goal_counts:
+        bench_engine = make_engine()
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+        db = Session()
+        user_id = seed_user(db, months=1, tx_per_month=1)
+        username = db.query(User.username).filter(User.id == user_id).scalar()
+        start_date = datetime.datetime(2024, 1, 1)
+        db.execute(insert(Goal), [{"name": f"Envelope {i // 20} / sub-goal {i % 20}", "target_amount_minor": 10_000 + i,
+                                   "current_amount_minor": (i * 7919) % 15_000, "user_id": user_id,
+                                   "creation_date": start_date + datetime.timedelta(minutes=i),
+                                   "target_date": start_date + datetime.timedelta(days=365) if i % 2 else None}
+                                  for i in range(goals)])
+        db.commit()
+
+        def override_get_db():
+            session = Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[dependencies.get_db] = override_get_db
+        client = TestClient(app)
+        client.headers["Authorization"] = f"Bearer {create_access_token(user_id, username)}"
+        old_ms, old_statements, old_goals = measure(client, bench_engine, "/bench/goals")
+        new_ms, new_statements, new_goals = measure(client, bench_engine, "/goals/")
+        assert [goal["id"] for goal in new_goals] == [goal["id"] for goal in old_goals]
+        assert all(abs(new["progress_percentage"] - old["progress_percentage"]) <= 0.01 # Exact halves now round up
+                   for new, old in zip(new_goals, old_goals))
+        rows.append([f"{goals:,}", f"{old_ms:.1f}", old_statements, f"{new_ms:.1f}", new_statements, f"{old_ms / new_ms:.1f}x"])
+        app.dependency_overrides.pop(dependencies.get_db, None)
+        db.close()
+    report(f"GET /goals/ (mean of {REPEATS})",
+           ["goals", "per-row models ms", "statements", "SQL columns + TypeAdapter ms", "statements", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
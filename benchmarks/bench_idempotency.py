@@ -0,0 +1,73 @@
+"""
+Benchmark: the cost of Idempotency-Key on POST /transactions/, with many keys already stored.
+
+Through the API (TestClient against a throwaway database), after storing N keys for other users:
+  - plain create (no key)
+  - keyed create (looks the key up, then stores it with the response in the create's transaction)
+  - replayed retry (answered from the stored response; create_transaction is not called)
+reporting latency and SQL statements, and checking the lookup uses the unique index.
+
+Run from the project root: python benchmarks/bench_idempotency.py [stored_keys]
+"""
+import datetime
+import sys
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from _common import make_engine, seed_user, report, QueryCounter
+from budget_planner.api.main import app
+from budget_planner.api import dependencies
+from budget_planner.core.token_management import create_access_token
+from budget_planner.models.data_models import Category, IdempotencyKey, User
+
+REQUESTS = 300
+
+def main():
+    stored_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    bench_engine = make_engine()
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+    db = Session()
+    user_id = seed_user(db, months=1, tx_per_month=10)
+    username = db.query(User.username).filter(User.id == user_id).scalar()
+    category_id = db.query(Category.id).filter(Category.user_id == user_id).first()[0]
+    expires_at = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+    db.execute(insert(IdempotencyKey), [{"user_id": user_id + 1 + i % 1000, "key": f"key-{i}", "fingerprint": "0" * 64,
+                                         "status_code": 201, "response_body": "{}", "expires_at": expires_at}
+                                        for i in range(stored_keys)])
+    db.commit()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[dependencies.get_db] = override_get_db
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(user_id, username)}"
+    payload = {"amount": 3.5, "type": "expense", "category_id": category_id}
+
+    rows = []
+    for label, headers_for in (("create, no key", lambda i: {}),
+                               ("create, new key", lambda i: {"Idempotency-Key": f"new-{i}"}),
+                               ("retry, replayed", lambda i: {"Idempotency-Key": f"new-{i}"})):
+        start = time.perf_counter()
+        for i in range(REQUESTS):
+            response = client.post("/transactions/", json=payload, headers=headers_for(i))
+            assert response.status_code == 201, response.text
+        elapsed = (time.perf_counter() - start) / REQUESTS
+        with QueryCounter(bench_engine) as counter:
+            client.post("/transactions/", json=payload, headers=headers_for(REQUESTS))
+        rows.append([label, f"{elapsed * 1000:.2f}", counter.count])
+    plan = bench_engine.connect().exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT * FROM idempotency_keys WHERE user_id = ? AND key = ?", (user_id, "new-0")).fetchall()
+    app.dependency_overrides.pop(dependencies.get_db, None)
+    db.close()
+    report(f"POST /transactions/ with {stored_keys:,} stored keys (mean of {REQUESTS})",
+           ["request", "ms", "statements"], rows)
+    print("Key lookup plan:", plan[0][-1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: bulk import throughput (rows/second) for CSV, compared with one create_transaction per row.
+
+Run from the project root: python benchmarks/bench_import.py [rows]
+"""
+import datetime
+import random
+import sys
+import time
+from _common import make_engine, make_session, report
+from budget_planner.models.data_models import User, TransactionType
+from budget_planner.core.transaction_management import create_category, create_transaction
+from budget_planner.core.import_management import import_transactions
+
+CATEGORIES = ["Food", "Rent", "Fun", "Travel", "Utilities", "Salary"]
+
+
+def csv_lines(rows: int):
+    """Generates CSV lines lazily so the benchmark itself never holds the whole file."""
+    rng = random.Random(7)
+    yield "date,amount,category,description\n"
+    for i in range(rows):
+        category = rng.choice(CATEGORIES)
+        sign = "" if category == "Salary" else "-"
+        yield f"20{rng.randint(19, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},{sign}{rng.uniform(1, 500):.2f},{category},row {i}\n"
+
+
+def make_user(db, username):
+    user = User(username=username, password_hash="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    results = []
+
+    for batch_size in (1000, 5000, 20000):
+        db = make_session(make_engine())
+        user_id = make_user(db, "bench_import")
+        start = time.perf_counter()
+        outcome = import_transactions(db, user_id, csv_lines(rows), "csv", create_missing_categories=True,
+                                      batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        results.append([f"import_transactions (batch {batch_size})", outcome["imported"], f"{elapsed:.2f}",
+                        f"{outcome['imported'] / elapsed:,.0f}"])
+        db.close()
+
+    # Baseline: the per-row path used by POST /transactions/ (lookup + commit + refresh per row)
+    baseline_rows = min(rows, 2000)
+    db = make_session(make_engine())
+    user_id = make_user(db, "bench_single")
+    category_ids = {name: create_category(db, name, user_id).id for name in CATEGORIES}
+    lines = csv_lines(baseline_rows)
+    next(lines)
+    start = time.perf_counter()
+    for line in lines:
+        date, amount, category, description = line.rstrip("\n").split(",")
+        value = float(amount)
+        create_transaction(db, abs(value), TransactionType.EXPENSE if value < 0 else TransactionType.INCOME,
+                           datetime.datetime.fromisoformat(date), user_id, category_ids[category], description)
+    elapsed = time.perf_counter() - start
+    results.append(["create_transaction per row", baseline_rows, f"{elapsed:.2f}", f"{baseline_rows / elapsed:,.0f}"])
+    db.close()
+
+    report(f"Transaction import throughput ({rows:,} CSV rows)", ["path", "rows", "seconds", "rows/s"], results)
+
+
+if __name__ == "__main__":
+    main()
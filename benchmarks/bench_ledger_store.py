@@ -0,0 +1,87 @@
+"""
+Benchmark: memory and latency of the in-process ledger store vs ORM Transaction objects.
+
+Seeds one user with 100k transactions, then measures (tracemalloc) the memory held by
+  - the ORM objects of a full listing (Transaction + joined Category, in the session identity map)
+  - the user's ledger in the store (array columns, interned descriptions)
+and times a 100-row page, a one-month filtered page and a one-month summary both ways.
+
+Run from the project root: python benchmarks/bench_ledger_store.py [transactions]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from _common import make_engine, make_session, seed_user, report
+from budget_planner.core.ledger_store import ledger_store, load_user_ledger
+from budget_planner.core.transaction_management import get_transactions_by_user
+from budget_planner.core.trend_analysis import get_monthly_summary, month_bounds, summary_cache, _previous_months
+
+REPEATS = 20
+
+
+def allocated(build):
+    """Bytes still allocated by build()'s result, measured with tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def per_call_ms(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    bench_engine = make_engine()
+    db = make_session(bench_engine)
+    user_id = seed_user(db, months=24, tx_per_month=transactions // 24)
+    count = transactions // 24 * 24
+    scale = 100_000 / count
+
+    orm_rows, orm_bytes = allocated(lambda: get_transactions_by_user(db, user_id, limit=count))
+    assert len(orm_rows) == count
+    del orm_rows
+    db.expunge_all()
+    db.rollback()
+    ledger, ledger_bytes = allocated(lambda: load_user_ledger(db, user_id, 0))
+    report(f"Memory per 100k transactions ({count:,} seeded)", ["representation", "MiB", "bytes/row"], [
+        ["ORM objects", f"{orm_bytes * scale / 2 ** 20:.1f}", f"{orm_bytes / count:.0f}"],
+        ["ledger columns (tracemalloc)", f"{ledger_bytes * scale / 2 ** 20:.1f}", f"{ledger_bytes / count:.0f}"],
+        ["ledger columns (store estimate)", f"{ledger.nbytes * scale / 2 ** 20:.1f}", f"{ledger.nbytes / count:.0f}"],
+    ])
+    del ledger
+
+    year, month = _previous_months(2)[1]
+    start, end = month_bounds(year, month)
+
+    def listings():
+        page_ms = per_call_ms(lambda: (get_transactions_by_user(db, user_id, limit=100), db.expunge_all()))
+        month_ms = per_call_ms(lambda: (get_transactions_by_user(db, user_id, limit=100, start_date=start, end_date=end),
+                                        db.expunge_all()))
+        return page_ms, month_ms
+
+    orm_page_ms, orm_month_ms = listings()
+    summary_cache.clear()
+    sql_summary_ms = per_call_ms(lambda: (summary_cache.clear(), get_monthly_summary(db, user_id, year, month)))
+    ledger_store.budget_bytes = 256 * 2 ** 20
+    get_transactions_by_user(db, user_id, limit=1) # Loads the ledger
+    store_page_ms, store_month_ms = listings()
+    store_summary_ms = per_call_ms(lambda: ledger_store.read(db, user_id, lambda ledger: ledger.summarize(start, end)))
+    report(f"Latency, ms per call (mean of {REPEATS})", ["operation", "ORM / SQL", "ledger store"], [
+        ["100-row page", f"{orm_page_ms:.2f}", f"{store_page_ms:.2f}"],
+        ["100-row page, one month", f"{orm_month_ms:.2f}", f"{store_month_ms:.2f}"],
+        ["one-month summary (uncached)", f"{sql_summary_ms:.2f}", f"{store_summary_ms:.2f}"],
+    ])
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Load test: GET /transactions/ latency while a storm of logins hits the API.
+
+Compares three phases against an isolated database:
+  - quiet:       no logins
+  - pooled:      logins via POST /auth/login (async, bcrypt on the bounded password pool, 429 on saturation)
+  - inline:      the previous behaviour, a sync handler running bcrypt on the request threadpool
+
+Run from the project root: python benchmarks/bench_login_storm.py [storm_concurrency] [seconds]
+"""
+import asyncio
+import sys
+import time
+import httpx
+from fastapi import Depends
+from _common import make_engine, report
+from sqlalchemy.orm import sessionmaker
+from budget_planner.api.main import app
+from budget_planner.api import dependencies, schemas
+from budget_planner.core import user_management
+
+USERNAME, PASSWORD = "storm_user", "storm_password"
+
+
+def install_inline_login():
+    """Re-creates the old synchronous login handler so both models can be measured side by side."""
+    @app.post("/bench/login-inline")
+    def login_inline(form_data: schemas.UserCreate, db=Depends(dependencies.get_db)):
+        user = user_management.authenticate_user(db, username=form_data.username, password=form_data.password)
+        return {"ok": user is not None}
+
+
+async def measure_reads(client, headers, seconds, interval=0.02):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/transactions/?limit=20", headers=headers)
+        assert response.status_code == 200, response.text
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def storm(client, url, concurrency, stop, outcomes):
+    async def worker():
+        while not stop.is_set():
+            response = await client.post(url, json={"username": USERNAME, "password": PASSWORD})
+            outcomes[response.status_code] = outcomes.get(response.status_code, 0) + 1
+            if response.status_code == 429: # Well-behaved clients honour Retry-After
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def phase(client, headers, seconds, storm_url=None, concurrency=0):
+    outcomes = {}
+    stop = asyncio.Event()
+    storm_task = asyncio.create_task(storm(client, storm_url, concurrency, stop, outcomes)) if storm_url else None
+    await asyncio.sleep(0.2 if storm_url else 0) # Let the storm build up
+    latencies = await measure_reads(client, headers, seconds)
+    stop.set()
+    if storm_task:
+        await storm_task
+    return latencies, percentile(latencies, 50), percentile(latencies, 99), outcomes
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main(concurrency: int, seconds: float):
+    bench_engine = make_engine()
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+
+    def override_get_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[dependencies.get_db] = override_get_db
+    install_inline_login()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/auth/register", json={"username": USERNAME, "password": PASSWORD})
+        token = (await client.post("/auth/login", json={"username": USERNAME, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        category = (await client.post("/categories/", json={"name": "Food"}, headers=headers)).json()
+        for i in range(50):
+            await client.post("/transactions/", json={"amount": 1 + i, "type": "expense", "category_id": category["id"]}, headers=headers)
+
+        rows = []
+        for label, url in (("quiet", None), ("pooled login storm", "/auth/login"), ("inline login storm", "/bench/login-inline")):
+            latencies, p50, p99, outcomes = await phase(client, headers, seconds, url, concurrency)
+            login_summary = ", ".join(f"{code}: {count}" for code, count in sorted(outcomes.items())) or "-"
+            rows.append([label, len(latencies), f"{p50:.1f}", f"{p99:.1f}", login_summary])
+
+    report(f"GET /transactions/ latency during a login storm ({concurrency} concurrent logins, "
+           f"bcrypt rounds {user_management.BCRYPT_ROUNDS}, {user_management.password_pool.max_workers} password workers)",
+           ["phase", "reads", "p50 ms", "p99 ms", "login responses"], rows)
+
+
+if __name__ == "__main__":
+    storm_concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    phase_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(storm_concurrency, phase_seconds))
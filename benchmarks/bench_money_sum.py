@@ -0,0 +1,69 @@
+"""
+Benchmark: summing 1M amounts stored as FLOAT vs as INTEGER cents in SQLite.
+
+Builds a table holding every amount both ways (same random values with two decimals), then times
+SQL SUM over each column, both for the whole table and grouped per month, and reports how far the
+float result drifts from the exact total.
+
+Run from the project root: python benchmarks/bench_money_sum.py [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from _common import report
+
+REPEATS = 5
+
+
+def best_of(connection, sql):
+    best, result = float("inf"), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = connection.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="budget_money_bench_")
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE amounts (month INTEGER, amount FLOAT, amount_minor INTEGER)")
+        rng = random.Random(7)
+
+        def generate():
+            for i in range(rows):
+                cents = rng.randint(1, 500_000)
+                yield i % 24, cents / 100, cents
+        connection.executemany("INSERT INTO amounts VALUES (?, ?, ?)", generate())
+        connection.commit()
+
+        exact_cents = connection.execute("SELECT SUM(amount_minor) FROM amounts").fetchone()[0]
+        results = []
+        for label, sql in (
+            ("SUM(amount) FLOAT", "SELECT SUM(amount) FROM amounts"),
+            ("SUM(amount_minor) INTEGER", "SELECT SUM(amount_minor) FROM amounts"),
+            ("per month, FLOAT", "SELECT month, SUM(amount) FROM amounts GROUP BY month"),
+            ("per month, INTEGER", "SELECT month, SUM(amount_minor) FROM amounts GROUP BY month"),
+        ):
+            seconds, result = best_of(connection, sql)
+            if "GROUP BY" in sql:
+                total = sum(value for _, value in result)
+            else:
+                total = result[0][0]
+            drift_cents = abs(total * 100 - exact_cents) if isinstance(total, float) else abs(total - exact_cents)
+            results.append([label, f"{seconds * 1000:.1f}", f"{drift_cents:.6f}"])
+        connection.close()
+    finally:
+        os.remove(path)
+
+    report(f"Summing {rows:,} amounts (best of {REPEATS})", ["query", "ms", "drift (cents)"], results)
+
+
+if __name__ == "__main__":
+    main()
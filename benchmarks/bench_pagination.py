@@ -0,0 +1,51 @@
+"""
+Benchmark: per-page latency of GET /transactions paging, offset (skip/limit) vs keyset cursor.
+
+Run from the project root: python benchmarks/bench_pagination.py
+"""
+import time
+from _common import make_engine, make_session, seed_user, report
+from budget_planner.core.transaction_management import get_transactions_by_user, encode_transaction_cursor
+
+PAGE_SIZE = 100
+PAGES = [1, 10, 100, 1000, 2000]
+REPEATS = 20
+
+
+def average_ms(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    bench_engine = make_engine()
+    db = make_session(bench_engine)
+    user_id = seed_user(db, months=100, tx_per_month=2000) # 200k transactions
+
+    rows = []
+    for page in PAGES:
+        skip = (page - 1) * PAGE_SIZE
+        # The cursor a client would hold after walking to the previous page
+        cursor = None
+        if skip:
+            boundary = get_transactions_by_user(db, user_id, skip=skip - 1, limit=1)[0]
+            cursor = encode_transaction_cursor(boundary)
+        offset_page = get_transactions_by_user(db, user_id, skip=skip, limit=PAGE_SIZE)
+        keyset_page = get_transactions_by_user(db, user_id, limit=PAGE_SIZE, cursor=cursor)
+        assert [tx.id for tx in offset_page] == [tx.id for tx in keyset_page], "Cursor page differs from offset page"
+        db.expunge_all()
+
+        offset_ms = average_ms(lambda: get_transactions_by_user(db, user_id, skip=skip, limit=PAGE_SIZE))
+        keyset_ms = average_ms(lambda: get_transactions_by_user(db, user_id, limit=PAGE_SIZE, cursor=cursor))
+        rows.append([page, f"{offset_ms:.2f}", f"{keyset_ms:.2f}"])
+
+    report(f"Transaction listing, {PAGE_SIZE} rows per page over 200k transactions",
+           ["page", "offset ms", "cursor ms"], rows)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
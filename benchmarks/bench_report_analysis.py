@@ -0,0 +1,132 @@
+"""
+Benchmark: long-horizon analytics report, NumPy columnar engine vs SQL per month.
+
+Seeds one user with ~1M transactions over 10 years, then builds the same report series (monthly
+totals, rolling 3/6/12-month averages, year-over-year deltas, per-category percentiles, savings rate)
+four ways:
+  - SQL loop over the rollup: get_monthly_summary per month (summary cache cleared), series in Python
+  - SQL loop over raw transactions: one grouped transactions query per month, series in Python
+  - NumPy over raw transactions: one row per transaction loaded into the ledger arrays
+  - NumPy over the rollup: get_analytics_report, split into load and compute
+
+Run from the project root: python benchmarks/bench_report_analysis.py [transactions]
+"""
+import sys
+import time
+import numpy as np
+from _common import make_engine, make_session, seed_user, report
+from budget_planner.models.data_models import TransactionType
+from budget_planner.core.trend_analysis import get_monthly_summary, _previous_months, month_bounds, summary_cache
+from budget_planner.core.rollup_management import _transaction_totals_query
+from budget_planner.core.report_analysis import get_analytics_report, load_ledger, build_report, ROLLING_WINDOWS, LEDGER_DTYPE
+
+YEARS = 10
+HORIZONS = [12, 36, 108]
+WARMUP = 12
+
+
+def percentile(values, p):
+    """Linear interpolation between closest ranks (numpy's default method)."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def python_series(income, expenses, by_category, month_count):
+    """The report series from per-month totals, computed with plain Python loops."""
+    months = []
+    for i in range(WARMUP, WARMUP + month_count):
+        net = income[i] - expenses[i]
+        months.append({
+            "net": net,
+            "savings_rate": net / income[i] * 100 if income[i] else None,
+            "rolling": {w: sum(expenses[i - w + 1:i + 1]) / w for w in ROLLING_WINDOWS},
+            "yoy": expenses[i] - expenses[i - 12],
+        })
+    categories = {name: [percentile(series[WARMUP:], p) for p in (50, 75, 90)] for name, series in by_category.items()}
+    return months, categories
+
+
+def sql_loop_rollup(db, user_id, month_count):
+    summary_cache.clear()
+    summaries = [get_monthly_summary(db, user_id, year, month)
+                 for year, month in reversed(_previous_months(month_count + WARMUP))]
+    names = {name for summary in summaries for name in summary["expenses_by_category"]}
+    by_category = {name: [s["expenses_by_category"].get(name, 0) for s in summaries] for name in names}
+    return python_series([s["total_income"] for s in summaries], [s["total_expenses"] for s in summaries],
+                         by_category, month_count)
+
+
+def sql_loop_raw(db, user_id, month_count):
+    income, expenses, by_category = [], [], {}
+    months = list(reversed(_previous_months(month_count + WARMUP)))
+    for i, month in enumerate(months):
+        month_income = month_expenses = 0
+        for _, _, _, tx_type, category_id, total, _ in _transaction_totals_query(db, user_id, [month]).all():
+            if tx_type == TransactionType.INCOME:
+                month_income += total
+            else:
+                month_expenses += total
+                by_category.setdefault(category_id, [0] * len(months))[i] = total
+        income.append(month_income)
+        expenses.append(month_expenses)
+    return python_series(income, expenses, by_category, month_count)
+
+
+def load_transaction_ledger(db, user_id, months):
+    """The ledger arrays with one row per transaction instead of per rollup key."""
+    start, _ = month_bounds(*months[-1])
+    _, end = month_bounds(*months[0])
+    cursor = db.connection().connection.cursor()
+    cursor.execute(
+        "SELECT CAST(substr(date, 1, 4) AS INTEGER) * 12 + CAST(substr(date, 6, 2) AS INTEGER) - 23641, "
+        "amount_minor, type = 'INCOME', category_id FROM transactions WHERE user_id = ? AND date >= ? AND date < ?",
+        (user_id, str(start), str(end)))
+    return np.fromiter(cursor, dtype=LEDGER_DTYPE) # 23641 = 1970 * 12 + 1, i.e. months since January 1970
+
+
+def numpy_raw(db, user_id, month_count):
+    months = _previous_months(month_count + WARMUP)
+    return build_report(load_transaction_ledger(db, user_id, months), months[-1], month_count, WARMUP, {})
+
+
+def best_of(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    bench_engine = make_engine()
+    db = make_session(bench_engine)
+    start = time.perf_counter()
+    user_id = seed_user(db, months=YEARS * 12, tx_per_month=-(-transactions // (YEARS * 12)))
+    print(f"Seeded {transactions:,} transactions in {time.perf_counter() - start:.1f}s\n")
+
+    rows = []
+    for horizon in HORIZONS:
+        months = _previous_months(horizon + WARMUP)
+        load_ms = best_of(lambda: load_ledger(db, user_id, months[-1], months[0]))
+        ledger = load_ledger(db, user_id, months[-1], months[0])
+        compute_ms = best_of(lambda: build_report(ledger, months[-1], horizon, WARMUP, {}))
+        numpy_ms = best_of(lambda: get_analytics_report(db, user_id, horizon))
+        rollup_ms = best_of(lambda: sql_loop_rollup(db, user_id, horizon))
+        raw_ms = best_of(lambda: sql_loop_raw(db, user_id, horizon), repeats=1)
+        numpy_raw_ms = best_of(lambda: numpy_raw(db, user_id, horizon), repeats=1)
+        rows.append([horizon, f"{rollup_ms:.1f}", f"{raw_ms:.1f}", f"{numpy_raw_ms:.1f}",
+                     f"{numpy_ms:.1f}", f"{len(ledger):,}", f"{load_ms:.2f}", f"{compute_ms:.2f}"])
+
+    report(f"Analytics report (+{WARMUP} warm-up months), best time in ms",
+           ["months", "SQL loop (rollup)", "SQL loop (raw)", "numpy (raw)", "numpy (rollup)",
+            "rollup rows", "rollup load", "compute"], rows)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
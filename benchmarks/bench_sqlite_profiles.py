@@ -0,0 +1,97 @@
+"""
+Benchmark: concurrent reads and writes against SQLite under the "default" and "production" storage profiles.
+
+Reader threads page through GET /transactions-style listings and monthly summaries while writer threads
+create transactions (insert + rollup upsert + commit), all sharing one engine as the uvicorn threadpool does.
+Reports throughput, p50/p95/max latency and "database is locked" failures per profile.
+
+Run from the project root: python benchmarks/bench_sqlite_profiles.py [readers] [writers] [seconds]
+"""
+import datetime
+import sys
+import threading
+import time
+from _common import make_engine, make_session, report, seed_user
+from sqlalchemy.exc import OperationalError
+from budget_planner.models.data_models import Category, TransactionType
+from budget_planner.core import transaction_management, trend_analysis
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def worker(bench_engine, operation, stop, latencies, failures):
+    db = make_session(bench_engine)
+    try:
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                operation(db)
+            except OperationalError as error:
+                db.rollback()
+                failures.append(str(error.orig))
+                continue
+            finally:
+                db.rollback() # Release the read transaction, like the end of a request would
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+
+
+def run_profile(profile, readers, writers, seconds):
+    bench_engine = make_engine(profile=profile)
+    db = make_session(bench_engine)
+    user_id = seed_user(db, months=12, tx_per_month=500)
+    category_id = db.query(Category.id).filter(Category.user_id == user_id).first()[0]
+    db.close()
+
+    def read(session):
+        transaction_management.get_transactions_by_user(session, user_id, limit=50)
+        trend_analysis.get_spending_trend(session, user_id, period_count=6)
+
+    def write(session):
+        transaction_management.create_transaction(session, amount=12.5, type=TransactionType.EXPENSE,
+                                                  date=datetime.datetime.now(), user_id=user_id,
+                                                  category_id=category_id, description="bench write")
+
+    stop = threading.Event()
+    read_latencies, write_latencies, failures = [], [], []
+    threads = [threading.Thread(target=worker, args=(bench_engine, read, stop, read_latencies, failures))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(bench_engine, write, stop, write_latencies, failures))
+                for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    bench_engine.dispose()
+
+    rows = []
+    for kind, latencies in (("read", read_latencies), ("write", write_latencies)):
+        rows.append([profile, kind, len(latencies), f"{len(latencies) / seconds:.0f}",
+                     f"{percentile(latencies, 0.5):.1f}", f"{percentile(latencies, 0.95):.1f}",
+                     f"{max(latencies, default=0):.1f}"])
+    rows[-1].append(len(failures))
+    rows[0].append("")
+    return rows
+
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rows = []
+    for profile in ("default", "production"):
+        rows += run_profile(profile, readers, writers, seconds)
+    report(f"SQLite profiles, {readers} readers + {writers} writers for {seconds:.0f}s",
+           ["profile", "op", "count", "ops/s", "p50 ms", "p95 ms", "max ms", "locked errors"], rows)
+
+
+if __name__ == "__main__":
+    main()
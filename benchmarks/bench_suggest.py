@@ -0,0 +1,84 @@
+"""
+Benchmark: description autocomplete from the in-memory prefix index vs a SQL prefix query.
+
+Seeds one user with ~1M transactions drawn from 20k distinct descriptions, then times suggestions
+(10 most used descriptions for a prefix) for 1-, 2- and 4-character prefixes with
+  - DescriptionIndex.suggest alone (bisect on the sorted keys, top-10 by use count)
+  - suggest_descriptions (the same plus the data version lookup each request makes)
+  - SQL: LIKE 'prefix%' grouped by description, ordered by count
+and reports the index load time, its estimated size and the per-row cost of categorizing an import.
+
+Run from the project root: python benchmarks/bench_suggest.py [transactions]
+"""
+import random
+import sys
+import time
+from sqlalchemy import func
+from _common import make_engine, make_session, seed_user, report
+from budget_planner.models.data_models import Transaction
+from budget_planner.core.suggestion_index import (
+    suggestion_store, suggest_descriptions, load_description_index, match_category
+)
+
+WORDS = ["amazon", "apple", "aldi", "boots", "costa", "corner", "deliveroo", "shell", "starbucks", "tesco",
+         "uber", "netflix", "spotify", "ikea", "lidl", "pret", "ryanair", "steam", "zara", "waitrose"]
+PLACES = ["london", "leeds", "bristol", "paris", "online", "airport", "station", "market", "express", "superstore"]
+PREFIXES = ["s", "st", "star", "amazon o", "q"]
+REPEATS = 200
+
+
+def make_descriptions(count: int) -> list[str]:
+    rng = random.Random(11)
+    return sorted({f"{rng.choice(WORDS).title()} {rng.choice(PLACES).title()} {rng.randint(1, 2000)}" for _ in range(count)})
+
+
+def sql_suggest(db, user_id: int, prefix: str, limit: int = 10):
+    uses = func.count().label("uses")
+    return (db.query(Transaction.description, uses)
+            .filter(Transaction.user_id == user_id, Transaction.description.like(f"{prefix}%"))
+            .group_by(Transaction.description).order_by(uses.desc()).limit(limit).all())
+
+
+def per_call_ms(fn, repeats: int = REPEATS) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    bench_engine = make_engine()
+    db = make_session(bench_engine)
+    descriptions = make_descriptions(20_000)
+    user_id = seed_user(db, months=24, tx_per_month=transactions // 24, descriptions=descriptions)
+
+    start = time.perf_counter()
+    index = load_description_index(db, user_id, 0)
+    load_s = time.perf_counter() - start
+    print(f"Index of {len(index):,} distinct descriptions loaded in {load_s * 1000:.0f}ms, "
+          f"~{index.nbytes / 2 ** 20:.1f} MiB\n")
+
+    suggestion_store.discard()
+    suggest_descriptions(db, user_id, "a") # Loads the store
+    rows = []
+    for prefix in PREFIXES:
+        matches = sum(1 for key in index.keys if key.startswith(prefix))
+        index_ms = per_call_ms(lambda: index.suggest(prefix))
+        request_ms = per_call_ms(lambda: suggest_descriptions(db, user_id, prefix))
+        sql_ms = per_call_ms(lambda: sql_suggest(db, user_id, prefix), repeats=3)
+        rows.append([repr(prefix), f"{matches:,}", f"{index_ms:.3f}", f"{request_ms:.3f}", f"{sql_ms:.1f}"])
+    report("Top-10 suggestions, ms per call", ["prefix", "matching keys", "index", "index + version check", "SQL"], rows)
+
+    category_map = index.category_map()
+    imported = [f"{description.upper()} CARD {i}" for i, description in enumerate(descriptions)]
+    start = time.perf_counter()
+    assigned = sum(match_category(category_map, description) is not None for description in imported)
+    per_row_us = (time.perf_counter() - start) / len(imported) * 1e6
+    print(f"Auto-categorizing an import: {per_row_us:.2f}µs per row ({assigned:,}/{len(imported):,} rows matched)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: keeping a client current with full lists vs delta sync.
+
+Seeds a user with N transactions, then makes 10 edits (creates, updates, a delete) and measures what a
+client polling for them costs, through the API (TestClient against a throwaway database):
+  - full reload: GET /categories/ + GET /transactions/?limit=N + GET /goals/ (what the dashboard did)
+  - GET /sync/?since=0 (first sync: its first page, and only categories and goals as the dashboard does)
+    and GET /sync/?since=<cursor> (every poll after that)
+reporting latency, response bytes and SQL statements.
+
+Run from the project root: python benchmarks/bench_sync.py [transactions]
+"""
+import datetime
+import sys
+import time
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from _common import make_engine, seed_user, report, QueryCounter
+from budget_planner.api.main import app
+from budget_planner.api import dependencies
+from budget_planner.core.sync_management import SYNC_PAGE_SIZE
+from budget_planner.core.token_management import create_access_token
+from budget_planner.core.transaction_management import create_transaction, update_transaction, delete_transaction
+from budget_planner.models.data_models import Category, Transaction, TransactionType, User
+
+REPEATS = 5
+
+
+def measure(client, bench_engine, urls):
+    """Mean latency (ms), total response bytes and SQL statements of fetching 'urls' in turn."""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        responses = [client.get(url) for url in urls]
+    elapsed = (time.perf_counter() - start) / REPEATS
+    with QueryCounter(bench_engine) as counter:
+        for url in urls:
+            client.get(url)
+    assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+    return elapsed * 1000, sum(len(response.content) for response in responses), counter.count
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    bench_engine = make_engine()
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+    db = Session()
+    user_id = seed_user(db, months=24, tx_per_month=transactions // 24)
+    username = db.query(User.username).filter(User.id == user_id).scalar()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[dependencies.get_db] = override_get_db
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(user_id, username)}"
+
+    cursor = client.get("/sync/").json()["cursor"]
+    # 10 edits since the client's last sync
+    category_id = db.query(Category.id).filter(Category.user_id == user_id).first()[0]
+    ids = [tx_id for (tx_id,) in db.query(Transaction.id).filter(Transaction.user_id == user_id).limit(5)]
+    for i in range(5):
+        create_transaction(db, amount=5 + i, type=TransactionType.EXPENSE, date=datetime.datetime.now(),
+                           user_id=user_id, category_id=category_id, description="new")
+    for tx_id in ids[:4]:
+        update_transaction(db, tx_id, user_id, amount=42)
+    delete_transaction(db, ids[4], user_id)
+
+    rows = []
+    for label, urls in (("full reload (3 listings)", ["/categories/", f"/transactions/?limit={transactions + 10}", "/goals/"]),
+                        (f"sync since=0 (first page of {SYNC_PAGE_SIZE:,})", ["/sync/"]),
+                        ("sync since=0 (categories, goals)", ["/sync/?entity=categories&entity=goals"]),
+                        ("sync since=cursor (10 changes)", [f"/sync/?since={cursor}"])):
+        ms, size, statements = measure(client, bench_engine, urls)
+        rows.append([label, f"{ms:.1f}", f"{size / 1024:,.1f}", statements])
+    app.dependency_overrides.pop(dependencies.get_db, None)
+    db.close()
+    report(f"Polling for changes, {transactions:,} transactions (mean of {REPEATS})",
+           ["request", "ms", "KiB", "statements"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: query count and latency of get_spending_trend as period_count grows.
+
+Compares the grouped single-pass summary engine (reading the monthly rollup) against
+calling get_monthly_summary once per month, and against aggregating raw transactions.
+The summary cache is cleared before every call, so these are cold (uncached) timings.
+
+Run from the project root: python benchmarks/bench_trend_analysis.py
+"""
+import time
+from _common import make_engine, make_session, seed_user, QueryCounter, report
+from budget_planner.core.trend_analysis import get_spending_trend, get_monthly_summary, _previous_months, summary_cache
+from budget_planner.core.rollup_management import _transaction_totals_query
+
+PERIOD_COUNTS = [1, 3, 6, 12, 24]
+REPEATS = 20
+
+
+def per_month_loop(db, user_id, period_count):
+    return [get_monthly_summary(db, user_id, year, month) for year, month in _previous_months(period_count)]
+
+
+def raw_aggregate(db, user_id, period_count):
+    return _transaction_totals_query(db, user_id, _previous_months(period_count)).all()
+
+
+def measure(bench_engine, db, fn, user_id, period_count):
+    summary_cache.clear()
+    with QueryCounter(bench_engine) as counter:
+        fn(db, user_id, period_count)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        summary_cache.clear()
+        fn(db, user_id, period_count)
+    elapsed_ms = (time.perf_counter() - start) / REPEATS * 1000
+    return counter.count, elapsed_ms
+
+
+def main():
+    bench_engine = make_engine()
+    db = make_session(bench_engine)
+    user_id = seed_user(db, months=24, tx_per_month=500)
+
+    rows = []
+    for period_count in PERIOD_COUNTS:
+        loop_queries, loop_ms = measure(bench_engine, db, per_month_loop, user_id, period_count)
+        trend_queries, trend_ms = measure(bench_engine, db, get_spending_trend, user_id, period_count)
+        _, raw_ms = measure(bench_engine, db, raw_aggregate, user_id, period_count)
+        rows.append([period_count, loop_queries, f"{loop_ms:.2f}", trend_queries, f"{trend_ms:.2f}", f"{raw_ms:.2f}"])
+
+    report("get_spending_trend (24 months x 500 transactions)",
+           ["period_count", "loop queries", "loop ms", "grouped queries", "grouped ms", "raw transactions ms"], rows)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
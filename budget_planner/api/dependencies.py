@@ -1,13 +1,16 @@
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
-from budget_planner.models.database import SessionLocal, engine
-from budget_planner.models.data_models import User, create_tables
-from budget_planner.core.user_management import get_user_by_username
-from budget_planner.api.schemas import TokenData # Basic token data
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from budget_planner.models.database import (AsyncSessionLocal, AsyncSessionRunner, DB_MODE, SessionLocal,
+                                            ThreadSessionRunner, engine)
+from budget_planner.models.data_models import create_tables
+from budget_planner.core import token_management
 
 # Create tables if they don't exist (e.g. first run)
 create_tables(engine)
 
+# FastAPI caches dependency results per request, so every dependency (and the endpoint)
+# that asks for get_db within one request shares this single Session.
 def get_db():
     db = SessionLocal()
     try:
@@ -15,27 +18,59 @@ def get_db():
     finally:
         db.close()
 
-# Placeholder for current user - INSECURE, FOR DEVELOPMENT ONLY
-# In a real app, this would involve token decoding and validation
-async def get_current_user_placeholder(db: Session = Depends(get_db), user_id: int = 1): # Assume user_id 1 for now
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        # Create a dummy user if no user exists for placeholder to work
-        from budget_planner.core.user_management import create_user as core_create_user
-        user = core_create_user(db, "testuser_api", "testpass")
-        if user is None: # Should not happen unless db error
-             raise HTTPException(status_code=500, detail="Could not create test user for placeholder")
-        print(f"Created placeholder user with ID: {user.id} and username: {user.username}")
-        # Fallback to the newly created user_id if the hardcoded one (1) was not found initially
-        # This is hacky, real auth is needed.
-        if user_id != user.id: # if user_id 1 was not found, and we created a new one.
-             user = db.query(User).filter(User.id == user.id).first()
-
-
-    if user is None: # If still none, something is wrong.
+# Handlers are async and reach the database through a runner (see models.database):
+#   sync mode:  core functions run with the request's Session on the worker threadpool
+#   async mode: core functions run on an AsyncSession (aiosqlite), holding no thread while they wait
+if DB_MODE == "async":
+    async def get_db_runner():
+        session = AsyncSessionLocal()
+        try:
+            yield AsyncSessionRunner(session)
+        finally:
+            await session.close()
+else:
+    async def get_db_runner(db: Session = Depends(get_db)):
+        return ThreadSessionRunner(db)
+
+DatabaseRunner = ThreadSessionRunner | AsyncSessionRunner
+
+class Principal:
+    """The authenticated user for a request: just the fields handlers need, no ORM/session state."""
+    __slots__ = ("id", "username", "token_claims")
+
+    def __init__(self, id: int, username: str, token_claims: dict | None = None):
+        self.id = id
+        self.username = username
+        self.token_claims = token_claims
+
+    def __repr__(self):
+        return f"Principal(id={self.id}, username={self.username!r})"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: DatabaseRunner = Depends(get_db_runner)
+) -> Principal:
+    """
+    Authenticates the request from its signed bearer token: HMAC and expiry checks plus an
+    in-memory revocation lookup. No database round trip and no bcrypt work per request;
+    the (lazily connected) session is only used to reload revocations once per refresh interval.
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if token_management.revocation_list.is_stale():
+        await db.run(token_management.revocation_list.refresh)
+    try:
+        claims = token_management.decode_access_token(credentials.credentials)
+    except token_management.InvalidTokenError as error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Placeholder user not found, cannot proceed",
+            detail=str(error),
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    return Principal(id=claims["sub"], username=claims.get("name", ""), token_claims=claims)
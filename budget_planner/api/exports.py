@@ -0,0 +1,46 @@
+from fastapi.responses import StreamingResponse
+from budget_planner.core import export_management
+from budget_planner.api import dependencies
+import zlib
+
+GZIP_LEVEL = 6 # zlib's default: most of the size reduction of level 9 at a fraction of the CPU
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """True if an Accept-Encoding header allows gzip (listed without q=0)."""
+    for coding in (accept_encoding or "").lower().split(","):
+        name, _, params = coding.partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+async def _export_chunks(db: dependencies.DatabaseRunner, query_for, file_format: str, kind: str, gzip: bool):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None # wbits 31 = gzip container
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+    yield encode(export_management.export_header(file_format, kind))
+    after = None
+    while True: # One short read transaction per page: the session is released between pages
+        rows, after = await db.run(export_management.read_export_page, query_for=query_for, kind=kind, after=after,
+                                   limit=export_management.EXPORT_BATCH_SIZE)
+        chunk = encode(export_management.format_batch(rows, file_format, kind))
+        if chunk: # The compressor buffers small inputs; only send once it emits output
+            yield chunk
+        if after is None:
+            break
+    if compressor:
+        yield compressor.flush()
+
+def export_response(db: dependencies.DatabaseRunner, query_for, file_format: str, kind: str, filename: str,
+                    accept_encoding: str | None) -> StreamingResponse:
+    """
+    Streams an export as CSV or NDJSON, gzip-compressed on the fly when the client accepts it. 'query_for'
+    builds the export query for a page from the key of the previous page's last row (see read_export_page).
+    Memory use is one batch of rows and its text, whatever the size of the export.
+    """
+    gzip = accepts_gzip(accept_encoding)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{file_format}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(_export_chunks(db, query_for, file_format, kind, gzip),
+                             media_type=export_management.MEDIA_TYPES[file_format], headers=headers)
@@ -0,0 +1,73 @@
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from budget_planner.core import idempotency_management
+from budget_planner.api import dependencies
+import json
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+def _encode(response_model, result) -> str:
+    """The JSON body FastAPI would send for 'result' (an ORM object or a dict) under 'response_model'."""
+    model = response_model.model_validate(result, from_attributes=True)
+    return json.dumps(jsonable_encoder(model), separators=(",", ":"))
+
+def _replay(stored: tuple[int, str]) -> Response:
+    stored_status, body = stored
+    return Response(content=body, status_code=stored_status, media_type="application/json", headers={REPLAYED_HEADER: "true"})
+
+async def run_idempotent(db: dependencies.DatabaseRunner, user_id: int, key: str | None, fingerprint: str,
+                         handler, response_model, status_code: int = status.HTTP_200_OK, atomic: bool = True):
+    """
+    Runs 'handler' at most once per Idempotency-Key. 'handler' is an awaitable factory taking a before_commit
+    hook (None without a key) to pass on to the core function, which calls it with the session and the
+    result just before committing. Without a key the result is returned as is. With one, the response body is
+    stored with the key and a retry is answered from that copy (marked with the Idempotent-Replayed header)
+    without calling 'handler'.
+    atomic: the handler commits once, and the key is stored in that same DB transaction through the hook (if
+    it never commits, nothing is stored and a retry runs again). Otherwise (imports, which commit in batches)
+    the key is claimed first and the response stored afterwards; a request that raises releases its claim.
+    """
+    if key is None:
+        return await handler(None)
+    try:
+        if atomic:
+            stored = await db.run(idempotency_management.find_response, user_id=user_id, key=key, fingerprint=fingerprint)
+        else:
+            stored = await db.run(idempotency_management.claim_request, user_id=user_id, key=key, fingerprint=fingerprint)
+    except idempotency_management.IdempotencyKeyReused as error:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+    except idempotency_management.IdempotencyKeyInProgress as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    if isinstance(stored, tuple):
+        return _replay(stored)
+
+    if atomic:
+        stored_body = None
+
+        def before_commit(session, result):
+            nonlocal stored_body
+            body = _encode(response_model, result)
+            idempotency_management.store_response(session, user_id, key, fingerprint, status_code, body)
+            stored_body = body
+        try:
+            result = await handler(before_commit)
+        except idempotency_management.IdempotencyKeyInProgress as error: # A concurrent retry committed first
+            try:
+                stored = await db.run(idempotency_management.find_response, user_id=user_id, key=key, fingerprint=fingerprint)
+            except idempotency_management.IdempotencyKeyReused as reused:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(reused))
+            if stored is None:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+            return _replay(stored)
+        body = stored_body if stored_body is not None else _encode(response_model, result)
+    else:
+        token = stored
+        try:
+            body = _encode(response_model, await handler(None))
+        except BaseException:
+            await db.run(idempotency_management.release_request, user_id=user_id, key=key, token=token)
+            raise
+        await db.run(idempotency_management.complete_request, user_id=user_id, key=key, token=token,
+                     status_code=status_code, response_body=body)
+    await db.run(idempotency_management.purge_if_due)
+    return Response(content=body, status_code=status_code, media_type="application/json")
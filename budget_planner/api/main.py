@@ -4,7 +4,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 import pathlib
 
-from budget_planner.api.routers import auth, categories, transactions, goals
+from budget_planner.api.routers import auth, categories, transactions, goals, analytics, batch, sync
 from budget_planner.models.database import engine #, Base # create_tables is in dependencies
 
 # Base.metadata.create_all(bind=engine) # Ensure tables are created (also done in dependencies)
@@ -28,6 +28,9 @@ app.include_router(auth.router)
 app.include_router(categories.router)
 app.include_router(transactions.router)
 app.include_router(goals.router)
+app.include_router(analytics.router)
+app.include_router(batch.router)
+app.include_router(sync.router)
 
 # Serve index.html from the root of the web UI part, not API root
 @app.get("/", response_class=HTMLResponse)
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from budget_planner.core import export_management, trend_analysis, user_management
+from budget_planner.api import schemas, dependencies, exports
+import datetime
+import functools
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(dependencies.get_current_principal)]
+)
+
+# Analytics responses carry a strong ETag built from the user's data version (bumped by every write that
+# can change them) and the period requested, so a poll with a matching If-None-Match is answered with
+# 304 after a single primary-key lookup, without running any aggregation.
+# The version is read before the summaries: a write landing in between only makes the next poll refetch.
+CACHE_CONTROL = "private, no-cache" # Browsers may keep the response but must revalidate it
+
+def _etag(user_id: int, data_version: int, scope: str) -> str:
+    return f'"{user_id}-{data_version}-{scope}"'
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+async def _current_etag(db: dependencies.DatabaseRunner, user_id: int, scope: str) -> str:
+    data_version = await db.run(user_management.get_data_version, user_id=user_id)
+    if data_version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return _etag(user_id, data_version, scope)
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+@router.get("/monthly", response_model=schemas.MonthlySummaryResponse)
+async def read_monthly_summary_api(
+    response: Response,
+    year: Optional[int] = Query(None, ge=1900, le=9999),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    if_none_match: Optional[str] = Header(None),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    # Defaults to the current month
+    today = datetime.date.today()
+    year = year or today.year
+    month = month or today.month
+    etag = await _current_etag(db, current_user.id, f"m{year}-{month:02d}")
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    summary = await db.run(trend_analysis.get_monthly_summary, user_id=current_user.id, year=year, month=month)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return summary
+
+@router.get("/trend", response_model=List[schemas.MonthlySummaryResponse])
+async def read_spending_trend_api(
+    response: Response,
+    months: int = Query(3, ge=1, le=120),
+    if_none_match: Optional[str] = Header(None),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    # The window is relative to today, so the current month is part of the ETag
+    today = datetime.date.today()
+    etag = await _current_etag(db, current_user.id, f"t{months}-{today.year}-{today.month:02d}")
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    trend = await db.run(trend_analysis.get_spending_trend, user_id=current_user.id, period_count=months)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return trend # Most recent month first
+
+@router.get("/report", response_model=schemas.AnalyticsReportResponse)
+async def read_analytics_report_api(
+    response: Response,
+    months: int = Query(36, ge=1, le=600),
+    if_none_match: Optional[str] = Header(None),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    try:
+        from budget_planner.core import report_analysis # Optional: requires numpy
+    except ImportError:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Reports require numpy to be installed")
+    today = datetime.date.today()
+    etag = await _current_etag(db, current_user.id, f"r{months}-{today.year}-{today.month:02d}")
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    report = await db.run(report_analysis.get_analytics_report, user_id=current_user.id, period_count=months, today=today)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return report
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_monthly_summaries_api(
+    file_format: Literal[export_management.EXPORT_FORMATS] = Query("csv", alias="format"),
+    accept_encoding: Optional[str] = Header(None),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    # One row per month, type and category, straight from the monthly rollup
+    query_for = functools.partial(export_management.monthly_export_query, current_user.id)
+    return exports.export_response(db, query_for, file_format, "monthly", "monthly_summaries", accept_encoding)
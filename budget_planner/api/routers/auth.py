@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from budget_planner.core import user_management
+from budget_planner.core import user_management, token_management
 from budget_planner.api import schemas, dependencies
 
 router = APIRouter(
@@ -8,25 +7,44 @@ router = APIRouter(
     tags=["authentication"]
 )
 
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many concurrent authentication requests, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=schemas.UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(dependencies.get_db)):
-    db_user = user_management.get_user_by_username(db, username=user.username)
-    if db_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
-    created_user = user_management.create_user(db=db, username=user.username, password=user.password)
+async def register_user(user: schemas.UserCreate, db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner)):
+    # async so bcrypt waits on its own bounded pool instead of holding a request threadpool slot
+    try:
+        created_user = await user_management.create_user_async(db=db, username=user.username, password=user.password)
+    except user_management.PasswordHashingBusyError:
+        raise _password_pool_busy()
     if not created_user:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="User could not be created")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
     return created_user
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(form_data: schemas.UserCreate, db: Session = Depends(dependencies.get_db)): # Using UserCreate for simplicity
-    user = user_management.authenticate_user(db, username=form_data.username, password=form_data.password)
+async def login_for_access_token(form_data: schemas.UserCreate, db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner)): # Using UserCreate for simplicity
+    try:
+        user = await user_management.authenticate_user_async(db, username=form_data.username, password=form_data.password)
+    except user_management.PasswordHashingBusyError:
+        raise _password_pool_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    # For now, returning a dummy token. Real implementation would use JWT.
-    access_token = f"dummytoken_for_user_{user.id}"
-    return {"access_token": access_token, "token_type": "bearer"}
+    access_token = token_management.create_access_token(user.id, user.username)
+    return {"access_token": access_token, "token_type": "bearer", "expires_in": token_management.ACCESS_TOKEN_TTL_SECONDS}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    # Revoke the presented token; other workers pick it up on their next revocation refresh
+    await db.run(token_management.revoke_token, current_user.token_claims)
+    return None
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import ValidationError
+from typing import Optional
+from budget_planner.core import batch_management, idempotency_management
+from budget_planner.api import schemas, dependencies, idempotency
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    dependencies=[Depends(dependencies.get_current_principal)]
+)
+
+# Schema each operation's data is validated against (deletes carry no data)
+OPERATION_SCHEMAS = {
+    ("create", "transaction"): schemas.TransactionCreate,
+    ("update", "transaction"): schemas.TransactionUpdate,
+    ("create", "category"): schemas.CategoryCreate,
+    ("update", "category"): schemas.CategoryCreate,
+    ("create", "goal"): schemas.GoalCreate,
+    ("update", "goal"): schemas.GoalUpdate,
+}
+
+def _validated(operation: schemas.BatchOperation) -> dict:
+    """The operation as a dict for batch_management, with its data validated, or an error to report for it."""
+    op = {"action": operation.action, "entity": operation.entity, "id": operation.id, "data": {}}
+    schema = OPERATION_SCHEMAS.get((operation.action, operation.entity))
+    if schema is not None:
+        try:
+            op["data"] = schema.model_validate(operation.data).model_dump()
+        except ValidationError as error:
+            op["error"] = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return op
+
+@router.post("/", response_model=schemas.BatchResponse)
+async def apply_batch_api(
+    request: Request,
+    batch: schemas.BatchRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency_management.MAX_KEY_LENGTH,
+                                            description="Retries with the same key return the first response"),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    async def apply(before_commit):
+        # One DB transaction (and one commit) for the whole list; each operation gets its own result
+        try:
+            return await db.run(
+                batch_management.apply_batch,
+                user_id=current_user.id,
+                operations=[_validated(operation) for operation in batch.operations],
+                atomic=batch.atomic,
+                before_commit=before_commit
+            )
+        except ValueError as error: # Too many operations
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    fingerprint = idempotency_management.request_fingerprint("POST /batch/", await request.body())
+    return await idempotency.run_idempotent(db, current_user.id, idempotency_key, fingerprint, apply,
+                                            schemas.BatchResponse)
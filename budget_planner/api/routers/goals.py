@@ -1,80 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
+from typing import List
+from typing_extensions import TypedDict # pydantic needs it rather than typing.TypedDict before Python 3.12
 from budget_planner.core import goal_management
 from budget_planner.api import schemas, dependencies # Ensure schemas is correctly imported
-from budget_planner.models.data_models import User
-import datetime
 
 router = APIRouter(
     prefix="/goals",
     tags=["goals"],
-    dependencies=[Depends(dependencies.get_current_user_placeholder)]
+    dependencies=[Depends(dependencies.get_current_principal)]
 )
 
-def calculate_progress(current: float, target: float) -> float:
-    if target <= 0:
-        return 0.0
-    progress = (current / target) * 100
-    return round(min(progress, 100.0), 2)
+# GoalResponse's fields as a TypedDict, so a listing is serialized from plain dicts without building a model per goal
+GoalListItem = TypedDict("GoalListItem", {name: field.annotation for name, field in schemas.GoalResponse.model_fields.items()})
+GOAL_LIST = TypeAdapter(List[GoalListItem])
+
+def goal_list_json(rows) -> bytes:
+    """
+    The GoalResponse list for goal_management.get_goals_by_user rows, serialized by pydantic in one call.
+    The rows are typed SQL columns (amounts and progress computed by SQL), so they are not validated again.
+    """
+    return GOAL_LIST.dump_json([row._asdict() for row in rows])
 
 @router.post("/", response_model=schemas.GoalResponse, status_code=status.HTTP_201_CREATED)
-def create_goal_api(
+async def create_goal_api(
     goal: schemas.GoalCreate,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    created_goal_orm = goal_management.create_goal(
-        db=db,
-        user_id=current_user.id,
-        name=goal.name,
-        target_amount=goal.target_amount,
-        current_amount=goal.current_amount,
-        target_date=goal.target_date
-    )
+    try:
+        created_goal_orm = await db.run(
+            goal_management.create_goal,
+            user_id=current_user.id,
+            name=goal.name,
+            target_amount=goal.target_amount,
+            current_amount=goal.current_amount,
+            currency=goal.currency,
+            target_date=goal.target_date
+        )
+    except ValueError as error: # e.g. a malformed currency code
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
     if not created_goal_orm:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not create goal")
 
-    # Convert ORM model to Pydantic model for response, calculating dynamic fields
-    response_goal = schemas.GoalResponse.from_orm(created_goal_orm)
-    response_goal.progress_percentage = calculate_progress(created_goal_orm.current_amount, created_goal_orm.target_amount)
-    return response_goal
+    return created_goal_orm # progress_percentage is a property of Goal
 
 @router.get("/", response_model=List[schemas.GoalResponse])
-def read_goals_api(
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+async def read_goals_api(
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    rows = await db.run(goal_management.get_goals_by_user, user_id=current_user.id)
+    return Response(content=goal_list_json(rows), media_type="application/json")
+
+@router.post("/contribute", response_model=List[schemas.GoalResponse])
+async def contribute_to_goals_api(
+    batch: schemas.GoalContributionBatch,
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    goals_orm = goal_management.get_goals_by_user(db, user_id=current_user.id)
-    response_goals = []
-    for goal_orm in goals_orm:
-        response_goal = schemas.GoalResponse.from_orm(goal_orm)
-        response_goal.progress_percentage = calculate_progress(goal_orm.current_amount, goal_orm.target_amount)
-        response_goals.append(response_goal)
-    return response_goals
+    # All contributions in one UPDATE and one INSERT; nothing is applied if any goal is not found
+    try:
+        updated_goals = await db.run(
+            goal_management.contribute_to_goals,
+            user_id=current_user.id,
+            contributions=[(item.goal_id, item.amount) for item in batch.contributions]
+        )
+    except ValueError as error: # Too many contributions
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    if updated_goals is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="One or more goals not found")
+    return updated_goals
 
 @router.get("/{goal_id}", response_model=schemas.GoalResponse)
-def read_goal_api(
+async def read_goal_api(
     goal_id: int,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    db_goal_orm = goal_management.get_goal_by_id(db, goal_id=goal_id, user_id=current_user.id)
+    db_goal_orm = await db.run(goal_management.get_goal_by_id, goal_id=goal_id, user_id=current_user.id)
     if db_goal_orm is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    response_goal = schemas.GoalResponse.from_orm(db_goal_orm)
-    response_goal.progress_percentage = calculate_progress(db_goal_orm.current_amount, db_goal_orm.target_amount)
-    return response_goal
+    return db_goal_orm
 
 @router.put("/{goal_id}", response_model=schemas.GoalResponse)
-def update_goal_api(
+async def update_goal_api(
     goal_id: int,
     goal_update: schemas.GoalUpdate,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    updated_goal_orm = goal_management.update_goal(
-        db,
+    updated_goal_orm = await db.run(
+        goal_management.update_goal,
         goal_id=goal_id,
         user_id=current_user.id,
         name=goal_update.name,
@@ -85,32 +102,28 @@ def update_goal_api(
     )
     if not updated_goal_orm:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found or update failed")
-    response_goal = schemas.GoalResponse.from_orm(updated_goal_orm)
-    response_goal.progress_percentage = calculate_progress(updated_goal_orm.current_amount, updated_goal_orm.target_amount)
-    return response_goal
+    return updated_goal_orm
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_goal_api(
+async def delete_goal_api(
     goal_id: int,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    if not goal_management.delete_goal(db, goal_id=goal_id, user_id=current_user.id):
+    if not await db.run(goal_management.delete_goal, goal_id=goal_id, user_id=current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found or could not be deleted")
     return None # FastAPI handles 204
 
 @router.post("/{goal_id}/contribute", response_model=schemas.GoalResponse)
-def contribute_to_goal_api(
+async def contribute_to_goal_api(
     goal_id: int,
     contribution: schemas.GoalContribution,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    updated_goal_orm = goal_management.update_goal_progress(
-        db, goal_id=goal_id, user_id=current_user.id, contributed_amount=contribution.amount
+    updated_goal_orm = await db.run(
+        goal_management.update_goal_progress, goal_id=goal_id, user_id=current_user.id, contributed_amount=contribution.amount
     )
     if not updated_goal_orm:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found or contribution failed")
-    response_goal = schemas.GoalResponse.from_orm(updated_goal_orm)
-    response_goal.progress_percentage = calculate_progress(updated_goal_orm.current_amount, updated_goal_orm.target_amount)
-    return response_goal
+    return updated_goal_orm
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Literal, Optional
+from budget_planner.core import sync_management
+from budget_planner.api import schemas, dependencies
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"],
+    dependencies=[Depends(dependencies.get_current_principal)]
+)
+
+@router.get("/", response_model=schemas.SyncResponse)
+async def sync_api(
+    since: int = Query(0, ge=0, description="Cursor from the previous sync; 0 for a full snapshot"),
+    entity: Optional[List[Literal[sync_management.SYNC_ENTITIES]]] = Query(None, description="Repeat to sync only some entities"),
+    page: Optional[str] = Query(None, description="'next_page' of the previous response, for the rest of this sync"),
+    limit: int = Query(sync_management.SYNC_PAGE_SIZE, ge=1, le=sync_management.MAX_SYNC_PAGE_SIZE),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    # Work and payload scale with the number of changes since the cursor, not with the size of the data
+    try:
+        changes = await db.run(sync_management.get_changes, user_id=current_user.id, since=since,
+                               entities=entity or sync_management.SYNC_ENTITIES, page=page, page_size=limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync page")
+    if changes is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return changes
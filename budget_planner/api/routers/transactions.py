@@ -1,79 +1,200 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from budget_planner.core import transaction_management
-from budget_planner.api import schemas, dependencies
-from budget_planner.models.data_models import User, TransactionType # For Depends and types
+from fastapi import APIRouter, Depends, Header, HTTPException, status, File, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from budget_planner.core import (transaction_management, import_management, export_management, idempotency_management,
+                                 money, suggestion_index)
+from budget_planner.api import schemas, dependencies, exports, idempotency
+from budget_planner.models.data_models import TransactionType # For types
 import datetime
+import functools
+import hashlib
+import io
 
 router = APIRouter(
     prefix="/transactions",
     tags=["transactions"],
-    dependencies=[Depends(dependencies.get_current_user_placeholder)] # Apply placeholder auth
+    dependencies=[Depends(dependencies.get_current_principal)] # Require a valid bearer token
 )
 
 @router.post("/", response_model=schemas.TransactionResponse, status_code=status.HTTP_201_CREATED)
-def create_transaction_api(
+async def create_transaction_api(
+    request: Request,
     transaction: schemas.TransactionCreate,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency_management.MAX_KEY_LENGTH,
+                                            description="Retries with the same key return the first response"),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    # Ensure category belongs to user (done by core.create_transaction, but good to be aware)
-    created_tx = transaction_management.create_transaction(
-        db=db,
-        amount=transaction.amount,
-        type=transaction.type,
-        date=transaction.date,
-        description=transaction.description,
-        category_id=transaction.category_id,
-        user_id=current_user.id
-    )
-    if not created_tx:
-        # This usually means the category_id is invalid or doesn't belong to the user
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid category ID or category does not belong to user")
-    return created_tx
+    async def create(before_commit):
+        # Ensure category belongs to user (done by core.create_transaction, but good to be aware)
+        try:
+            created_tx = await db.run(
+                transaction_management.create_transaction,
+                amount=transaction.amount,
+                currency=transaction.currency,
+                type=transaction.type,
+                date=transaction.date,
+                description=transaction.description,
+                category_id=transaction.category_id,
+                user_id=current_user.id,
+                before_commit=before_commit
+            )
+        except ValueError as error: # e.g. a malformed currency code
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+        if not created_tx:
+            # This usually means the category_id is invalid or doesn't belong to the user
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid category ID or category does not belong to user")
+        return created_tx
+    # Fingerprint the raw body: defaults such as the date are filled in afresh on every retry
+    fingerprint = idempotency_management.request_fingerprint("POST /transactions/", await request.body())
+    return await idempotency.run_idempotent(db, current_user.id, idempotency_key, fingerprint, create,
+                                            schemas.TransactionResponse, status.HTTP_201_CREATED)
+
+@router.post("/import", response_model=schemas.TransactionImportReport)
+async def import_transactions_api(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", description="csv, ofx or qif; guessed from the file name if omitted"),
+    create_missing_categories: bool = False,
+    default_category: Optional[str] = Query(None, description="Category for rows that do not name one (e.g. OFX)"),
+    auto_categorize: bool = Query(False, description="File rows that name no category under the one their description usually gets"),
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency_management.MAX_KEY_LENGTH,
+                                            description="Retries with the same key return the first report"),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    file_format = (file_format or import_management.detect_format(file.filename)).lower()
+    if file_format not in import_management.SUPPORTED_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import format '{file_format}'")
+
+    async def run_import(before_commit):
+        # Decode lazily so the upload is parsed line by line instead of being read into memory
+        # (In async mode parsing runs on the event loop between awaited batch inserts.)
+        lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            return await db.run(
+                import_management.import_transactions,
+                user_id=current_user.id,
+                lines=lines,
+                file_format=file_format,
+                create_missing_categories=create_missing_categories,
+                default_category=default_category,
+                auto_categorize=auto_categorize
+            )
+        finally:
+            lines.detach() # The upload object owns and closes the underlying file
+    fingerprint = None
+    if idempotency_key is not None: # Hash the upload in chunks (it is spooled to disk when large), then rewind
+        content = hashlib.sha256()
+        while chunk := await file.read(1 << 20):
+            content.update(chunk)
+        await file.seek(0)
+        options = f"{file_format}|{create_missing_categories}|{default_category}|{auto_categorize}".encode()
+        fingerprint = idempotency_management.request_fingerprint("POST /transactions/import", options, content.digest())
+    return await idempotency.run_idempotent(db, current_user.id, idempotency_key, fingerprint, run_import,
+                                            schemas.TransactionImportReport, atomic=False)
 
 @router.get("/", response_model=List[schemas.TransactionResponse])
-def read_transactions_api(
+async def read_transactions_api(
+    response: Response,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    start_date: Optional[datetime.datetime] = Query(None, description="Inclusive lower bound on the date"),
+    end_date: Optional[datetime.datetime] = Query(None, description="Exclusive upper bound on the date"),
+    type: Optional[TransactionType] = None,
+    category_id: Optional[List[int]] = Query(None, description="Repeat to match any of several categories"),
+    min_amount: Optional[float] = Query(None, ge=0, description="Inclusive lower bound on the amount"),
+    max_amount: Optional[float] = Query(None, ge=0, description="Inclusive upper bound on the amount"),
+    sort: Literal[transaction_management.TRANSACTION_SORTS] = "date_desc",
+    totals: bool = Query(False, description="Add X-Total-Count/-Income/-Expenses headers for all matching rows"),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    transactions = transaction_management.get_transactions_by_user(db, user_id=current_user.id, skip=skip, limit=limit)
+    filters = dict(start_date=start_date, end_date=end_date, type=type, category_ids=category_id,
+                   min_amount=min_amount, max_amount=max_amount)
+    try:
+        transactions = await db.run(
+            transaction_management.get_transactions_by_user, user_id=current_user.id, skip=skip, limit=limit,
+            cursor=cursor, sort=sort, **filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    if limit > 0 and len(transactions) == limit: # A full page means there may be more
+        response.headers["X-Next-Cursor"] = transaction_management.encode_transaction_cursor(transactions[-1], sort)
+    if totals: # Opt-in, since it costs an aggregate query over every matching row
+        summary = await db.run(transaction_management.summarize_transactions, user_id=current_user.id, **filters)
+        response.headers["X-Total-Count"] = str(summary["transaction_count"])
+        response.headers["X-Total-Income"] = f"{money.to_major(summary['total_income_minor']):.2f}"
+        response.headers["X-Total-Expenses"] = f"{money.to_major(summary['total_expenses_minor']):.2f}"
     return transactions
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_transactions_api(
+    file_format: Literal[export_management.EXPORT_FORMATS] = Query("csv", alias="format"),
+    start_date: Optional[datetime.datetime] = Query(None, description="Inclusive lower bound on the date"),
+    end_date: Optional[datetime.datetime] = Query(None, description="Exclusive upper bound on the date"),
+    accept_encoding: Optional[str] = Header(None),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    query_for = functools.partial(export_management.transaction_export_query, current_user.id, start_date, end_date)
+    return exports.export_response(db, query_for, file_format, "transactions", "transactions", accept_encoding)
+
+@router.get("/suggest", response_model=List[schemas.DescriptionSuggestion])
+async def suggest_descriptions_api(
+    prefix: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(suggestion_index.DEFAULT_SUGGESTIONS, ge=1, le=50),
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    return await db.run(suggestion_index.suggest_descriptions, user_id=current_user.id, prefix=prefix, limit=limit)
+
+@router.get("/search", response_model=List[schemas.TransactionResponse])
+async def search_transactions_api(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in descriptions; end a word with * to match it as a prefix"),
+    skip: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=200),
+    order: Literal[tuple(transaction_management.SEARCH_ORDERS)] = "relevance",
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
+):
+    return await db.run(transaction_management.search_transactions, user_id=current_user.id, query=q, skip=skip,
+                        limit=limit, order=order)
+
 @router.get("/{transaction_id}", response_model=schemas.TransactionResponse)
-def read_transaction_api(
+async def read_transaction_api(
     transaction_id: int,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    db_transaction = transaction_management.get_transaction_by_id(db, transaction_id=transaction_id, user_id=current_user.id)
+    db_transaction = await db.run(transaction_management.get_transaction_by_id, transaction_id=transaction_id, user_id=current_user.id)
     if db_transaction is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
     return db_transaction
 
 
 @router.put("/{transaction_id}", response_model=schemas.TransactionResponse)
-def update_transaction_api(
+async def update_transaction_api(
     transaction_id: int,
     transaction_update: schemas.TransactionBase, # Use TransactionBase as all fields are optional for update
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    updated_tx = transaction_management.update_transaction(
-        db,
-        transaction_id=transaction_id,
-        user_id=current_user.id,
-        amount=transaction_update.amount,
-        type=transaction_update.type,
-        date=transaction_update.date,
-        description=transaction_update.description,
-        category_id=transaction_update.category_id
-    )
+    try:
+        updated_tx = await db.run(
+            transaction_management.update_transaction,
+            transaction_id=transaction_id,
+            user_id=current_user.id,
+            amount=transaction_update.amount,
+            currency=transaction_update.currency,
+            type=transaction_update.type,
+            date=transaction_update.date,
+            description=transaction_update.description,
+            category_id=transaction_update.category_id
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
     if not updated_tx:
         # Check if tx exists first
-        tx_exists = transaction_management.get_transaction_by_id(db, transaction_id, current_user.id)
+        tx_exists = await db.run(transaction_management.get_transaction_by_id, transaction_id, current_user.id)
         if not tx_exists:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
         else: # Exists, but update failed (e.g. invalid new category_id)
@@ -81,11 +202,11 @@ def update_transaction_api(
     return updated_tx
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction_api(
+async def delete_transaction_api(
     transaction_id: int,
-    db: Session = Depends(dependencies.get_db),
-    current_user: User = Depends(dependencies.get_current_user_placeholder)
+    db: dependencies.DatabaseRunner = Depends(dependencies.get_db_runner),
+    current_user: dependencies.Principal = Depends(dependencies.get_current_principal)
 ):
-    if not transaction_management.delete_transaction(db, transaction_id=transaction_id, user_id=current_user.id):
+    if not await db.run(transaction_management.delete_transaction, transaction_id=transaction_id, user_id=current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found or could not be deleted")
     return None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 import datetime
 from budget_planner.models.data_models import TransactionType # Enum
 
@@ -17,11 +17,13 @@ class UserResponse(UserBase):
 
     class Config:
         orm_mode = True
+        from_attributes = True # Pydantic 2's name for orm_mode (from_orm fails without it)
 
 # --- Token Schemas (Basic for now) ---
 class Token(BaseModel):
     access_token: str
     token_type: str
+    expires_in: Optional[int] = None # Seconds until the access token expires
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -39,10 +41,14 @@ class CategoryResponse(CategoryBase):
 
     class Config:
         orm_mode = True
+        from_attributes = True
 
 # --- Transaction Schemas ---
+# Amounts are decimal numbers in major units at the API edge; they are stored as integer cents
+# (amount_minor, also returned so clients can work with exact values).
 class TransactionBase(BaseModel):
     amount: float = Field(..., gt=0) # Greater than 0
+    currency: Optional[str] = Field(None, min_length=3, max_length=3) # ISO 4217, defaults to USD
     type: TransactionType
     date: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
     description: Optional[str] = Field(None, max_length=255)
@@ -51,19 +57,47 @@ class TransactionBase(BaseModel):
 class TransactionCreate(TransactionBase):
     pass
 
+class TransactionUpdate(BaseModel): # Partial update: only the fields given are changed
+    amount: Optional[float] = Field(None, gt=0)
+    currency: Optional[str] = Field(None, min_length=3, max_length=3)
+    type: Optional[TransactionType] = None
+    date: Optional[datetime.datetime] = None
+    description: Optional[str] = Field(None, max_length=255)
+    category_id: Optional[int] = None
+
 class TransactionResponse(TransactionBase):
     id: int
+    amount_minor: int
+    currency: str
     user_id: int # Or fetch from current user context
     category: CategoryResponse # Nested category information
 
     class Config:
         orm_mode = True
+        from_attributes = True
+
+class ImportRowError(BaseModel):
+    row: int # Line number in the uploaded file
+    error: str
+
+class TransactionImportReport(BaseModel):
+    imported: int
+    failed: int
+    auto_categorized: int = 0 # Rows filed under the category their description usually gets
+    created_categories: List[str] = []
+    errors: List[ImportRowError] = []
+
+class DescriptionSuggestion(BaseModel):
+    description: str
+    category_id: Optional[int] = None # The category this description is most often filed under
+    uses: int
 
 # --- Goal Schemas ---
 class GoalBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     target_amount: float = Field(..., gt=0)
     current_amount: float = Field(default=0.0, ge=0)
+    currency: Optional[str] = Field(None, min_length=3, max_length=3) # ISO 4217, defaults to USD
     target_date: Optional[datetime.datetime] = None
 
 class GoalCreate(GoalBase):
@@ -78,12 +112,91 @@ class GoalUpdate(BaseModel):
 
 class GoalResponse(GoalBase):
     id: int
+    target_amount_minor: int
+    current_amount_minor: int
+    currency: str
     user_id: int
     creation_date: datetime.datetime
     progress_percentage: float = 0.0
 
     class Config:
         orm_mode = True
+        from_attributes = True
 
 class GoalContribution(BaseModel):
     amount: float = Field(..., gt=0)
+
+class GoalContributionItem(GoalContribution):
+    goal_id: int
+
+class GoalContributionBatch(BaseModel):
+    contributions: List[GoalContributionItem] # At most goal_management.MAX_CONTRIBUTIONS
+
+# --- Batch Schemas ---
+class BatchOperation(BaseModel):
+    action: Literal["create", "update", "delete"]
+    entity: Literal["transaction", "category", "goal"]
+    id: Optional[int] = None # Row to update or delete
+    data: Dict[str, Any] = {} # Fields of the entity's create (or update) schema
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] # At most batch_management.MAX_BATCH_OPERATIONS
+    atomic: bool = True # All or nothing; otherwise failed operations are skipped and the rest committed
+
+class BatchResult(BaseModel):
+    index: int # Position of the operation in the request
+    status: Literal["ok", "error", "rolled_back"]
+    id: Optional[int] = None # Id of the created, updated or deleted row
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    committed: bool
+    applied: int
+    failed: int
+    results: List[BatchResult]
+
+# --- Sync Schemas ---
+class SyncDeleted(BaseModel):
+    categories: List[int] = []
+    transactions: List[int] = []
+    goals: List[int] = []
+
+class SyncResponse(BaseModel):
+    cursor: int # Pass as 'since' on the next sync
+    full: bool # True for since=0: a complete snapshot that replaces the client's copy
+    categories: List[CategoryResponse]
+    transactions: List[TransactionResponse]
+    goals: List[GoalResponse]
+    deleted: SyncDeleted # Ids to drop; apply before the upserts
+    next_page: Optional[str] = None # More rows at this cursor: pass as 'page' (with the same 'since' and 'entity')
+
+# --- Analytics Schemas ---
+class MonthlySummaryResponse(BaseModel):
+    year: int
+    month: int
+    total_income: float
+    total_expenses: float
+    expenses_by_category: Dict[str, float] = {}
+    net_savings: float
+
+class ReportMonth(BaseModel):
+    year: int
+    month: int
+    total_income: float
+    total_expenses: float
+    net_savings: float
+    cumulative_savings: float # Since the first reported month
+    savings_rate: Optional[float] = None # Percent of income; null in months without income
+    yoy_expenses_delta: Optional[float] = None
+    yoy_expenses_change_pct: Optional[float] = None
+    rolling_expenses: Dict[str, Optional[float]] = {} # Trailing mean keyed by window length in months
+
+class ReportCategory(BaseModel):
+    category_id: int
+    name: str
+    total_expenses: float
+    monthly_percentiles: Dict[str, float] = {} # Of the category's monthly spend, e.g. {"p50": ..., "p90": ...}
+
+class AnalyticsReportResponse(BaseModel):
+    months: List[ReportMonth] # Oldest first
+    categories: List[ReportCategory] # Highest spend first
@@ -0,0 +1,303 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from budget_planner.models.data_models import Category, Goal, GoalContribution, Transaction, MonthlyRollup
+from budget_planner.core import money, rollup_management
+from budget_planner.core.user_management import bump_data_version
+from budget_planner.core.transaction_management import record_deletion
+from budget_planner.core.trend_analysis import summary_cache
+from budget_planner.core.ledger_store import ledger_store
+from budget_planner.core.suggestion_index import suggestion_store
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+# A batch applies many creates/updates/deletes of transactions, categories and goals (e.g. the edits a
+# client made offline) in one DB transaction with one commit. Each operation runs in a SAVEPOINT, so
+# a failing one is undone on its own: atomic batches then roll everything back, non-atomic batches
+# commit the rest. The rows an operation targets and the categories it references are loaded up front
+# with one set-based query per entity instead of one lookup per operation.
+BATCH_ENTITIES = ("transaction", "category", "goal")
+BATCH_ACTIONS = ("create", "update", "delete")
+MAX_BATCH_OPERATIONS = 1000
+
+class BatchOperationError(ValueError):
+    """Raised for an operation that cannot be applied; it becomes that operation's error result."""
+
+class _Batch:
+    """State shared by the operations of one batch, and the cache/store updates to run after the commit."""
+
+    def __init__(self, db: Session, user_id: int, version: int):
+        self.db = db
+        self.user_id = user_id
+        self.version = version # change_seq of every row the batch writes
+        self.transactions: Dict[int, Transaction] = {}
+        self.categories: Dict[int, Category] = {}
+        self.goals: Dict[int, Goal] = {}
+        self.category_names: Set[str] = set() # Lowercase names of the user's categories
+        self.months: Set[Tuple[int, int]] = set() # Cached monthly summaries to invalidate
+        self.ledger_updates: List[Callable] = []
+        self.suggestion_updates: List[Tuple[str | None, int, int]] = []
+
+def _ids(operations: List[Dict[str, Any]], entity: str) -> Set[int]:
+    return {op["id"] for op in operations if op["entity"] == entity and op.get("id") is not None}
+
+def _load_targets(batch: _Batch, operations: List[Dict[str, Any]]) -> None:
+    """Loads every row the batch updates or deletes, and every category it references, in one query per entity."""
+    db, user_id = batch.db, batch.user_id
+    transaction_ids = _ids(operations, "transaction")
+    if transaction_ids:
+        batch.transactions = {tx.id: tx for tx in db.scalars(
+            select(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(transaction_ids)))}
+    goal_ids = _ids(operations, "goal")
+    if goal_ids:
+        batch.goals = {goal.id: goal for goal in db.scalars(
+            select(Goal).where(Goal.user_id == user_id, Goal.id.in_(goal_ids)))}
+    # All of the user's categories: ownership checks for category_id fields and name conflicts for creates/renames
+    batch.categories = {category.id: category for category in db.scalars(select(Category).where(Category.user_id == user_id))}
+    batch.category_names = {category.name.lower() for category in batch.categories.values()}
+
+def _owned_category(batch: _Batch, category_id: int | None) -> int:
+    if category_id not in batch.categories:
+        raise BatchOperationError("Invalid category ID or category does not belong to user")
+    return category_id
+
+def _target(rows: Dict[int, Any], op: Dict[str, Any], entity: str) -> Any:
+    row = rows.get(op.get("id"))
+    if row is None:
+        raise BatchOperationError(f"{entity.capitalize()} not found")
+    return row
+
+def _ledger_row(transaction: Transaction, category_name: str) -> Callable:
+    """A ledger update replacing the transaction's row, from values captured now (the commit expires the object)."""
+    values = (transaction.id, transaction.date, transaction.amount_minor, transaction.type, transaction.category_id,
+              transaction.currency, transaction.description)
+    def upsert(ledger):
+        ledger.delete(values[0])
+        ledger.category_names[values[4]] = category_name
+        ledger.insert(*values)
+    return upsert
+
+# --- Operations: each runs inside its own SAVEPOINT and returns the id of the row it affected ---
+
+def _create_transaction(batch: _Batch, op: Dict[str, Any]) -> int:
+    data = op["data"]
+    category_id = _owned_category(batch, data.get("category_id"))
+    transaction = Transaction(
+        amount_minor=money.to_minor(data["amount"]),
+        currency=money.normalize_currency(data.get("currency")),
+        type=data["type"],
+        date=data["date"],
+        description=data.get("description"),
+        category_id=category_id,
+        user_id=batch.user_id,
+        change_seq=batch.version,
+    )
+    batch.db.add(transaction)
+    batch.db.flush() # Assigns the id
+    rollup_management.add_transaction_to_rollup(batch.db, transaction)
+    batch.months.add((transaction.date.year, transaction.date.month))
+    batch.ledger_updates.append(_ledger_row(transaction, batch.categories[category_id].name))
+    batch.suggestion_updates.append((transaction.description, category_id, 1))
+    return transaction.id
+
+def _update_transaction(batch: _Batch, op: Dict[str, Any]) -> int:
+    data = op["data"]
+    transaction = _target(batch.transactions, op, "transaction")
+    if data.get("category_id") is not None:
+        _owned_category(batch, data["category_id"])
+    rollup_management.remove_transaction_from_rollup(batch.db, transaction)
+    batch.months.add((transaction.date.year, transaction.date.month))
+    batch.suggestion_updates.append((transaction.description, transaction.category_id, -1))
+
+    if data.get("category_id") is not None:
+        transaction.category_id = data["category_id"]
+    if data.get("amount") is not None:
+        transaction.amount_minor = money.to_minor(data["amount"])
+    if data.get("currency") is not None:
+        transaction.currency = money.normalize_currency(data["currency"])
+    for field in ("type", "date", "description"):
+        if data.get(field) is not None:
+            setattr(transaction, field, data[field])
+    transaction.change_seq = batch.version
+
+    batch.db.flush()
+    rollup_management.add_transaction_to_rollup(batch.db, transaction)
+    batch.months.add((transaction.date.year, transaction.date.month))
+    batch.ledger_updates.append(_ledger_row(transaction, batch.categories[transaction.category_id].name))
+    batch.suggestion_updates.append((transaction.description, transaction.category_id, 1))
+    return transaction.id
+
+def _delete_transaction(batch: _Batch, op: Dict[str, Any]) -> int:
+    transaction = _target(batch.transactions, op, "transaction")
+    rollup_management.remove_transaction_from_rollup(batch.db, transaction)
+    batch.months.add((transaction.date.year, transaction.date.month))
+    batch.suggestion_updates.append((transaction.description, transaction.category_id, -1))
+    transaction_id = transaction.id
+    record_deletion(batch.db, batch.user_id, "transaction", transaction_id, batch.version)
+    batch.db.delete(transaction)
+    batch.db.flush()
+    del batch.transactions[transaction_id] # A later operation on it in this batch gets "not found"
+    batch.ledger_updates.append(lambda ledger: ledger.delete(transaction_id))
+    return transaction_id
+
+def _claim_category_name(batch: _Batch, name: str, current: str | None = None) -> None:
+    if name.lower() in batch.category_names and name.lower() != (current or "").lower():
+        raise BatchOperationError("Category with this name already exists")
+
+def _create_category(batch: _Batch, op: Dict[str, Any]) -> int:
+    name = op["data"]["name"]
+    _claim_category_name(batch, name)
+    category = Category(name=name, user_id=batch.user_id, change_seq=batch.version)
+    batch.db.add(category)
+    batch.db.flush()
+    batch.categories[category.id] = category # Usable by the transactions that follow in the batch
+    batch.category_names.add(name.lower())
+    return category.id
+
+def _update_category(batch: _Batch, op: Dict[str, Any]) -> int:
+    category = _target(batch.categories, op, "category")
+    name = op["data"]["name"]
+    _claim_category_name(batch, name, category.name)
+    if name != category.name:
+        # Summaries list expenses by category name; invalidate the months this category appears in
+        batch.months.update(batch.db.execute(select(MonthlyRollup.year, MonthlyRollup.month).where(
+            MonthlyRollup.user_id == batch.user_id, MonthlyRollup.category_id == category.id).distinct()).all())
+        batch.category_names.discard(category.name.lower())
+        batch.category_names.add(name.lower())
+        category.name = name
+        category.change_seq = batch.version
+        batch.db.flush()
+        category_id = category.id
+        batch.ledger_updates.append(lambda ledger: ledger.rename_category(category_id, name))
+    return category.id
+
+def _delete_category(batch: _Batch, op: Dict[str, Any]) -> int:
+    category = _target(batch.categories, op, "category")
+    batch.db.flush() # Count transactions moved or created earlier in the batch
+    if batch.db.query(Transaction.id).filter(Transaction.category_id == category.id).first() is not None:
+        raise BatchOperationError("Category cannot be deleted (e.g., has linked transactions)")
+    category_id = category.id
+    record_deletion(batch.db, batch.user_id, "category", category_id, batch.version)
+    batch.db.delete(category)
+    batch.db.flush()
+    del batch.categories[category_id]
+    batch.category_names.discard(category.name.lower())
+    return category_id
+
+def _create_goal(batch: _Batch, op: Dict[str, Any]) -> int:
+    data = op["data"]
+    goal = Goal(
+        name=data["name"],
+        target_amount_minor=money.to_minor(data["target_amount"]),
+        current_amount_minor=money.to_minor(data.get("current_amount") or 0),
+        currency=money.normalize_currency(data.get("currency")),
+        target_date=data.get("target_date"),
+        user_id=batch.user_id,
+        change_seq=batch.version,
+    )
+    batch.db.add(goal)
+    batch.db.flush()
+    return goal.id
+
+def _update_goal(batch: _Batch, op: Dict[str, Any]) -> int:
+    data = op["data"]
+    goal = _target(batch.goals, op, "goal")
+    if data.get("name") is not None:
+        goal.name = data["name"]
+    if data.get("target_amount") is not None:
+        goal.target_amount_minor = money.to_minor(data["target_amount"])
+    if data.get("current_amount") is not None:
+        goal.current_amount_minor = money.to_minor(data["current_amount"])
+    if data.get("clear_target_date"):
+        goal.target_date = None
+    elif data.get("target_date") is not None:
+        goal.target_date = data["target_date"]
+    goal.change_seq = batch.version
+    batch.db.flush()
+    return goal.id
+
+def _delete_goal(batch: _Batch, op: Dict[str, Any]) -> int:
+    goal = _target(batch.goals, op, "goal")
+    goal_id = goal.id
+    record_deletion(batch.db, batch.user_id, "goal", goal_id, batch.version)
+    batch.db.execute(delete(GoalContribution).where(GoalContribution.goal_id == goal_id))
+    batch.db.delete(goal)
+    batch.db.flush()
+    del batch.goals[goal_id]
+    return goal_id
+
+_OPERATIONS = {
+    ("create", "transaction"): _create_transaction,
+    ("update", "transaction"): _update_transaction,
+    ("delete", "transaction"): _delete_transaction,
+    ("create", "category"): _create_category,
+    ("update", "category"): _update_category,
+    ("delete", "category"): _delete_category,
+    ("create", "goal"): _create_goal,
+    ("update", "goal"): _update_goal,
+    ("delete", "goal"): _delete_goal,
+}
+
+def _apply_operation(batch: _Batch, op: Dict[str, Any]) -> int:
+    if op.get("error"): # Rejected before the batch ran (e.g. by request validation)
+        raise BatchOperationError(op["error"])
+    handler = _OPERATIONS.get((op["action"], op["entity"]))
+    if handler is None:
+        raise BatchOperationError(f"Unsupported operation '{op['action']}' on '{op['entity']}'")
+    if op["action"] != "create" and op.get("id") is None:
+        raise BatchOperationError(f"'{op['action']}' needs the id of the {op['entity']}")
+    return handler(batch, op)
+
+def apply_batch(db: Session, user_id: int, operations: List[Dict[str, Any]], atomic: bool = True,
+                before_commit: Callable[[Session, Dict[str, Any]], None] | None = None) -> Dict[str, Any]:
+    """
+    Applies a list of operations (dicts with action, entity, id for updates/deletes, data with the fields
+    to set; amounts in major units) in one DB transaction. With atomic, any failure rolls back the whole
+    batch; otherwise failed operations are skipped and the others are committed.
+    Returns {"committed", "applied", "failed", "results"}, one result per operation in order with its
+    status ("ok", "error", or "rolled_back" for the operations of an atomic batch that failed), id and error.
+    before_commit(db, result), if given, runs inside the DB transaction just before it commits.
+    """
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"A batch holds at most {MAX_BATCH_OPERATIONS} operations")
+
+    # Bumping first also opens the DB transaction, so the savepoints below nest inside it
+    version = bump_data_version(db, user_id)
+    if version is None:
+        db.rollback()
+        raise ValueError("Unknown user")
+    batch = _Batch(db, user_id, version)
+    _load_targets(batch, operations)
+
+    results: List[Dict[str, Any]] = []
+    for index, op in enumerate(operations):
+        savepoint = db.begin_nested()
+        queued = len(batch.ledger_updates), len(batch.suggestion_updates)
+        try:
+            row_id = _apply_operation(batch, op)
+        except (BatchOperationError, ValueError) as error: # ValueError: e.g. a malformed currency code
+            savepoint.rollback()
+            del batch.ledger_updates[queued[0]:], batch.suggestion_updates[queued[1]:]
+            results.append({"index": index, "status": "error", "id": op.get("id"), "error": str(error)})
+            if atomic:
+                break
+            continue
+        savepoint.commit()
+        results.append({"index": index, "status": "ok", "id": row_id, "error": None})
+
+    failed = sum(result["status"] == "error" for result in results)
+    if atomic and failed:
+        db.rollback()
+        for result in results:
+            if result["status"] == "ok":
+                result["status"] = "rolled_back"
+        results.extend({"index": index, "status": "rolled_back", "id": op.get("id"), "error": None}
+                       for index, op in enumerate(operations[len(results):], start=len(results)))
+        return {"committed": False, "applied": 0, "failed": failed, "results": results}
+
+    report = {"committed": True, "applied": len(results) - failed, "failed": failed, "results": results}
+    if before_commit is not None:
+        before_commit(db, report)
+    db.commit()
+    summary_cache.invalidate(user_id, batch.months)
+    ledger_store.apply(user_id, version, lambda ledger: [update(ledger) for update in batch.ledger_updates])
+    suggestion_store.apply(user_id, version, lambda index: [index.add(*update) for update in batch.suggestion_updates])
+    return report
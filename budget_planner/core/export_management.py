@@ -0,0 +1,97 @@
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import Session
+from budget_planner.models.data_models import Category, MonthlyRollup, Transaction, MINOR_UNITS
+from budget_planner.core import money
+import csv
+import datetime
+import io
+import json
+from typing import Any, Callable, Iterable, Sequence
+
+# Full exports are streamed: the query is read in keyset pages of EXPORT_BATCH_SIZE rows and each page is
+# formatted into one text chunk, so memory stays flat whatever the number of rows. Each page is its own short
+# query and read transaction, resuming after the ORDER BY key of the previous page's last row (an index seek,
+# not an offset), so a slow download never holds the database open: without WAL an open read transaction
+# blocks every writer. Rows written meanwhile may or may not appear, but none is sent twice or skipped.
+# Category names come from a join in the same query.
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_BATCH_SIZE = 2000
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# Columns of each kind of export, in the order of the rows its query selects
+EXPORT_COLUMNS = {
+    "transactions": ("id", "date", "amount", "currency", "type", "category", "description"),
+    "monthly": ("year", "month", "type", "category", "amount", "transaction_count"),
+}
+
+def format_minor(amount_minor: int) -> str:
+    """Exact decimal text of a minor-unit amount (1234 -> "12.34"), for CSV where no float should appear."""
+    sign = "-" if amount_minor < 0 else ""
+    whole, cents = divmod(abs(amount_minor), MINOR_UNITS)
+    return f"{sign}{whole}.{cents:02d}"
+
+def _keyset(query: Select, keys: tuple, after: tuple | None) -> Select:
+    """'query' ordered by 'keys' (selected after its own columns) and, given the key of a row, resumed after it."""
+    query = query.add_columns(*keys).order_by(*keys)
+    return query if after is None else query.where(tuple_(*keys) > tuple(after)) # Bound with the keys' types
+
+def transaction_export_query(user_id: int, start_date: datetime.datetime | None = None,
+                             end_date: datetime.datetime | None = None, after: tuple | None = None) -> Select:
+    """The user's transactions in [start_date, end_date) with their category names, oldest first, after the key 'after'."""
+    query = (select(Transaction.id, Transaction.date, Transaction.amount_minor, Transaction.currency,
+                    Transaction.type, Category.name, Transaction.description)
+             .join(Category, Category.id == Transaction.category_id)
+             .where(Transaction.user_id == user_id))
+    if start_date is not None:
+        query = query.where(Transaction.date >= start_date)
+    if end_date is not None:
+        query = query.where(Transaction.date < end_date)
+    return _keyset(query, (Transaction.date, Transaction.id), after) # A seek on ix_transactions_user_date
+
+def monthly_export_query(user_id: int, after: tuple | None = None) -> Select:
+    """The user's monthly rollup (one row per month, type and category) with category names, oldest first."""
+    query = (select(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, Category.name,
+                    MonthlyRollup.total_amount_minor, MonthlyRollup.transaction_count)
+             .join(Category, Category.id == MonthlyRollup.category_id)
+             .where(MonthlyRollup.user_id == user_id))
+    return _keyset(query, (MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, Category.name,
+                           MonthlyRollup.category_id), after)
+
+def read_export_page(db: Session, query_for: Callable[[tuple | None], Select], kind: str, after: tuple | None,
+                     limit: int) -> tuple[list, tuple | None]:
+    """
+    One page of a 'kind' export: up to 'limit' rows of query_for(after=after) (transaction_export_query or
+    monthly_export_query with its filters bound), cut to the exported columns, and the key to pass as 'after'
+    for the next page (None once the export is complete).
+    """
+    rows = db.execute(query_for(after=after).limit(limit)).all()
+    width = len(EXPORT_COLUMNS[kind])
+    return [row[:width] for row in rows], (tuple(rows[-1][width:]) if len(rows) == limit else None)
+
+def _plain_values(row: Sequence[Any]) -> list:
+    """Row values as text-friendly types: dates in ISO 8601, enums by value. Amounts stay in cents."""
+    return [value.isoformat() if isinstance(value, datetime.datetime) else getattr(value, "value", value)
+            for value in row]
+
+def export_header(file_format: str, kind: str) -> str:
+    """Text written before the first batch: the CSV header line (NDJSON has none)."""
+    return ",".join(EXPORT_COLUMNS[kind]) + "\r\n" if file_format == "csv" else ""
+
+def format_batch(rows: Iterable[Sequence[Any]], file_format: str, kind: str) -> str:
+    """One text chunk for a batch of rows from the 'kind' export query (transaction_export_query or monthly_export_query)."""
+    columns = EXPORT_COLUMNS[kind]
+    amount_index = columns.index("amount")
+    if file_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            values = _plain_values(row)
+            values[amount_index] = format_minor(values[amount_index])
+            writer.writerow(values)
+        return buffer.getvalue()
+    lines = []
+    for row in rows:
+        values = _plain_values(row)
+        values[amount_index] = money.to_major(values[amount_index])
+        lines.append(json.dumps(dict(zip(columns, values)), ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n" if lines else ""
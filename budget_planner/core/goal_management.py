@@ -1,23 +1,34 @@
+from sqlalchemy import Row, case, delete, insert, select, update
 from sqlalchemy.orm import Session
-from budget_planner.models.data_models import Goal, User # Assuming models.data_models is accessible
+from sqlalchemy.orm.attributes import set_committed_value
+from budget_planner.models.data_models import Goal, GoalContribution, User # Assuming models.data_models is accessible
+from budget_planner.core import money
+from budget_planner.core.user_management import bump_data_version
+from budget_planner.core.transaction_management import record_deletion, advance_stores
 import datetime
 
+MAX_CONTRIBUTIONS = 1000 # Per contribute_to_goals call
+
 def create_goal(db: Session, user_id: int, name: str, target_amount: float,
-                current_amount: float = 0.0, target_date: datetime.datetime | None = None) -> Goal | None:
-    """Creates a new goal for the user."""
+                current_amount: float = 0.0, target_date: datetime.datetime | None = None,
+                currency: str | None = None) -> Goal | None:
+    """Creates a new goal for the user. Amounts are in major units and stored as integer cents."""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return None
 
     db_goal = Goal(
         name=name,
-        target_amount=target_amount,
-        current_amount=current_amount,
+        target_amount_minor=money.to_minor(target_amount),
+        current_amount_minor=money.to_minor(current_amount),
+        currency=money.normalize_currency(currency),
         target_date=target_date,
         user_id=user_id
     )
+    version = db_goal.change_seq = bump_data_version(db, user_id)
     db.add(db_goal)
     db.commit()
+    advance_stores(user_id, version)
     db.refresh(db_goal)
     return db_goal
 
@@ -25,9 +36,16 @@ def get_goal_by_id(db: Session, goal_id: int, user_id: int) -> Goal | None:
     """Retrieves a specific goal by its ID, ensuring it belongs to the user."""
     return db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id).first()
 
-def get_goals_by_user(db: Session, user_id: int) -> list[Goal]:
-    """Retrieves all goals for a given user, ordered by creation date."""
-    return db.query(Goal).filter(Goal.user_id == user_id).order_by(Goal.creation_date.desc()).all()
+# Columns of a goal listing: plain rows instead of ORM objects, with the progress computed by SQL
+GOAL_LIST_COLUMNS = (Goal.id, Goal.name, Goal.target_amount.label("target_amount"), Goal.current_amount.label("current_amount"),
+                     Goal.target_amount_minor, Goal.current_amount_minor, Goal.currency, Goal.target_date, Goal.user_id,
+                     Goal.creation_date, Goal.progress_percentage.label("progress_percentage"))
+
+def get_goals_by_user(db: Session, user_id: int) -> list[Row]:
+    """Retrieves all goals for a given user, newest first, as rows of GOAL_LIST_COLUMNS (no ORM objects)."""
+    return db.execute(
+        select(*GOAL_LIST_COLUMNS).where(Goal.user_id == user_id).order_by(Goal.creation_date.desc())
+    ).all()
 
 def update_goal(db: Session, goal_id: int, user_id: int,
                 name: str | None = None,
@@ -43,15 +61,17 @@ def update_goal(db: Session, goal_id: int, user_id: int,
     if name is not None:
         db_goal.name = name
     if target_amount is not None:
-        db_goal.target_amount = target_amount
+        db_goal.target_amount_minor = money.to_minor(target_amount)
     if current_amount is not None:
-        db_goal.current_amount = current_amount
+        db_goal.current_amount_minor = money.to_minor(current_amount)
     if clear_target_date:
         db_goal.target_date = None
     elif target_date is not None:
         db_goal.target_date = target_date
 
+    version = db_goal.change_seq = bump_data_version(db, user_id)
     db.commit()
+    advance_stores(user_id, version)
     db.refresh(db_goal)
     return db_goal
 
@@ -61,21 +81,60 @@ def delete_goal(db: Session, goal_id: int, user_id: int) -> bool:
     if not db_goal:
         return False
 
+    version = bump_data_version(db, user_id)
+    record_deletion(db, user_id, "goal", goal_id, version)
+    db.execute(delete(GoalContribution).where(GoalContribution.goal_id == goal_id))
     db.delete(db_goal)
     db.commit()
+    advance_stores(user_id, version)
     return True
 
 def update_goal_progress(db: Session, goal_id: int, user_id: int, contributed_amount: float) -> Goal | None:
     """
-    Adds the contributed_amount to the goal's current_amount.
+    Adds the contributed_amount to the goal's current_amount and records it in the contributions ledger.
     Ensures the goal belongs to the user.
     Returns the updated goal or None if not found.
     """
-    db_goal = get_goal_by_id(db, goal_id, user_id)
-    if not db_goal:
-        return None
+    goals = contribute_to_goals(db, user_id, [(goal_id, contributed_amount)])
+    return goals[0] if goals else None
 
-    db_goal.current_amount += contributed_amount
+def contribute_to_goals(db: Session, user_id: int, contributions: list[tuple[int, float]]) -> list[Goal] | None:
+    """
+    Applies (goal_id, amount) contributions in one DB transaction: a single UPDATE ... RETURNING adds each
+    goal's total in SQL (current_amount_minor + :amount, so concurrent contributors never overwrite each
+    other) and a single INSERT records them all in goal_contributions.
+    All or nothing: returns None, changing nothing, if any goal is not the user's. Otherwise returns the
+    updated goals in the order they first appear in 'contributions'.
+    """
+    if len(contributions) > MAX_CONTRIBUTIONS:
+        raise ValueError(f"At most {MAX_CONTRIBUTIONS} contributions can be applied at once")
+    rows = [(goal_id, money.to_minor(amount)) for goal_id, amount in contributions]
+    totals: dict[int, int] = {}
+    for goal_id, amount_minor in rows:
+        totals[goal_id] = totals.get(goal_id, 0) + amount_minor
+    if not totals:
+        return []
+
+    # Bump first: its UPDATE takes the write lock before anything is read, so contributors queue up
+    # instead of racing from the same snapshot
+    version = bump_data_version(db, user_id)
+    goals = db.scalars(
+        update(Goal)
+        .where(Goal.user_id == user_id, Goal.id.in_(totals))
+        .values(current_amount_minor=Goal.current_amount_minor + case(totals, value=Goal.id), change_seq=version)
+        .returning(Goal)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).all()
+    if len(goals) != len(totals):
+        db.rollback()
+        return None
+    db.execute(insert(GoalContribution), [{"goal_id": goal_id, "user_id": user_id, "amount_minor": amount_minor}
+                                          for goal_id, amount_minor in rows])
+    returned = [{column.key: getattr(goal, column.key) for column in Goal.__table__.columns} for goal in goals]
     db.commit()
-    db.refresh(db_goal)
-    return db_goal
+    for goal, values in zip(goals, returned): # Put back what the commit expired, so serializing does not reload
+        for key, value in values.items():
+            set_committed_value(goal, key, value)
+    advance_stores(user_id, version)
+    order = {goal_id: index for index, goal_id in enumerate(totals)}
+    return sorted(goals, key=lambda goal: order[goal.id])
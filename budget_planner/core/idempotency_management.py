@@ -0,0 +1,126 @@
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from budget_planner.models.data_models import IdempotencyKey
+import datetime
+import hashlib
+import os
+import secrets
+import threading
+import time
+
+# Idempotency keys (the Idempotency-Key request header) let a client retry a create safely: the response of the
+# first request is stored with the key, and a retry with the same key gets that response back instead of being
+# applied again. A key is looked up through the unique (user_id, key) index, never by scanning.
+#   - Requests that commit their write once (create, batch) store the key and the response in that same DB
+#     transaction (store_response), so the write and its key are committed together or not at all: a crash
+#     leaves nothing behind and a retry simply runs again.
+#   - Requests that commit several times (imports) claim the key first (claim_request), holding a random claim
+#     token, and store the response with complete_request. A claim is never taken over while it exists: if
+#     the request died midway its retry gets 409 until the key expires, since part of it may be committed.
+#   BUDGET_PLANNER_IDEMPOTENCY_RETENTION   seconds a key (and its stored response) is kept (default 24 hours)
+RETENTION_SECONDS = int(os.environ.get("BUDGET_PLANNER_IDEMPOTENCY_RETENTION", str(24 * 3600)))
+PURGE_INTERVAL_SECONDS = 300
+MAX_KEY_LENGTH = 255
+
+# Not ValueErrors: request handlers turn ValueError from core functions into 400 responses
+class IdempotencyKeyError(Exception):
+    """Base class of the idempotency key errors."""
+
+class IdempotencyKeyReused(IdempotencyKeyError):
+    """Raised when a key is sent again with a different request than the one it was first used for."""
+
+class IdempotencyKeyInProgress(IdempotencyKeyError):
+    """Raised when a key is taken by a request that has not finished, or that committed while this one ran."""
+
+def request_fingerprint(scope: str, *parts: bytes) -> str:
+    """SHA-256 of an endpoint ('POST /transactions/') and the request content, to tell a retry from a reuse."""
+    digest = hashlib.sha256(scope.encode())
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part)
+    return digest.hexdigest()
+
+_purge_lock = threading.Lock()
+_purged_at: float | None = None
+
+def purge_expired_keys(db: Session) -> int:
+    """Deletes every expired key (an index range on expires_at). Returns the number deleted."""
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.datetime.utcnow())).rowcount
+    db.commit()
+    return deleted
+
+def purge_if_due(db: Session) -> None:
+    """Runs purge_expired_keys at most once every PURGE_INTERVAL_SECONDS per process. Commits, so call it
+    outside a request's write transaction."""
+    global _purged_at
+    with _purge_lock: # Not held across the DELETE; only decides which request does it
+        if _purged_at is not None and time.monotonic() - _purged_at < PURGE_INTERVAL_SECONDS:
+            return
+        _purged_at = time.monotonic()
+    purge_expired_keys(db)
+
+def find_response(db: Session, user_id: int, key: str, fingerprint: str) -> tuple[int, str] | None:
+    """
+    The stored (status_code, body) of the request that used 'key', or None if the key is free (an expired
+    key is deleted and counts as free). Raises IdempotencyKeyReused if the key was used for a different
+    request, IdempotencyKeyInProgress if a claim on it has not completed.
+    """
+    record = db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key).one_or_none()
+    if record is None:
+        return None
+    if record.expires_at <= datetime.datetime.utcnow():
+        db.delete(record)
+        db.commit()
+        return None
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused("This Idempotency-Key was already used for a different request")
+    if record.response_body is None:
+        raise IdempotencyKeyInProgress("A request with this Idempotency-Key is already in progress")
+    return record.status_code, record.response_body
+
+def _insert_key(db: Session, user_id: int, key: str, fingerprint: str, **values) -> None:
+    now = datetime.datetime.utcnow()
+    db.execute(insert(IdempotencyKey).values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now,
+                                             expires_at=now + datetime.timedelta(seconds=RETENTION_SECONDS), **values))
+
+def store_response(db: Session, user_id: int, key: str, fingerprint: str, status_code: int, response_body: str) -> None:
+    """
+    Records 'key' with its response inside the caller's DB transaction, which commits it together with the
+    request's write. If a concurrent request with the same key committed first, rolls the transaction back
+    (the write included) and raises IdempotencyKeyInProgress; find_response then has that request's response.
+    """
+    try:
+        _insert_key(db, user_id, key, fingerprint, status_code=status_code, response_body=response_body)
+    except IntegrityError:
+        db.rollback() # The write must not commit without its key
+        raise IdempotencyKeyInProgress("A request with this Idempotency-Key committed first")
+
+def claim_request(db: Session, user_id: int, key: str, fingerprint: str) -> str | tuple[int, str]:
+    """
+    Claims 'key' for a request that commits several times, returning the claim token to pass to
+    complete_request or release_request. If the key is taken, returns its stored (status_code, body) or
+    raises like find_response.
+    """
+    token = secrets.token_hex(16)
+    try:
+        _insert_key(db, user_id, key, fingerprint, claim_token=token)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stored = find_response(db, user_id, key, fingerprint)
+        return stored if stored is not None else claim_request(db, user_id, key, fingerprint) # It had expired
+    return token
+
+def complete_request(db: Session, user_id: int, key: str, token: str, status_code: int, response_body: str) -> None:
+    """Stores the response of the request holding the claim 'token' on 'key', for retries to replay."""
+    db.execute(update(IdempotencyKey)
+               .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.claim_token == token)
+               .values(status_code=status_code, response_body=response_body, claim_token=None))
+    db.commit()
+
+def release_request(db: Session, user_id: int, key: str, token: str) -> None:
+    """Gives up the claim 'token' on 'key' (its request failed before committing anything), so a retry runs again."""
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key,
+                                            IdempotencyKey.claim_token == token))
+    db.commit()
@@ -0,0 +1,295 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from budget_planner.models.data_models import Category, Transaction, TransactionType
+from budget_planner.core import money, rollup_management
+from budget_planner.core.user_management import bump_data_version
+from budget_planner.core.trend_analysis import summary_cache
+from budget_planner.core.ledger_store import ledger_store
+from budget_planner.core.suggestion_index import suggestion_store, get_category_map, match_category, index_rows
+import csv
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+SUPPORTED_FORMATS = ("csv", "ofx", "qif")
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000 # Keep the report bounded for very dirty files
+MAX_DESCRIPTION_LENGTH = 255
+
+class ImportRowError(ValueError):
+    """Raised by the parsers for a row that cannot be turned into a transaction."""
+
+# --- Field parsing ---
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%d/%m/%Y", "%m/%d/%Y")
+
+def _parse_date(value: str) -> datetime.datetime:
+    value = (value or "").strip()
+    try:
+        return datetime.datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ImportRowError(f"Unrecognized date '{value}'")
+
+def _parse_amount(value: str) -> Decimal:
+    cleaned = (value or "").strip().replace(",", "").replace("$", "")
+    try:
+        amount = Decimal(cleaned) # Decimal, not float: the text is converted to cents exactly
+    except InvalidOperation:
+        raise ImportRowError(f"Invalid amount '{value}'")
+    if not amount.is_finite():
+        raise ImportRowError(f"Invalid amount '{value}'")
+    return amount
+
+def _parse_type(value: str | None, signed_amount: Decimal) -> TransactionType:
+    """Uses the explicit type when present, otherwise the sign of the amount (negative = expense)."""
+    if value:
+        try:
+            return TransactionType(value.strip().lower())
+        except ValueError:
+            raise ImportRowError(f"Invalid type '{value}' (expected 'income' or 'expense')")
+    return TransactionType.EXPENSE if signed_amount < 0 else TransactionType.INCOME
+
+def _normalize(date: datetime.datetime, signed_amount: Decimal, type_value: str | None,
+               category: str | None, description: str | None) -> Dict[str, Any]:
+    tx_type = _parse_type(type_value, signed_amount)
+    amount_minor = money.to_minor(abs(signed_amount))
+    if amount_minor == 0:
+        raise ImportRowError("Amount must be greater than 0")
+    description = (description or "").strip() or None
+    if description and len(description) > MAX_DESCRIPTION_LENGTH:
+        raise ImportRowError(f"Description longer than {MAX_DESCRIPTION_LENGTH} characters")
+    return {
+        "date": date,
+        "amount_minor": amount_minor,
+        "type": tx_type,
+        "category": (category or "").strip() or None,
+        "description": description,
+    }
+
+# --- Streaming parsers: each yields (row_number, normalized_row_or_error) ---
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, Any] | ImportRowError]]:
+    """
+    Parses CSV with a header row. Required columns: date, amount. Optional: type, category, description.
+    Without a type column, negative amounts are expenses and positive amounts are income.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    fields = {name.strip().lower(): name for name in reader.fieldnames if name}
+    missing = [column for column in ("date", "amount") if column not in fields]
+    if missing:
+        yield 1, ImportRowError(f"Missing required column(s): {', '.join(missing)}")
+        return
+
+    for row in reader:
+        row_number = reader.line_num
+        get = lambda column: row.get(fields[column]) if column in fields else None
+        try:
+            yield row_number, _normalize(_parse_date(get("date")), _parse_amount(get("amount")),
+                                         get("type"), get("category"), get("description"))
+        except ImportRowError as error:
+            yield row_number, error
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+def _parse_ofx_date(value: str) -> datetime.datetime:
+    # OFX dates are YYYYMMDD[HHMMSS[.XXX]][[TZ]]; the time zone suffix is ignored
+    digits = re.match(r"\d+", value.strip())
+    text = digits.group() if digits else ""
+    if len(text) >= 14:
+        return datetime.datetime.strptime(text[:14], "%Y%m%d%H%M%S")
+    if len(text) >= 8:
+        return datetime.datetime.strptime(text[:8], "%Y%m%d")
+    raise ImportRowError(f"Invalid OFX date '{value}'")
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, Any] | ImportRowError]]:
+    """
+    Parses the <STMTTRN> blocks of an OFX (SGML or XML) statement, one line at a time.
+    Uses TRNAMT's sign for the type, NAME (or MEMO) for the description. OFX carries no category.
+    """
+    record: Dict[str, str] | None = None
+    start_line = 0
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag, value = tag.upper(), value.strip()
+            if tag == "STMTTRN":
+                if not closing:
+                    record, start_line = {}, line_number
+                elif record is not None:
+                    yield start_line, _ofx_record(record)
+                    record = None
+            elif record is not None and not closing and value:
+                record[tag] = value
+
+def _ofx_record(record: Dict[str, str]) -> Dict[str, Any] | ImportRowError:
+    try:
+        if "DTPOSTED" not in record or "TRNAMT" not in record:
+            raise ImportRowError("OFX transaction missing DTPOSTED or TRNAMT")
+        return _normalize(_parse_ofx_date(record["DTPOSTED"]), _parse_amount(record["TRNAMT"]),
+                          None, None, record.get("NAME") or record.get("MEMO"))
+    except ImportRowError as error:
+        return error
+
+def _parse_qif_date(value: str) -> datetime.datetime:
+    # QIF dates look like 12/31/2023, 12/31'23 or 12-31-2023
+    normalized = value.strip().replace("'", "/").replace("-", "/").replace(" ", "")
+    for fmt in ("%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d"):
+        try:
+            return datetime.datetime.strptime(normalized, fmt)
+        except ValueError:
+            continue
+    raise ImportRowError(f"Invalid QIF date '{value}'")
+
+def parse_qif(lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, Any] | ImportRowError]]:
+    """
+    Parses QIF records (D=date, T/U=amount, P=payee, M=memo, L=category, ^=end of record).
+    """
+    record: Dict[str, str] = {}
+    start_line = 0
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        if line.startswith("^"):
+            if record:
+                yield start_line, _qif_record(record)
+            record = {}
+            continue
+        if not record:
+            start_line = line_number
+        record.setdefault(line[0], line[1:])
+    if record:
+        yield start_line, _qif_record(record)
+
+def _qif_record(record: Dict[str, str]) -> Dict[str, Any] | ImportRowError:
+    try:
+        if "D" not in record or ("T" not in record and "U" not in record):
+            raise ImportRowError("QIF record missing date (D) or amount (T)")
+        category = record.get("L")
+        if category and category.startswith("["):
+            category = None # Transfers between accounts, not a category
+        return _normalize(_parse_qif_date(record["D"]), _parse_amount(record.get("T") or record["U"]),
+                          None, category, record.get("P") or record.get("M"))
+    except ImportRowError as error:
+        return error
+
+_PARSERS = {"csv": parse_csv, "ofx": parse_ofx, "qif": parse_qif}
+
+def detect_format(filename: str | None) -> str:
+    """Guesses the import format from a file name, defaulting to CSV."""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("ofx", "qfx"):
+        return "ofx"
+    if extension == "qif":
+        return "qif"
+    return "csv"
+
+# --- Import ---
+
+def _category_map(db: Session, user_id: int) -> Dict[str, int]:
+    """Loads the user's categories once as a lowercase name -> id map."""
+    return {name.lower(): category_id for category_id, name in
+            db.query(Category.id, Category.name).filter(Category.user_id == user_id).all()}
+
+def _flush_batch(db: Session, batch: List[Dict[str, Any]], new_categories: List[Category]) -> None:
+    """
+    Inserts one batch with executemany, applies its rollup deltas, commits and invalidates its cached months.
+    The rows and the categories created for them since the last batch get the batch's change_seq.
+    """
+    user_id = batch[0]["user_id"]
+    version = bump_data_version(db, user_id)
+    for row in batch:
+        row["change_seq"] = version
+    for category in new_categories:
+        category.change_seq = version
+    new_categories.clear()
+    db.execute(insert(Transaction), batch)
+    rollup_management.add_rows_to_rollup(db, batch)
+    db.commit()
+    summary_cache.invalidate(user_id, {(row["date"].year, row["date"].month) for row in batch})
+    ledger_store.discard(user_id) # Rows inserted by executemany have no ids here; reload on the next read
+    suggestion_store.apply(user_id, version, lambda index: index_rows(index, batch))
+
+def import_transactions(db: Session, user_id: int, lines: Iterable[str], file_format: str = "csv",
+                        create_missing_categories: bool = False, default_category: str | None = None,
+                        batch_size: int = DEFAULT_BATCH_SIZE, auto_categorize: bool = False) -> Dict[str, Any]:
+    """
+    Streams transactions from 'lines' (any iterable of text lines, e.g. an open file) into the database.
+    Category names are resolved through one in-memory map per import; unknown names are created when
+    create_missing_categories is set, otherwise the row is reported as an error. With auto_categorize,
+    rows without a category get the one their description was most often filed under before (see
+    suggestion_index.match_category). Remaining rows without a category use default_category.
+    Rows are inserted in batches of 'batch_size', one commit per batch.
+    Returns a report with the imported/failed/auto-categorized counts, created categories and per-row errors.
+    """
+    if file_format not in _PARSERS:
+        raise ValueError(f"Unsupported import format '{file_format}', expected one of {SUPPORTED_FORMATS}")
+
+    categories = _category_map(db, user_id)
+    learned = get_category_map(db, user_id) if auto_categorize else {}
+    created_categories: List[str] = []
+    new_categories: List[Category] = [] # Created since the last batch was flushed
+    errors: List[Dict[str, Any]] = []
+    imported = failed = auto_categorized = 0
+    batch: List[Dict[str, Any]] = []
+
+    for row_number, parsed in _PARSERS[file_format](lines):
+        if isinstance(parsed, ImportRowError):
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "error": str(parsed)})
+            continue
+
+        category_name = parsed["category"]
+        category_id = match_category(learned, parsed["description"]) if learned and not category_name else None
+        if category_id is not None:
+            auto_categorized += 1
+        else:
+            category_name = category_name or default_category
+            category_id = categories.get(category_name.lower()) if category_name else None
+        if category_id is None:
+            if not category_name or not create_missing_categories:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_number, "error": f"Unknown category '{category_name}'"
+                                   if category_name else "No category given and no default category set"})
+                continue
+            new_category = Category(name=category_name, user_id=user_id)
+            db.add(new_category)
+            db.flush() # Assigns the id; committed with the next batch
+            category_id = categories[category_name.lower()] = new_category.id
+            created_categories.append(category_name)
+            new_categories.append(new_category)
+
+        batch.append({
+            "amount_minor": parsed["amount_minor"],
+            "type": parsed["type"],
+            "date": parsed["date"],
+            "description": parsed["description"],
+            "category_id": category_id,
+            "user_id": user_id,
+        })
+        if len(batch) >= batch_size:
+            _flush_batch(db, batch, new_categories)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        _flush_batch(db, batch, new_categories)
+        imported += len(batch)
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "auto_categorized": auto_categorized,
+        "created_categories": created_categories,
+        "errors": errors,
+    }
@@ -0,0 +1,304 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from budget_planner.models.data_models import Category, Transaction, TransactionType, MINOR_UNITS
+from budget_planner.core.user_management import get_data_version
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import islice
+import datetime
+import os
+import sys
+import threading
+from typing import Callable, Dict, List, Any, Tuple
+
+# Optional in-process store of each active user's transactions as compact columns (array.array, one
+# machine value per row) instead of ORM objects, serving listings and range summaries from memory.
+# Ledgers are loaded lazily, kept current by the transaction write functions and evicted LRU-first
+# under a memory budget. Freshness is checked against users.data_version (one primary-key lookup per
+# read), so a write made by another worker process is noticed and the ledger reloaded.
+#   BUDGET_PLANNER_LEDGER_STORE_MB   memory budget in MiB; 0 (the default) disables the store
+LEDGER_STORE_BUDGET_BYTES = int(float(os.environ.get("BUDGET_PLANNER_LEDGER_STORE_MB", "0")) * 1024 * 1024)
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+# Bytes per row of the fixed-width columns plus the descriptions list slot
+_ROW_BYTES = 8 + 8 + 8 + 8 + 1 + 1 + 8
+
+def _to_micros(date: datetime.datetime) -> int:
+    return (date - _EPOCH) // _MICROSECOND
+
+class LedgerCategory:
+    """The nested category of a LedgerTransaction (same attributes as Category)."""
+    __slots__ = ("id", "name", "user_id")
+
+    def __init__(self, id: int, name: str, user_id: int):
+        self.id = id
+        self.name = name
+        self.user_id = user_id
+
+class LedgerTransaction:
+    """
+    A row read from a ledger, with the attributes of Transaction that responses use.
+    Created only for the rows returned (e.g. one page), never stored.
+    """
+    __slots__ = ("id", "amount_minor", "currency", "type", "date", "description", "category_id", "user_id", "category")
+
+    @property
+    def amount(self) -> float:
+        return self.amount_minor / MINOR_UNITS
+
+class UserLedger:
+    """One user's transactions as parallel columns sorted by (date, id). Not thread-safe; the store locks."""
+
+    def __init__(self, user_id: int, version: int, category_names: Dict[int, str]):
+        self.user_id = user_id
+        self.version = version # users.data_version the columns reflect
+        self.category_names = category_names
+        self.ids = array("q")
+        self.dates = array("q") # Microseconds since 1970-01-01
+        self.amounts = array("q") # Cents
+        self.category_ids = array("q")
+        self.incomes = array("b") # 1 for income, 0 for expense
+        self.currency_codes = array("B") # Index into self.currencies
+        self.descriptions: List[str | None] = []
+        self.currencies: List[str] = []
+        self._strings: Dict[str, str] = {} # Interned descriptions: repeated texts are stored once
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _position(self, date_micros: int, transaction_id: int) -> int:
+        """Index of the first row whose (date, id) is >= the given key."""
+        lo = bisect_left(self.dates, date_micros)
+        hi = bisect_left(self.dates, date_micros + 1, lo)
+        return bisect_left(self.ids, transaction_id, lo, hi) # ids ascend within equal dates
+
+    def _find(self, transaction_id: int) -> int | None:
+        try:
+            return self.ids.index(transaction_id)
+        except ValueError:
+            return None
+
+    def insert(self, id: int, date: datetime.datetime, amount_minor: int, type: TransactionType,
+               category_id: int, currency: str, description: str | None) -> None:
+        if currency not in self.currencies:
+            self.currencies.append(currency)
+        if description is not None and description not in self._strings:
+            self._strings[description] = description
+            self.nbytes += sys.getsizeof(description)
+        date_micros = _to_micros(date)
+        index = self._position(date_micros, id)
+        self.ids.insert(index, id)
+        self.dates.insert(index, date_micros)
+        self.amounts.insert(index, amount_minor)
+        self.category_ids.insert(index, category_id)
+        self.incomes.insert(index, type == TransactionType.INCOME)
+        self.currency_codes.insert(index, self.currencies.index(currency))
+        self.descriptions.insert(index, None if description is None else self._strings[description])
+        self.nbytes += _ROW_BYTES
+
+    def delete(self, transaction_id: int) -> None:
+        index = self._find(transaction_id)
+        if index is None:
+            return
+        for column in (self.ids, self.dates, self.amounts, self.category_ids, self.incomes, self.currency_codes,
+                       self.descriptions):
+            del column[index]
+        self.nbytes -= _ROW_BYTES # Interned descriptions are kept until the ledger is reloaded
+
+    def upsert(self, transaction: Transaction) -> None:
+        """Inserts (or replaces) a row from a loaded Transaction and its category."""
+        self.delete(transaction.id)
+        self.category_names[transaction.category_id] = transaction.category.name
+        self.insert(transaction.id, transaction.date, transaction.amount_minor, transaction.type,
+                    transaction.category_id, transaction.currency, transaction.description)
+
+    def rename_category(self, category_id: int, name: str) -> None:
+        self.category_names[category_id] = name
+
+    def row(self, index: int) -> LedgerTransaction:
+        row = LedgerTransaction()
+        row.id = self.ids[index]
+        row.amount_minor = self.amounts[index]
+        row.currency = self.currencies[self.currency_codes[index]]
+        row.type = TransactionType.INCOME if self.incomes[index] else TransactionType.EXPENSE
+        row.date = _EPOCH + datetime.timedelta(microseconds=self.dates[index])
+        row.description = self.descriptions[index]
+        row.category_id = self.category_ids[index]
+        row.user_id = self.user_id
+        row.category = LedgerCategory(row.category_id, self.category_names.get(row.category_id, ""), self.user_id)
+        return row
+
+    def range(self, start_date: datetime.datetime | None, end_date: datetime.datetime | None) -> Tuple[int, int]:
+        """Row index range [lo, hi) of the half-open date range [start_date, end_date)."""
+        lo = 0 if start_date is None else bisect_left(self.dates, _to_micros(start_date))
+        hi = len(self.ids) if end_date is None else bisect_left(self.dates, _to_micros(end_date), lo)
+        return lo, hi
+
+    def _matcher(self, type: TransactionType | None, category_ids: List[int] | None,
+                 min_amount_minor: int | None, max_amount_minor: int | None) -> Callable[[int], bool] | None:
+        """Row-index predicate for the non-date listing filters, or None when there are none."""
+        if type is None and not category_ids and min_amount_minor is None and max_amount_minor is None:
+            return None
+        income = None if type is None else int(type == TransactionType.INCOME)
+        wanted = set(category_ids) if category_ids else None
+        low = -sys.maxsize if min_amount_minor is None else min_amount_minor
+        high = sys.maxsize if max_amount_minor is None else max_amount_minor
+        amounts, incomes, row_categories = self.amounts, self.incomes, self.category_ids
+
+        def matches(index: int) -> bool:
+            return ((income is None or incomes[index] == income)
+                    and (wanted is None or row_categories[index] in wanted)
+                    and low <= amounts[index] <= high)
+        return matches
+
+    def list(self, skip: int = 0, limit: int = 100, start_date: datetime.datetime | None = None,
+             end_date: datetime.datetime | None = None, cursor: Tuple[datetime.datetime, int] | None = None,
+             type: TransactionType | None = None, category_ids: List[int] | None = None,
+             min_amount_minor: int | None = None, max_amount_minor: int | None = None,
+             ascending: bool = False) -> List[LedgerTransaction]:
+        """Same rows and order as get_transactions_by_user's date sorts: by date, then id."""
+        lo, hi = self.range(start_date, end_date)
+        if cursor is not None:
+            if ascending:
+                lo = max(lo, self._position(_to_micros(cursor[0]), cursor[1] + 1))
+            else:
+                hi = min(hi, self._position(_to_micros(cursor[0]), cursor[1]))
+            skip = 0
+        indexes = range(lo, hi) if ascending else range(hi - 1, lo - 1, -1)
+        matches = self._matcher(type, category_ids, min_amount_minor, max_amount_minor)
+        if matches is None:
+            selected = indexes[skip:skip + limit]
+        else:
+            selected = islice(filter(matches, indexes), skip, skip + limit)
+        return [self.row(index) for index in selected]
+
+    def summarize(self, start_date: datetime.datetime | None = None, end_date: datetime.datetime | None = None,
+                  type: TransactionType | None = None, category_ids: List[int] | None = None,
+                  min_amount_minor: int | None = None, max_amount_minor: int | None = None) -> Dict[str, Any]:
+        """Count, income, expense and per-category expense totals in cents of the matching rows in [start_date, end_date)."""
+        lo, hi = self.range(start_date, end_date)
+        matches = self._matcher(type, category_ids, min_amount_minor, max_amount_minor)
+        indexes = range(lo, hi) if matches is None else filter(matches, range(lo, hi))
+        count = income_minor = expenses_minor = 0
+        by_category: Dict[int, int] = {}
+        amounts, incomes, category_ids = self.amounts, self.incomes, self.category_ids
+        for index in indexes:
+            count += 1
+            if incomes[index]:
+                income_minor += amounts[index]
+            else:
+                expenses_minor += amounts[index]
+                by_category[category_ids[index]] = by_category.get(category_ids[index], 0) + amounts[index]
+        return {
+            "transaction_count": count,
+            "total_income_minor": income_minor,
+            "total_expenses_minor": expenses_minor,
+            "expenses_by_category_minor": {self.category_names.get(category_id, ""): total
+                                           for category_id, total in by_category.items()},
+        }
+
+def load_user_ledger(db: Session, user_id: int, version: int) -> UserLedger:
+    """Builds a user's ledger with two queries (categories, then transactions in (date, id) order)."""
+    category_names = dict(db.execute(select(Category.id, Category.name).where(Category.user_id == user_id)).all())
+    ledger = UserLedger(user_id, version, category_names)
+    rows = db.execute(
+        select(Transaction.id, Transaction.date, Transaction.amount_minor, Transaction.type, Transaction.category_id,
+               Transaction.currency, Transaction.description)
+        .where(Transaction.user_id == user_id).order_by(Transaction.date, Transaction.id)
+    )
+    for row in rows: # Already sorted, so every insert appends
+        ledger.insert(*row)
+    return ledger
+
+class LedgerStore:
+    """
+    LRU of UserLedgers bounded by an estimated memory budget. All ledger access happens under one lock.
+    'loader' builds a user's entry; any object with user_id, version and nbytes attributes can be stored.
+    """
+
+    def __init__(self, budget_bytes: int, loader: Callable[[Session, int, int], Any] = load_user_ledger):
+        self.budget_bytes = budget_bytes
+        self._loader = loader
+        self._ledgers: "OrderedDict[int, UserLedger]" = OrderedDict()
+        self._lock = threading.Lock() # Never held across database I/O
+        self._counters = {"hits": 0, "loads": 0, "evictions": 0, "discards": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def read(self, db: Session, user_id: int, fn: Callable[[UserLedger], Any]) -> Any:
+        """
+        Calls fn(ledger) with the user's current ledger, loading it first when it is missing or stale.
+        Returns fn's result; fn must not keep references to the ledger or its columns.
+        """
+        version = get_data_version(db, user_id)
+        with self._lock:
+            ledger = self._ledgers.get(user_id)
+            if ledger is not None and ledger.version == version:
+                self._ledgers.move_to_end(user_id)
+                self._counters["hits"] += 1
+                return fn(ledger)
+        # Loaded in the same DB transaction as the version read, so the two are consistent
+        ledger = self._loader(db, user_id, version)
+        with self._lock:
+            self._counters["loads"] += 1
+            result = fn(ledger)
+            current = self._ledgers.get(user_id)
+            if current is None or current.version < version:
+                self._install(ledger)
+        return result
+
+    def _install(self, ledger: UserLedger) -> None:
+        self._ledgers.pop(ledger.user_id, None)
+        if ledger.nbytes > self.budget_bytes:
+            return # Too large to keep; this read was served from it all the same
+        self._ledgers[ledger.user_id] = ledger
+        self._evict()
+
+    def _evict(self) -> None:
+        total = sum(ledger.nbytes for ledger in self._ledgers.values())
+        while total > self.budget_bytes and self._ledgers:
+            _, evicted = self._ledgers.popitem(last=False)
+            total -= evicted.nbytes
+            self._counters["evictions"] += 1
+
+    def apply(self, user_id: int, new_version: int | None, fn: Callable[[UserLedger], None]) -> None:
+        """
+        Applies a committed write to the user's ledger, if loaded. The write must have moved the user's
+        data version to 'new_version'; if the ledger is not at the version just before it (another
+        process wrote in between), the ledger is discarded and reloaded on the next read.
+        """
+        with self._lock:
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                return
+            if new_version is None or ledger.version != new_version - 1:
+                self._discard(user_id)
+                return
+            fn(ledger)
+            ledger.version = new_version
+            self._evict()
+
+    def _discard(self, user_id: int) -> None:
+        if self._ledgers.pop(user_id, None) is not None:
+            self._counters["discards"] += 1
+
+    def discard(self, user_id: int | None = None) -> None:
+        """Drops one user's ledger (or all of them), e.g. after bulk writes."""
+        with self._lock:
+            if user_id is not None:
+                self._discard(user_id)
+            else:
+                self._ledgers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, users=len(self._ledgers),
+                        bytes=sum(ledger.nbytes for ledger in self._ledgers.values()),
+                        rows=sum(len(ledger) for ledger in self._ledgers.values()))
+
+ledger_store = LedgerStore(LEDGER_STORE_BUDGET_BYTES)
@@ -0,0 +1,31 @@
+from budget_planner.models.data_models import MINOR_UNITS, DEFAULT_CURRENCY
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+# Amounts cross the API as decimal numbers in major units (12.34) and are stored and
+# aggregated as integers in minor units (1234), so sums are exact and done by SQL SUM.
+
+_MINOR_EXPONENT = Decimal(1) / MINOR_UNITS
+
+def to_minor(amount: float | int | str | Decimal) -> int:
+    """
+    Converts a major-unit amount to integer minor units, rounding half up to the nearest cent.
+    Floats go through their shortest repr, so 0.1 becomes 10 (not 10.000000000000000555...).
+    """
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+        return int(value.quantize(_MINOR_EXPONENT, rounding=ROUND_HALF_UP) * MINOR_UNITS)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{amount}'")
+
+def to_major(amount_minor: int) -> float:
+    """Converts integer minor units to a major-unit float for responses (correctly rounded, no drift)."""
+    return amount_minor / MINOR_UNITS
+
+def normalize_currency(currency: str | None) -> str:
+    """Upper-cases an ISO 4217 code, defaulting to DEFAULT_CURRENCY. Raises ValueError if malformed."""
+    if currency is None:
+        return DEFAULT_CURRENCY
+    code = currency.strip().upper()
+    if len(code) != 3 or not code.isalpha():
+        raise ValueError(f"Invalid currency code '{currency}'")
+    return code
@@ -0,0 +1,141 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from budget_planner.models.data_models import Category, TransactionType, MINOR_UNITS
+from budget_planner.core.trend_analysis import _previous_months
+import datetime
+import numpy as np # Optional dependency: only this module (the /analytics/report endpoint) needs it
+from typing import Dict, List, Any, Tuple
+
+# Long-horizon reports: the user's monthly rollup is loaded once into columnar arrays and every
+# series (rolling averages, year-over-year deltas, per-category percentiles, savings rate) is
+# computed with vectorized group-by (bincount) and cumsum operations instead of SQL per month.
+# The rollup holds one row per (month, type, category), so ten years load in a few hundred rows;
+# a per-transaction ledger is I/O bound (an index-to-table lookup per row) and is not used.
+
+ROLLING_WINDOWS = (3, 6, 12)
+CATEGORY_PERCENTILES = (50, 75, 90)
+_YEAR_OVER_YEAR = 12
+
+# One row per rollup key: month (months since January 1970), total in cents, income flag, category id
+LEDGER_DTYPE = np.dtype([("month", np.int32), ("amount_minor", np.int64), ("income", np.int8), ("category_id", np.int32)])
+
+_LEDGER_SQL = text(
+    "SELECT (year - 1970) * 12 + month - 1, total_amount_minor, type = :income, category_id FROM monthly_rollups "
+    "WHERE user_id = :user_id AND year BETWEEN :start_year AND :end_year AND year * 12 + month BETWEEN :start AND :end"
+)
+_LEDGER_CHUNK_ROWS = 1000
+
+def load_ledger(db: Session, user_id: int, start: Tuple[int, int], end: Tuple[int, int]) -> np.ndarray:
+    """
+    Loads the user's monthly rollup for months start..end (inclusive (year, month) pairs) into a
+    LEDGER_DTYPE array with a single query (a seek on the rollup's primary key).
+    Rows are streamed in chunks straight into the array, skipping ORM entities.
+    """
+    result = db.execute(_LEDGER_SQL, {
+        "income": TransactionType.INCOME.name, # The enum is bound the way the ORM stores it (by name)
+        "user_id": user_id, "start_year": start[0], "end_year": end[0],
+        "start": start[0] * 12 + start[1], "end": end[0] * 12 + end[1]
+    }).yield_per(_LEDGER_CHUNK_ROWS)
+    return np.fromiter(map(tuple, result), dtype=LEDGER_DTYPE)
+
+def _month_index(year: int, month: int) -> int:
+    """Months since January 1970 (the unit of numpy's datetime64[M])."""
+    return (year - 1970) * 12 + month - 1
+
+def _rolling_mean(series: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over 'window' months via a cumulative sum; NaN until a full window is available."""
+    cumulative = np.concatenate(([0.0], np.cumsum(series, dtype=np.float64)))
+    result = np.full(series.shape, np.nan)
+    result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+def _major(values: np.ndarray) -> List[float | None]:
+    """Cents to major units rounded to the cent, NaN to None (JSON null)."""
+    return [None if np.isnan(value) else round(value / MINOR_UNITS, 2) for value in values.tolist()]
+
+def _rounded(values: np.ndarray) -> List[float | None]:
+    return [None if np.isnan(value) else round(value, 2) for value in values.tolist()]
+
+def build_report(ledger: np.ndarray, first_month: Tuple[int, int], month_count: int, warmup_months: int,
+                 category_names: Dict[int, str]) -> Dict[str, Any]:
+    """
+    Computes the report series from a ledger (rows may repeat a month/category key) covering 'warmup_months' + 'month_count' months starting at
+    'first_month'. The warm-up months only feed the rolling and year-over-year series and are not reported,
+    so every reported month has full windows. Pure function of its inputs (no database access).
+    """
+    total_months = warmup_months + month_count
+    months = ledger["month"].astype(np.int64) - _month_index(*first_month)
+    amounts = ledger["amount_minor"]
+    income = ledger["income"].astype(bool)
+
+    # Monthly totals (cents). bincount sums in float64, exact for totals below 2**53 cents.
+    income_by_month = np.bincount(months[income], weights=amounts[income], minlength=total_months)
+    expenses_by_month = np.bincount(months[~income], weights=amounts[~income], minlength=total_months)
+
+    # Expenses per (month, category) as a month x category matrix
+    category_ids, category_columns = np.unique(ledger["category_id"][~income], return_inverse=True)
+    by_category = np.bincount(months[~income] * len(category_ids) + category_columns, weights=amounts[~income],
+                              minlength=total_months * len(category_ids)).reshape(total_months, len(category_ids))
+
+    rolling = {window: _rolling_mean(expenses_by_month, window)[warmup_months:] for window in ROLLING_WINDOWS}
+    previous_year = np.full(total_months, np.nan)
+    previous_year[_YEAR_OVER_YEAR:] = expenses_by_month[:-_YEAR_OVER_YEAR]
+    previous_year = previous_year[warmup_months:]
+
+    income_by_month = income_by_month[warmup_months:]
+    expenses_by_month = expenses_by_month[warmup_months:]
+    net = income_by_month - expenses_by_month
+    with np.errstate(divide="ignore", invalid="ignore"):
+        savings_rate = np.where(income_by_month > 0, net / income_by_month * 100, np.nan)
+        yoy_change_pct = np.where(previous_year > 0, (expenses_by_month - previous_year) / previous_year * 100, np.nan)
+
+    first_index = _month_index(*first_month) + warmup_months
+    series = {
+        "total_income": _major(income_by_month),
+        "total_expenses": _major(expenses_by_month),
+        "net_savings": _major(net),
+        "cumulative_savings": _major(np.cumsum(net)),
+        "savings_rate": _rounded(savings_rate),
+        "yoy_expenses_delta": _major(expenses_by_month - previous_year),
+        "yoy_expenses_change_pct": _rounded(yoy_change_pct),
+    }
+    rolling_series = {window: _major(values) for window, values in rolling.items()}
+    monthly = []
+    for i in range(month_count):
+        year, month = divmod(first_index + i, 12)
+        entry = {"year": 1970 + year, "month": month + 1}
+        entry.update({name: values[i] for name, values in series.items()})
+        entry["rolling_expenses"] = {str(window): values[i] for window, values in rolling_series.items()}
+        monthly.append(entry)
+
+    # Percentiles of each category's monthly spend over the reported months (months without spend count as 0)
+    reported = by_category[warmup_months:]
+    percentiles = np.percentile(reported, CATEGORY_PERCENTILES, axis=0) if len(category_ids) else np.empty((0, 0))
+    totals = reported.sum(axis=0)
+    categories = [
+        {
+            "category_id": int(category_id),
+            "name": category_names.get(int(category_id), ""),
+            "total_expenses": round(totals[column] / MINOR_UNITS, 2),
+            "monthly_percentiles": {f"p{p}": round(percentiles[row, column] / MINOR_UNITS, 2)
+                                    for row, p in enumerate(CATEGORY_PERCENTILES)},
+        }
+        for column, category_id in enumerate(category_ids.tolist())
+        if totals[column] > 0
+    ]
+    categories.sort(key=lambda category: -category["total_expenses"])
+    return {"months": monthly, "categories": categories}
+
+def get_analytics_report(db: Session, user_id: int, period_count: int = 36,
+                         today: datetime.date | None = None) -> Dict[str, Any]:
+    """
+    Report over the last 'period_count' months (including the current one), oldest month first.
+    Loads the months plus a warm-up of max(ROLLING_WINDOWS, 12) earlier months in one query.
+    Does not validate the user.
+    """
+    warmup_months = max(max(ROLLING_WINDOWS), _YEAR_OVER_YEAR)
+    months = _previous_months(period_count + warmup_months, today)
+    first_month, last_month = months[-1], months[0]
+    ledger = load_ledger(db, user_id, first_month, last_month)
+    category_names = dict(db.query(Category.id, Category.name).filter(Category.user_id == user_id).all())
+    return build_report(ledger, first_month, period_count, warmup_months, category_names)
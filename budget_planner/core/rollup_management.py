@@ -0,0 +1,150 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, extract, and_, or_, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from budget_planner.models.data_models import Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.trend_analysis import _month_spans, summary_cache
+from budget_planner.core.user_management import bump_data_version
+import datetime
+from typing import Dict, List, Any, Tuple
+
+_ROLLUP_KEY = ["user_id", "year", "month", "type", "category_id"]
+
+def _rollup_upsert():
+    """INSERT ... ON CONFLICT that adds total_amount_minor/transaction_count to an existing rollup row."""
+    upsert = sqlite_insert(MonthlyRollup)
+    return upsert.on_conflict_do_update(
+        index_elements=_ROLLUP_KEY,
+        set_={
+            "total_amount_minor": MonthlyRollup.total_amount_minor + upsert.excluded.total_amount_minor,
+            "transaction_count": MonthlyRollup.transaction_count + upsert.excluded.transaction_count,
+        },
+    )
+
+def apply_rollup_delta(db: Session, user_id: int, date: datetime.datetime, type: TransactionType,
+                       category_id: int, amount_delta: int, count_delta: int) -> None:
+    """
+    Adds amount_delta (in cents)/count_delta to the rollup row for the transaction's month, type and category.
+    Runs inside the caller's DB transaction; the caller commits.
+    Rows whose count drops to zero are removed.
+    """
+    key = {
+        "user_id": user_id,
+        "year": date.year,
+        "month": date.month,
+        "type": type,
+        "category_id": category_id,
+    }
+    db.execute(_rollup_upsert(), [dict(key, total_amount_minor=amount_delta, transaction_count=count_delta)])
+    if count_delta < 0:
+        db.execute(delete(MonthlyRollup).filter_by(**key).where(MonthlyRollup.transaction_count <= 0))
+
+def add_rows_to_rollup(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Counts freshly inserted transaction rows (dicts with user_id, date, type, category_id, amount_minor)
+    in the rollup: deltas are summed per key in Python and applied with one executemany upsert.
+    """
+    deltas: Dict[Tuple[int, int, int, TransactionType, int], List[int]] = {}
+    for row in rows:
+        key = (row["user_id"], row["date"].year, row["date"].month, row["type"], row["category_id"])
+        totals = deltas.setdefault(key, [0, 0])
+        totals[0] += row["amount_minor"]
+        totals[1] += 1
+    if deltas:
+        db.execute(_rollup_upsert(), [
+            dict(zip(_ROLLUP_KEY, key), total_amount_minor=amount, transaction_count=count)
+            for key, (amount, count) in deltas.items()
+        ])
+
+def add_transaction_to_rollup(db: Session, transaction: Transaction) -> None:
+    """Counts a new (or updated) transaction in the monthly rollup."""
+    apply_rollup_delta(db, transaction.user_id, transaction.date, transaction.type,
+                       transaction.category_id, transaction.amount_minor, 1)
+
+def remove_transaction_from_rollup(db: Session, transaction: Transaction) -> None:
+    """Removes a deleted (or about to be updated) transaction from the monthly rollup."""
+    apply_rollup_delta(db, transaction.user_id, transaction.date, transaction.type,
+                       transaction.category_id, -transaction.amount_minor, -1)
+
+def _transaction_totals_query(db: Session, user_id: int | None = None,
+                              months: List[Tuple[int, int]] | None = None):
+    """
+    Aggregates raw transactions by (user, year, month, type, category); the source of truth for the rollup.
+    With user_id and months the filter is (user_id, type, date range), which seeks on ix_transactions_user_type_date.
+    """
+    year_col = extract('year', Transaction.date)
+    month_col = extract('month', Transaction.date)
+    query = db.query(
+        Transaction.user_id,
+        year_col,
+        month_col,
+        Transaction.type,
+        Transaction.category_id,
+        func.sum(Transaction.amount_minor),
+        func.count(Transaction.id)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id,
+                             Transaction.type.in_([TransactionType.INCOME, TransactionType.EXPENSE]))
+    if months:
+        query = query.filter(or_(*[and_(Transaction.date >= start, Transaction.date < end)
+                                   for start, end in _month_spans(months)]))
+    return query.group_by(Transaction.user_id, year_col, month_col, Transaction.type, Transaction.category_id)
+
+def rebuild_monthly_rollups(db: Session, user_id: int | None = None) -> int:
+    """
+    Recomputes the rollup from scratch for one user (or everyone) and commits.
+    Returns the number of rollup rows written.
+    """
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+    db.execute(clear)
+
+    source = _transaction_totals_query(db, user_id).statement
+    result = db.execute(insert(MonthlyRollup).from_select(
+        ["user_id", "year", "month", "type", "category_id", "total_amount_minor", "transaction_count"], source
+    ))
+    bump_data_version(db, user_id) # Totals may differ from what was served before a drifted rollup was rebuilt
+    db.commit()
+    if user_id is None:
+        summary_cache.clear()
+    else:
+        summary_cache.invalidate(user_id)
+    return result.rowcount
+
+def verify_monthly_rollups(db: Session, user_id: int | None = None) -> List[Dict[str, Any]]:
+    """
+    Compares the rollup with a recomputation from raw transactions without modifying anything.
+    Returns one entry per drifted key (empty list when the rollup is consistent).
+    Totals are integer cents, so the comparison is exact.
+    """
+    expected = {
+        (uid, int(year), int(month), tx_type, category_id): (total, count)
+        for uid, year, month, tx_type, category_id, total, count in _transaction_totals_query(db, user_id).all()
+    }
+    rollup_query = db.query(MonthlyRollup)
+    if user_id is not None:
+        rollup_query = rollup_query.filter(MonthlyRollup.user_id == user_id)
+    actual = {
+        (row.user_id, row.year, row.month, row.type, row.category_id): (row.total_amount_minor, row.transaction_count)
+        for row in rollup_query.all()
+    }
+
+    drift = []
+    for key in sorted(expected.keys() | actual.keys(), key=lambda k: (k[0], k[1], k[2], k[3].value, k[4])):
+        expected_total, expected_count = expected.get(key, (0, 0))
+        actual_total, actual_count = actual.get(key, (0, 0))
+        if (expected_total, expected_count) != (actual_total, actual_count):
+            uid, year, month, tx_type, category_id = key
+            drift.append({
+                "user_id": uid,
+                "year": year,
+                "month": month,
+                "type": tx_type.value,
+                "category_id": category_id,
+                "expected_amount_minor": expected_total,
+                "rollup_amount_minor": actual_total,
+                "expected_count": expected_count,
+                "rollup_count": actual_count,
+            })
+    return drift
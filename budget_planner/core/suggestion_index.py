@@ -0,0 +1,135 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from budget_planner.models.data_models import Transaction
+from budget_planner.core.ledger_store import LedgerStore
+from bisect import bisect_left
+from heapq import nlargest
+import os
+import sys
+from typing import Dict, List, Any, Iterable
+
+# Per-user prefix index of past transaction descriptions, each mapped to the category it is most often
+# filed under. Serves description autocomplete and picks categories for imported rows. Kept in a
+# LedgerStore (version-checked, LRU under a memory budget) and updated by the transaction writes.
+#   BUDGET_PLANNER_SUGGEST_INDEX_MB   memory budget in MiB (default 64)
+SUGGEST_INDEX_BUDGET_BYTES = int(float(os.environ.get("BUDGET_PLANNER_SUGGEST_INDEX_MB", "64")) * 1024 * 1024)
+DEFAULT_SUGGESTIONS = 10
+
+_PREFIX_END = "\U0010ffff" # Sorts after any character, so key + _PREFIX_END bounds every key starting with it
+_ENTRY_BYTES = 300 # Rough size of an entry's dict, list slot and counts besides the strings
+
+def normalize_description(description: str | None) -> str:
+    """Lookup key of a description: case-folded with runs of whitespace collapsed. Empty if there is no text."""
+    return " ".join(description.split()).casefold() if description else ""
+
+class _Entry:
+    __slots__ = ("text", "categories")
+
+    def __init__(self, text: str):
+        self.text = text # Spelling shown in suggestions: the most recently added one
+        self.categories: Dict[int, int] = {} # category_id -> uses, most recently used last
+
+    def best_category(self) -> int | None:
+        # max() keeps the first of equal counts, so scan newest first to break ties by recency
+        return max(reversed(self.categories), key=self.categories.__getitem__, default=None)
+
+class DescriptionIndex:
+    """
+    One user's distinct descriptions as a sorted key list (bisect for prefixes) with a parallel list of
+    use counts, so ranking a prefix range reads plain ints, plus each key's spelling and category counts.
+    """
+
+    def __init__(self, user_id: int, version: int):
+        self.user_id = user_id
+        self.version = version # users.data_version the index reflects
+        self.keys: List[str] = []
+        self.uses: List[int] = []
+        self.entries: Dict[str, _Entry] = {}
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, description: str | None, category_id: int, uses: int = 1) -> None:
+        """Counts 'uses' more (or, if negative, fewer) transactions with this description and category."""
+        key = normalize_description(description)
+        if not key:
+            return
+        position = bisect_left(self.keys, key)
+        entry = self.entries.get(key)
+        if entry is None:
+            if uses <= 0:
+                return
+            entry = self.entries[key] = _Entry(" ".join(description.split()))
+            self.keys.insert(position, key)
+            self.uses.insert(position, 0)
+            self.nbytes += _ENTRY_BYTES + sys.getsizeof(key) * 2
+        elif uses > 0:
+            entry.text = " ".join(description.split())
+        if uses > 0: # Re-inserted to mark the category as the most recently used
+            entry.categories[category_id] = entry.categories.pop(category_id, 0) + uses
+        elif entry.categories.get(category_id, 0) + uses > 0:
+            entry.categories[category_id] += uses
+        else:
+            entry.categories.pop(category_id, None)
+        self.uses[position] += uses
+        if self.uses[position] <= 0:
+            del self.entries[key], self.keys[position], self.uses[position]
+            self.nbytes -= _ENTRY_BYTES + sys.getsizeof(key) * 2
+
+    def suggest(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List[Dict[str, Any]]:
+        """The most used descriptions starting with 'prefix' (case-insensitive), each with its usual category."""
+        key = normalize_description(prefix)
+        if not key or limit <= 0:
+            return []
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + _PREFIX_END, lo)
+        uses = self.uses[lo:hi]
+        top = nlargest(limit, range(len(uses)), key=uses.__getitem__) # Stable: equal counts keep key order
+        return [{"description": self.entries[self.keys[lo + i]].text,
+                 "category_id": self.entries[self.keys[lo + i]].best_category(), "uses": uses[i]} for i in top]
+
+    def category_map(self) -> Dict[str, int]:
+        """Normalized description -> usual category id, e.g. for categorizing a whole import."""
+        return {key: entry.best_category() for key, entry in self.entries.items()}
+
+def match_category(category_map: Dict[str, int], description: str | None) -> int | None:
+    """
+    Category for a description from a category_map: its exact (normalized) match, otherwise the longest
+    known description it starts with at a word boundary ("amazon mktplace 1234" -> "amazon mktplace").
+    """
+    key = normalize_description(description)
+    while key:
+        category_id = category_map.get(key)
+        if category_id is not None:
+            return category_id
+        key = key.rpartition(" ")[0]
+    return None
+
+def load_description_index(db: Session, user_id: int, version: int) -> DescriptionIndex:
+    """Builds a user's index from one grouped query, oldest usage first so the newest spelling wins."""
+    index = DescriptionIndex(user_id, version)
+    rows = db.execute(
+        select(Transaction.description, Transaction.category_id, func.count())
+        .where(Transaction.user_id == user_id, Transaction.description.is_not(None))
+        .group_by(Transaction.description, Transaction.category_id)
+        .order_by(func.max(Transaction.date))
+    )
+    for description, category_id, uses in rows:
+        index.add(description, category_id, uses)
+    return index
+
+def index_rows(index: DescriptionIndex, rows: Iterable[Dict[str, Any]], uses: int = 1) -> None:
+    """Adds (or with uses=-1, removes) transaction rows given as dicts with description and category_id."""
+    for row in rows:
+        index.add(row["description"], row["category_id"], uses)
+
+suggestion_store = LedgerStore(SUGGEST_INDEX_BUDGET_BYTES, loader=load_description_index)
+
+def suggest_descriptions(db: Session, user_id: int, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List[Dict[str, Any]]:
+    """Autocomplete for a description being typed: past descriptions starting with 'prefix', most used first."""
+    return suggestion_store.read(db, user_id, lambda index: index.suggest(prefix, limit))
+
+def get_category_map(db: Session, user_id: int) -> Dict[str, int]:
+    """A snapshot of the user's description -> usual category map (see match_category)."""
+    return suggestion_store.read(db, user_id, lambda index: index.category_map())
@@ -0,0 +1,82 @@
+from sqlalchemy.orm import Session, joinedload
+from budget_planner.models.data_models import Category, Goal, Transaction, Tombstone
+from budget_planner.core.user_management import get_data_version
+from typing import Any, Dict, Iterable
+import base64
+
+# Delta sync: every write stamps the rows it changes with the user's new data_version (change_seq) and
+# every delete leaves a Tombstone, so "what changed since version N" is an index range scan on
+# (user_id, change_seq) per table. A client keeps the returned cursor and passes it as 'since' next
+# time; since=0 returns a full snapshot. Each query is bounded by the cursor read first, so a write
+# committed while the queries run is left whole for the next sync instead of being half-seen.
+# A response holds at most SYNC_PAGE_SIZE rows: the entities are walked in SYNC_ENTITIES order by id, and
+# 'next_page' resumes the walk at the same cursor (rows changed meanwhile come with the next delta instead).
+# A client may sync only some entities (e.g. a dashboard that lists transactions through the filtered listing).
+SYNC_ENTITIES = ("categories", "transactions", "goals")
+SYNC_PAGE_SIZE = 1000
+MAX_SYNC_PAGE_SIZE = 5000
+_TOMBSTONE_ENTITIES = {"category": "categories", "transaction": "transactions", "goal": "goals"}
+
+def encode_sync_page(cursor: int, entity_index: int, after_id: int) -> str:
+    """The opaque 'next_page' token: the snapshot cursor and the position of the walk (entity, last id)."""
+    return base64.urlsafe_b64encode(f"{cursor}|{entity_index}|{after_id}".encode()).decode().rstrip("=")
+
+def decode_sync_page(page: str) -> tuple[int, int, int]:
+    """Parses a token from encode_sync_page. Raises ValueError if it is malformed."""
+    try:
+        cursor, entity_index, after_id = map(int, base64.urlsafe_b64decode(page + "=" * (-len(page) % 4)).decode().split("|"))
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError(f"Invalid sync page: {page!r}") from error
+    if not 0 <= entity_index < len(SYNC_ENTITIES):
+        raise ValueError(f"Invalid sync page: {page!r}")
+    return cursor, entity_index, after_id
+
+def get_changes(db: Session, user_id: int, since: int = 0, entities: Iterable[str] = SYNC_ENTITIES,
+                page: str | None = None, page_size: int = SYNC_PAGE_SIZE) -> Dict[str, Any] | None:
+    """
+    The user's categories, transactions (with their categories) and goals changed after version 'since',
+    plus the ids deleted since then, and the cursor to pass next time. Only 'entities' are read; the others
+    come back empty. At most 'page_size' rows are returned: while 'next_page' is set, call again with it (and
+    the same 'since' and 'entities') for the rest. Clients should apply the deletions (all in the first page)
+    before the upserts (an id can be reused after a delete). Returns None if the user does not exist.
+    Raises ValueError for a malformed 'page'.
+    """
+    entities = set(entities)
+    if page is None:
+        cursor, position, after_id = get_data_version(db, user_id), 0, 0
+        if cursor is None:
+            return None
+    else:
+        cursor, position, after_id = decode_sync_page(page)
+    full = since <= 0
+    changes: Dict[str, Any] = {
+        "cursor": cursor,
+        "full": full,
+        "next_page": None,
+        "deleted": {entity: [] for entity in SYNC_ENTITIES},
+    }
+    models = {"categories": (Category, db.query(Category)),
+              "transactions": (Transaction, db.query(Transaction).options(joinedload(Transaction.category, innerjoin=True))),
+              "goals": (Goal, db.query(Goal))}
+    remaining = page_size
+    for index, entity in enumerate(SYNC_ENTITIES):
+        changes[entity] = []
+        if entity not in entities or index < position or changes["next_page"] is not None:
+            continue
+        model, query = models[entity]
+        query = query.filter(model.user_id == user_id, model.change_seq <= cursor)
+        if not full:
+            query = query.filter(model.change_seq > since)
+        if index == position and after_id:
+            query = query.filter(model.id > after_id)
+        changes[entity] = query.order_by(model.id).limit(remaining).all()
+        remaining -= len(changes[entity])
+        if remaining == 0:
+            changes["next_page"] = encode_sync_page(cursor, index, changes[entity][-1].id)
+    if not full and page is None: # A full snapshot replaces the client's copy, so it has nothing to delete
+        for entity, entity_id in db.query(Tombstone.entity, Tombstone.entity_id).filter(
+                Tombstone.user_id == user_id, Tombstone.change_seq > since, Tombstone.change_seq <= cursor
+        ).order_by(Tombstone.change_seq, Tombstone.id):
+            if _TOMBSTONE_ENTITIES[entity] in entities:
+                changes["deleted"][_TOMBSTONE_ENTITIES[entity]].append(entity_id)
+    return changes
@@ -0,0 +1,136 @@
+from sqlalchemy.orm import Session
+from budget_planner.models.data_models import RevokedToken
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tokens are compact JWTs (HS256) signed with this key. Without BUDGET_PLANNER_SECRET_KEY a random
+# per-process key is used, so tokens do not survive restarts or work across workers.
+SECRET_KEY = os.environ.get("BUDGET_PLANNER_SECRET_KEY") or secrets.token_urlsafe(32)
+if "BUDGET_PLANNER_SECRET_KEY" not in os.environ:
+    logger.warning("BUDGET_PLANNER_SECRET_KEY is not set; using a random per-process signing key.")
+ACCESS_TOKEN_TTL_SECONDS = int(os.environ.get("BUDGET_PLANNER_ACCESS_TOKEN_TTL", "3600"))
+REVOCATION_REFRESH_SECONDS = float(os.environ.get("BUDGET_PLANNER_REVOCATION_REFRESH", "30"))
+
+_HEADER = base64.urlsafe_b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()).rstrip(b"=")
+
+class InvalidTokenError(ValueError):
+    """Raised when a token is malformed, has a bad signature, is expired or has been revoked."""
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+def _sign(signing_input: bytes) -> bytes:
+    return _b64encode(hmac.new(SECRET_KEY.encode(), signing_input, hashlib.sha256).digest())
+
+def create_access_token(user_id: int, username: str, ttl_seconds: int | None = None) -> str:
+    """Creates a signed access token for the user, valid for ttl_seconds (default ACCESS_TOKEN_TTL_SECONDS)."""
+    now = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "name": username,
+        "iat": now,
+        "exp": now + (ACCESS_TOKEN_TTL_SECONDS if ttl_seconds is None else ttl_seconds),
+        "jti": secrets.token_urlsafe(12),
+    }
+    signing_input = _HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return (signing_input + b"." + _sign(signing_input)).decode()
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifies a token's signature, expiry and revocation using only in-memory state (no DB, no bcrypt).
+    Returns its claims. Raises InvalidTokenError otherwise.
+    """
+    try:
+        header, payload, signature = token.encode().split(b".")
+    except ValueError:
+        raise InvalidTokenError("Malformed token")
+    if header != _HEADER or not hmac.compare_digest(signature, _sign(header + b"." + payload)):
+        raise InvalidTokenError("Invalid token signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+        user_id = int(claims["sub"])
+        expires_at = int(claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidTokenError("Malformed token claims")
+    if expires_at <= time.time():
+        raise InvalidTokenError("Token has expired")
+    if revocation_list.is_revoked(claims.get("jti")):
+        raise InvalidTokenError("Token has been revoked")
+    claims["sub"] = user_id
+    return claims
+
+class RevocationList:
+    """
+    In-memory set of revoked token ids, reloaded from the revoked_tokens table every
+    'refresh_seconds' so revocations made by other workers are picked up.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._revoked: frozenset[str] = frozenset()
+        self._loaded_at: float | None = None
+        # Neither lock is held across database I/O: in async mode concurrent requests share the
+        # event loop thread, and waiting on a lock held by a suspended request would block the loop.
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._added_during_refresh: set[str] = set()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def refresh(self, db: Session) -> None:
+        """
+        Reloads unexpired revocations from the table (read-only: expired rows are purged by revoke_token).
+        If another request is already refreshing, returns at once and keeps the current list.
+        """
+        if not self._refreshing.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._added_during_refresh = set()
+            now = datetime.datetime.utcnow()
+            loaded = frozenset(jti for (jti,) in db.query(RevokedToken.jti).filter(RevokedToken.expires_at > now).all())
+            with self._lock: # Keep revocations added locally while the table was being read
+                self._revoked = loaded | self._added_during_refresh
+                self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing.release()
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._revoked = self._revoked | {jti}
+            self._added_during_refresh.add(jti)
+
+revocation_list = RevocationList()
+
+def purge_expired_revocations(db: Session) -> int:
+    """Deletes revocations of tokens that have expired anyway (an index range on expires_at). Does not commit."""
+    return db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.datetime.utcnow()).delete()
+
+def revoke_token(db: Session, claims: dict) -> None:
+    """
+    Revokes a decoded token: recorded in the table (for other workers) and applied locally at once.
+    Logout is the only writer of the table, so it also purges expired rows, in the same commit.
+    """
+    expires_at = datetime.datetime.utcfromtimestamp(claims["exp"])
+    purge_expired_revocations(db)
+    if db.get(RevokedToken, claims["jti"]) is None:
+        db.add(RevokedToken(jti=claims["jti"], user_id=claims["sub"], expires_at=expires_at))
+    db.commit()
+    revocation_list.add(claims["jti"])
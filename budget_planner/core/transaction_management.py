@@ -1,7 +1,24 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func # For count
-from budget_planner.models.data_models import Category, Transaction, TransactionType, User
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Float, Integer, case, func, inspect, text, tuple_ # For count/sums, identity lookups, keyset comparisons and search
+from budget_planner.models.data_models import (Category, Transaction, TransactionType, User, MonthlyRollup, Tombstone,
+                                              SEARCH_INDEX_TABLE)
+from budget_planner.core import money, rollup_management
+from budget_planner.core.user_management import bump_data_version
+from budget_planner.core.trend_analysis import summary_cache
+from budget_planner.core.ledger_store import ledger_store
+from budget_planner.core.suggestion_index import suggestion_store
+import base64
 import datetime
+from typing import Callable
+
+def record_deletion(db: Session, user_id: int, entity: str, entity_id: int, version: int) -> None:
+    """Leaves a tombstone for a deleted row (see sync_management), in the caller's DB transaction."""
+    db.add(Tombstone(user_id=user_id, entity=entity, entity_id=entity_id, change_seq=version))
+
+def advance_stores(user_id: int, version: int) -> None:
+    """Moves the in-process stores past a committed write that does not change their contents."""
+    ledger_store.apply(user_id, version, lambda ledger: None)
+    suggestion_store.apply(user_id, version, lambda index: None)
 
 # --- Category Management ---
 
@@ -21,9 +38,11 @@ def create_category(db: Session, name: str, user_id: int) -> Category | None:
     if existing_category:
         return None # Duplicate category for this user
 
-    db_category = Category(name=name, user_id=user_id)
+    version = bump_data_version(db, user_id)
+    db_category = Category(name=name, user_id=user_id, change_seq=version)
     db.add(db_category)
     db.commit()
+    advance_stores(user_id, version)
     db.refresh(db_category)
     return db_category
 
@@ -41,6 +60,7 @@ def update_category(db: Session, category_id: int, user_id: int, name: str | Non
     if not db_category:
         return None # Category not found or doesn't belong to user
 
+    renamed_months, version = [], None
     if name is not None:
         # Check if the new name would conflict with an existing category for this user
         existing_category_with_new_name = get_category_by_name(db, name, user_id)
@@ -48,9 +68,19 @@ def update_category(db: Session, category_id: int, user_id: int, name: str | Non
             # Another category with this name already exists for the user
             return None # Or raise a specific exception
 
+        if name != db_category.name:
+            # Summaries list expenses by category name; find the months to invalidate before committing
+            renamed_months = db.query(MonthlyRollup.year, MonthlyRollup.month).filter(
+                MonthlyRollup.user_id == user_id, MonthlyRollup.category_id == category_id).distinct().all()
+            version = bump_data_version(db, user_id)
+            db_category.change_seq = version
         db_category.name = name
 
     db.commit()
+    if renamed_months:
+        summary_cache.invalidate(user_id, [(year, month) for year, month in renamed_months])
+    if version is not None:
+        ledger_store.apply(user_id, version, lambda ledger: ledger.rename_category(category_id, name))
     db.refresh(db_category)
     return db_category
 
@@ -71,17 +101,25 @@ def delete_category(db: Session, category_id: int, user_id: int) -> bool:
         # Consider raising an error or returning a specific status
         return False
 
+    version = bump_data_version(db, user_id)
+    record_deletion(db, user_id, "category", category_id, version)
     db.delete(db_category)
     db.commit()
+    advance_stores(user_id, version)
     return True
 
 # --- Transaction Management ---
 
 def create_transaction(db: Session, amount: float, type: TransactionType, date: datetime.datetime,
-                       user_id: int, category_id: int, description: str | None = None) -> Transaction | None:
+                       user_id: int, category_id: int, description: str | None = None,
+                       currency: str | None = None,
+                       before_commit: Callable[[Session, Transaction], None] | None = None) -> Transaction | None:
     """
-    Creates a new transaction. Ensures the category belongs to the user.
+    Creates a new transaction. 'amount' is in major units and stored exactly as integer cents.
+    Ensures the category belongs to the user.
     Returns the Transaction object or None if category validation fails.
+    before_commit(db, transaction), if given, runs inside the DB transaction (after the insert is flushed)
+    just before it commits.
     """
     # Validate that the category belongs to the user
     category = get_category_by_id(db, category_id, user_id)
@@ -89,7 +127,8 @@ def create_transaction(db: Session, amount: float, type: TransactionType, date:
         return None # Category not found for this user or does not exist
 
     db_transaction = Transaction(
-        amount=amount,
+        amount_minor=money.to_minor(amount),
+        currency=money.normalize_currency(currency),
         type=type,
         date=date,
         description=description,
@@ -97,24 +136,188 @@ def create_transaction(db: Session, amount: float, type: TransactionType, date:
         user_id=user_id
     )
     db.add(db_transaction)
+    rollup_management.add_transaction_to_rollup(db, db_transaction) # Same DB transaction as the insert
+    version = db_transaction.change_seq = bump_data_version(db, user_id)
+    if before_commit is not None:
+        db.flush()
+        before_commit(db, db_transaction)
     db.commit()
-    db.refresh(db_transaction)
+    summary_cache.invalidate(user_id, [(date.year, date.month)])
+    db_transaction = _reload_with_category(db, db_transaction)
+    ledger_store.apply(user_id, version, lambda ledger: ledger.upsert(db_transaction))
+    suggestion_store.apply(user_id, version, lambda index: index.add(description, category_id))
     return db_transaction
 
-def get_transactions_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[Transaction]:
-    """Retrieves transactions for a user with pagination, ordered by date descending."""
-    return db.query(Transaction).filter(Transaction.user_id == user_id).order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
+# Listing sort orders; id breaks ties in the same direction, so every order is total (keyset pagination)
+TRANSACTION_SORTS = ("date_desc", "date_asc", "amount_desc", "amount_asc")
+
+def _sort_key_is_amount(sort: str) -> bool:
+    if sort not in TRANSACTION_SORTS:
+        raise ValueError(f"Unsupported sort '{sort}', expected one of {TRANSACTION_SORTS}")
+    return sort.startswith("amount")
+
+def encode_transaction_cursor(transaction: Transaction, sort: str = "date_desc") -> str:
+    """Builds the opaque keyset cursor pointing just past 'transaction' in the given sort order."""
+    key = transaction.amount_minor if _sort_key_is_amount(sort) else transaction.date.isoformat()
+    raw = f"{key}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_transaction_cursor(cursor: str, sort: str = "date_desc") -> tuple[datetime.datetime | int, int]:
+    """Parses a cursor from encode_transaction_cursor for the same sort. Raises ValueError if it is malformed."""
+    by_amount = _sort_key_is_amount(sort)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key_part, id_part = raw.rsplit("|", 1)
+        key = int(key_part) if by_amount else datetime.datetime.fromisoformat(key_part)
+        return key, int(id_part)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from error
+
+def _minor_bound(amount: float | None) -> int | None:
+    return None if amount is None else money.to_minor(amount)
+
+def _filter_transactions(query, start_date: datetime.datetime | None, end_date: datetime.datetime | None,
+                         type: TransactionType | None, category_ids: list[int] | None,
+                         min_amount: float | None, max_amount: float | None):
+    """
+    Applies the listing filters to a query already restricted to one user. Each is a plain comparison
+    on an indexed column: (user_id, date), (user_id, type, date), (user_id, category_id, date) and
+    (user_id, amount_minor). Amount bounds are inclusive, in major units.
+    """
+    if start_date is not None:
+        query = query.filter(Transaction.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Transaction.date < end_date)
+    if type is not None:
+        query = query.filter(Transaction.type == type)
+    if category_ids:
+        query = query.filter(Transaction.category_id.in_(category_ids))
+    if min_amount is not None:
+        query = query.filter(Transaction.amount_minor >= money.to_minor(min_amount))
+    if max_amount is not None:
+        query = query.filter(Transaction.amount_minor <= money.to_minor(max_amount))
+    return query
+
+def get_transactions_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                             start_date: datetime.datetime | None = None,
+                             end_date: datetime.datetime | None = None,
+                             cursor: str | None = None, type: TransactionType | None = None,
+                             category_ids: list[int] | None = None, min_amount: float | None = None,
+                             max_amount: float | None = None, sort: str = "date_desc") -> list[Transaction]:
+    """
+    Retrieves transactions for a user with pagination, ordered by 'sort' (see TRANSACTION_SORTS;
+    date descending by default, id breaks ties).
+    Optionally filtered by the half-open date range [start_date, end_date), type, category ids and
+    inclusive amount bounds. Raises ValueError for an unknown sort or a malformed cursor.
+    With a cursor (from encode_transaction_cursor with the same sort), the page starts right after the
+    cursor's row using an index seek; 'skip' is the offset-based compatibility path and is ignored
+    when a cursor is given.
+    Served from the in-process ledger store when it is enabled and sorting by date (rows are then
+    LedgerTransactions).
+    """
+    by_amount = _sort_key_is_amount(sort)
+    descending = sort.endswith("desc")
+    cursor_key = decode_transaction_cursor(cursor, sort) if cursor is not None else None
+    if ledger_store.enabled and not by_amount:
+        return ledger_store.read(db, user_id, lambda ledger: ledger.list(
+            skip, limit, start_date, end_date, cursor_key, type, category_ids,
+            _minor_bound(min_amount), _minor_bound(max_amount), ascending=not descending))
+    # Categories come from the same query (one JOIN) since every response nests them
+    query = db.query(Transaction).options(joinedload(Transaction.category, innerjoin=True)).filter(Transaction.user_id == user_id)
+    query = _filter_transactions(query, start_date, end_date, type, category_ids, min_amount, max_amount)
+    sort_column = Transaction.amount_minor if by_amount else Transaction.date
+    if descending:
+        query = query.order_by(sort_column.desc(), Transaction.id.desc())
+    else:
+        query = query.order_by(sort_column, Transaction.id)
+    if cursor_key is not None:
+        row_key, cursor_row = tuple_(sort_column, Transaction.id), tuple_(*cursor_key)
+        query = query.filter(row_key < cursor_row if descending else row_key > cursor_row)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def summarize_transactions(db: Session, user_id: int, start_date: datetime.datetime | None = None,
+                           end_date: datetime.datetime | None = None, type: TransactionType | None = None,
+                           category_ids: list[int] | None = None, min_amount: float | None = None,
+                           max_amount: float | None = None) -> dict[str, int]:
+    """
+    Count and income/expense totals (in cents) of every transaction matching the listing filters,
+    regardless of pagination. One aggregate query, or a scan of the ledger store when it is enabled.
+    """
+    if ledger_store.enabled:
+        summary = ledger_store.read(db, user_id, lambda ledger: ledger.summarize(
+            start_date, end_date, type, category_ids, _minor_bound(min_amount), _minor_bound(max_amount)))
+        return {key: summary[key] for key in ("transaction_count", "total_income_minor", "total_expenses_minor")}
+    is_income = Transaction.type == TransactionType.INCOME
+    query = db.query(
+        func.count(Transaction.id),
+        func.coalesce(func.sum(case((is_income, Transaction.amount_minor), else_=0)), 0),
+        func.coalesce(func.sum(case((is_income, 0), else_=Transaction.amount_minor)), 0),
+    ).filter(Transaction.user_id == user_id)
+    count, income_minor, expenses_minor = _filter_transactions(
+        query, start_date, end_date, type, category_ids, min_amount, max_amount).one()
+    return {"transaction_count": count, "total_income_minor": income_minor, "total_expenses_minor": expenses_minor}
+
+def _search_expression(query: str) -> str | None:
+    """
+    FTS5 expression for free text typed by a user: every term must match, and a term ending in '*'
+    matches as a prefix. Terms are quoted, so FTS5 operators in the input are taken literally.
+    """
+    terms = []
+    for word in query.split():
+        term = word.rstrip("*")
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if term != word else ""))
+    return " AND ".join(terms) or None
+
+# Search result orders as (score column, ORDER BY): BM25 relevance has to score every match, while most
+# recently added first walks the index backwards and stops after the page
+SEARCH_ORDERS = {"relevance": ("rank", "rank, rowid DESC"), "recent": ("NULL", "rowid DESC")}
+
+def search_transactions(db: Session, user_id: int, query: str, skip: int = 0, limit: int = 50,
+                        order: str = "relevance") -> list[Transaction]:
+    """
+    Full-text search over the user's transaction descriptions, ordered per SEARCH_ORDERS (ties go to
+    the most recently added). Raises ValueError for an unknown order.
+    One statement: the page is picked inside the index, then joined to its rows and categories.
+    """
+    if order not in SEARCH_ORDERS:
+        raise ValueError(f"Unsupported search order '{order}', expected one of {tuple(SEARCH_ORDERS)}")
+    expression = _search_expression(query)
+    if expression is None:
+        return []
+    # The user_id column of the index holds the owner as a token, so scoping is part of the match and
+    # ORDER BY ... LIMIT runs entirely in FTS5 instead of joining every match first
+    score, order_by = SEARCH_ORDERS[order]
+    ranked = text(
+        f"SELECT rowid AS id, {score} AS score FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH :match "
+        f"ORDER BY {order_by} LIMIT :limit OFFSET :skip"
+    ).bindparams(match=f'user_id : "{int(user_id)}" AND description : ({expression})', limit=limit, skip=skip).columns(
+        id=Integer, score=Float).subquery("ranked")
+    query = (db.query(Transaction).options(joinedload(Transaction.category, innerjoin=True))
+             .join(ranked, ranked.c.id == Transaction.id).filter(Transaction.user_id == user_id))
+    if order == "relevance":
+        query = query.order_by(ranked.c.score)
+    return query.order_by(Transaction.id.desc()).all()
 
 def get_transaction_by_id(db: Session, transaction_id: int, user_id: int) -> Transaction | None:
-    """Retrieves a specific transaction by its ID, ensuring it belongs to the user."""
-    return db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
+    """Retrieves a specific transaction by its ID (with its category), ensuring it belongs to the user."""
+    return db.query(Transaction).options(joinedload(Transaction.category, innerjoin=True)).filter(
+        Transaction.id == transaction_id, Transaction.user_id == user_id).first()
+
+def _reload_with_category(db: Session, transaction: Transaction) -> Transaction:
+    """Reloads a just-committed transaction and its category in one query (instead of refresh + lazy load)."""
+    transaction_id = inspect(transaction).identity[0] # Reading .id would itself trigger a refresh
+    return db.query(Transaction).options(joinedload(Transaction.category, innerjoin=True)).filter(
+        Transaction.id == transaction_id).populate_existing().one()
 
 def update_transaction(db: Session, transaction_id: int, user_id: int,
                        amount: float | None = None, type: TransactionType | None = None,
                        date: datetime.datetime | None = None, description: str | None = None,
-                       category_id: int | None = None) -> Transaction | None:
+                       category_id: int | None = None, currency: str | None = None) -> Transaction | None:
     """
-    Updates a transaction. Ensures it belongs to the user.
+    Updates a transaction ('amount' in major units). Ensures it belongs to the user.
     If category_id is changed, ensures the new category also belongs to the user.
     Returns the updated Transaction object or None if validation fails.
     """
@@ -127,10 +330,19 @@ def update_transaction(db: Session, transaction_id: int, user_id: int,
         new_category = get_category_by_id(db, category_id, user_id)
         if not new_category:
             return None # New category not found for this user or does not exist
+
+    # Take the old values out of the rollup; the new ones are added back below (handles month/category moves)
+    rollup_management.remove_transaction_from_rollup(db, db_transaction)
+    affected_months = {(db_transaction.date.year, db_transaction.date.month)}
+    old_description, old_category_id = db_transaction.description, db_transaction.category_id
+
+    if category_id is not None:
         db_transaction.category_id = category_id
 
     if amount is not None:
-        db_transaction.amount = amount
+        db_transaction.amount_minor = money.to_minor(amount)
+    if currency is not None:
+        db_transaction.currency = money.normalize_currency(currency)
     if type is not None:
         db_transaction.type = type
     if date is not None:
@@ -138,8 +350,15 @@ def update_transaction(db: Session, transaction_id: int, user_id: int,
     if description is not None: # Allow setting description to empty string
         db_transaction.description = description
 
+    rollup_management.add_transaction_to_rollup(db, db_transaction)
+    affected_months.add((db_transaction.date.year, db_transaction.date.month))
+    version = db_transaction.change_seq = bump_data_version(db, user_id)
     db.commit()
-    db.refresh(db_transaction)
+    summary_cache.invalidate(user_id, affected_months)
+    db_transaction = _reload_with_category(db, db_transaction)
+    ledger_store.apply(user_id, version, lambda ledger: ledger.upsert(db_transaction))
+    suggestion_store.apply(user_id, version, lambda index: (
+        index.add(old_description, old_category_id, -1), index.add(db_transaction.description, db_transaction.category_id)))
     return db_transaction
 
 def delete_transaction(db: Session, transaction_id: int, user_id: int) -> bool:
@@ -148,6 +367,14 @@ def delete_transaction(db: Session, transaction_id: int, user_id: int) -> bool:
     if not db_transaction:
         return False # Transaction not found or doesn't belong to user
 
+    rollup_management.remove_transaction_from_rollup(db, db_transaction)
+    month = (db_transaction.date.year, db_transaction.date.month)
+    description, category_id = db_transaction.description, db_transaction.category_id
     db.delete(db_transaction)
+    version = bump_data_version(db, user_id)
+    record_deletion(db, user_id, "transaction", transaction_id, version)
     db.commit()
+    summary_cache.invalidate(user_id, [month])
+    ledger_store.apply(user_id, version, lambda ledger: ledger.delete(transaction_id))
+    suggestion_store.apply(user_id, version, lambda index: index.add(description, category_id, -1))
     return True
@@ -1,8 +1,134 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from budget_planner.models.data_models import Transaction, TransactionType, Category, User
+from sqlalchemy import func, and_, or_
+from budget_planner.models.data_models import TransactionType, Category, User, MonthlyRollup
+from budget_planner.core.money import to_major
+from budget_planner.core.user_management import get_data_version
+from collections import OrderedDict
+import contextlib
 import datetime
-from typing import Dict, List, Any
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Iterable, Tuple
+
+def _previous_months(period_count: int, today: datetime.date | None = None) -> List[Tuple[int, int]]:
+    """
+    Returns (year, month) pairs for the last 'period_count' months, most recent first.
+    Includes the current month.
+    """
+    today = today or datetime.date.today()
+    months = []
+    for i in range(period_count):
+        # Calculate year and month for the i-th period ago
+        year_to_query = today.year
+        month_to_query = today.month - i
+
+        while month_to_query <= 0: # Adjust for year change
+            month_to_query += 12
+            year_to_query -= 1
+
+        months.append((year_to_query, month_to_query))
+    return months
+
+def _build_summary(year: int, month: int, total_income_minor: int, total_expenses_minor: int,
+                   expenses_by_category_minor: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Shapes the summary dict returned by get_monthly_summary from exact integer cents;
+    amounts are converted to major units only here, so no rounding is needed.
+    """
+    return {
+        "year": year,
+        "month": month,
+        "total_income": to_major(total_income_minor),
+        "total_expenses": to_major(total_expenses_minor),
+        "expenses_by_category": {name: to_major(amount) for name, amount in expenses_by_category_minor.items()},
+        "net_savings": to_major(total_income_minor - total_expenses_minor)
+    }
+
+def month_bounds(year: int, month: int) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Returns the half-open [start, end) datetime range covering a calendar month."""
+    start = datetime.datetime(year, month, 1)
+    end = datetime.datetime(year + 1, 1, 1) if month == 12 else datetime.datetime(year, month + 1, 1)
+    return start, end
+
+def _month_spans(months: List[Tuple[int, int]]) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """Coalesces (year, month) pairs into as few half-open datetime ranges as possible."""
+    spans: List[Tuple[datetime.datetime, datetime.datetime]] = []
+    for year, month in sorted(set(months)):
+        start, end = month_bounds(year, month)
+        if spans and spans[-1][1] == start:
+            spans[-1] = (spans[-1][0], end) # Contiguous with the previous month
+        else:
+            spans.append((start, end))
+    return spans
+
+def _monthly_totals_query(db: Session, user_id: int, months: List[Tuple[int, int]]):
+    """
+    Reads the (year, month, type, category) totals for the given months from the monthly rollup.
+    Each month is an equality seek on the rollup's (user_id, year, month, ...) primary key,
+    so the cost is O(months x categories) regardless of how many transactions there are.
+    """
+    month_filters = [and_(MonthlyRollup.year == year, MonthlyRollup.month == month)
+                     for year, month in sorted(set(months))]
+
+    return db.query(
+        MonthlyRollup.year,
+        MonthlyRollup.month,
+        MonthlyRollup.type,
+        Category.name,
+        func.sum(MonthlyRollup.total_amount_minor) # Integer SUM: exact
+    ).join(MonthlyRollup.category).filter(
+        MonthlyRollup.user_id == user_id,
+        or_(*month_filters)
+    ).group_by(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, Category.name)
+
+def _compute_monthly_summaries(db: Session, user_id: int,
+                               months: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Aggregates the given months with a single grouped query over the monthly rollup."""
+    rows = _monthly_totals_query(db, user_id, months).all()
+
+    # Per-month integer totals in cents
+    income_totals: Dict[Tuple[int, int], int] = {}
+    expense_parts: Dict[Tuple[int, int], Dict[str, int]] = {}
+    for year, month, tx_type, category_name, amount_minor in rows:
+        key = (int(year), int(month))
+        if tx_type == TransactionType.INCOME:
+            income_totals[key] = income_totals.get(key, 0) + amount_minor
+        else:
+            expense_parts.setdefault(key, {})[category_name] = amount_minor
+
+    summaries = {}
+    for year, month in months:
+        by_category = expense_parts.get((year, month), {})
+        summaries[(year, month)] = _build_summary(year, month, income_totals.get((year, month), 0),
+                                                  sum(by_category.values()), by_category)
+    return summaries
+
+def get_monthly_summaries(db: Session, user_id: int, months: List[Tuple[int, int]],
+                          data_version: int | None = None) -> List[Dict[str, Any]]:
+    """
+    Returns the monthly summary for every (year, month) in 'months', in the order given.
+    Months found in the summary cache are served from it; the rest are computed with a single
+    grouped query over the monthly rollup, keyed by (year, month, type, category), and cached.
+    Pass the user's 'data_version' if already loaded; the in-process cache otherwise reads it.
+    Does not validate the user.
+    """
+    if not months:
+        return []
+
+    if data_version is None and not summary_cache.backend.shared:
+        data_version = get_data_version(db, user_id) # Read before computing: a later write outdates what is stored
+    generation, summaries = summary_cache.lookup(user_id, months, data_version)
+    missing = [month for month in dict.fromkeys(months) if month not in summaries]
+    if missing:
+        computed = _compute_monthly_summaries(db, user_id, missing)
+        summary_cache.store(user_id, generation, computed, data_version)
+        summaries.update(computed)
+    # Copies, so callers cannot modify cached entries
+    return [dict(summaries[month], expenses_by_category=dict(summaries[month]["expenses_by_category"]))
+            for month in months]
 
 def get_monthly_summary(db: Session, user_id: int, year: int, month: int) -> Dict[str, Any]:
     """
@@ -23,73 +149,258 @@ def get_monthly_summary(db: Session, user_id: int, year: int, month: int) -> Dic
             "net_savings": 0
         }
 
-    # Total Income
-    total_income_query = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == TransactionType.INCOME,
-        extract('year', Transaction.date) == year,
-        extract('month', Transaction.date) == month
-    )
-    total_income = total_income_query.scalar() or 0.0
-
-    # Total Expenses
-    total_expenses_query = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == TransactionType.EXPENSE,
-        extract('year', Transaction.date) == year,
-        extract('month', Transaction.date) == month
-    )
-    total_expenses = total_expenses_query.scalar() or 0.0
-
-    # Expenses by Category
-    expenses_by_category_query = db.query(
-        Category.name,
-        func.sum(Transaction.amount)
-    ).join(Transaction.category).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == TransactionType.EXPENSE,
-        extract('year', Transaction.date) == year,
-        extract('month', Transaction.date) == month
-    ).group_by(Category.name)
-
-    expenses_by_category_result = expenses_by_category_query.all()
-    expenses_by_category_dict = {name: amount for name, amount in expenses_by_category_result}
-
-    net_savings = total_income - total_expenses
-
-    return {
-        "year": year,
-        "month": month,
-        "total_income": round(total_income, 2),
-        "total_expenses": round(total_expenses, 2),
-        "expenses_by_category": expenses_by_category_dict,
-        "net_savings": round(net_savings, 2)
-    }
+    return get_monthly_summaries(db, user_id, [(year, month)], user.data_version)[0]
 
 def get_spending_trend(db: Session, user_id: int, period_count: int = 3) -> List[Dict[str, Any]]:
     """
     Retrieves monthly summaries for the last 'period_count' months for a given user.
-    Includes the current month.
+    Includes the current month. All months are aggregated in one grouped query.
     """
     # Validate user
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return [{"error": "User not found"}] # Or raise exception
 
-    trend_data = []
-    today = datetime.date.today()
+    months = _previous_months(period_count)
+    return get_monthly_summaries(db, user_id, months, user.data_version) # Data will be from most recent month to oldest
 
-    for i in range(period_count):
-        # Calculate year and month for the i-th period ago
-        # current_period_date is the first day of the month we are calculating for
-        year_to_query = today.year
-        month_to_query = today.month - i
+# --- Summary cache ---
+# Monthly summaries keyed by (user_id, year, month), bounded in size (LRU) and age (TTL).
+# Writes invalidate only the months they touch, after committing: transaction create/update/delete,
+# category renames, imports and rollup rebuilds. Each invalidation also bumps a per-user generation;
+# a summary computed before an invalidation is not stored, so a concurrent read cannot re-cache stale data.
+# Those invalidations only reach the process that made the write unless the cache is the shared SQLite file,
+# so the in-process cache also stamps each entry with users.data_version and drops entries of an older
+# version (the version is the User row the summary endpoints load anyway, or one primary-key lookup).
+# Set BUDGET_PLANNER_SUMMARY_CACHE_PATH when running several workers: the shared cache keeps per-month
+# invalidation, where the in-process one recomputes a user's months after any write by any worker.
+#   BUDGET_PLANNER_SUMMARY_CACHE_SIZE   maximum number of cached months (default 10000)
+#   BUDGET_PLANNER_SUMMARY_CACHE_TTL    seconds an entry may be served (default 3600)
+#   BUDGET_PLANNER_SUMMARY_CACHE_PATH   SQLite file shared by all workers on the host; in-process when unset
+SUMMARY_CACHE_SIZE = int(os.environ.get("BUDGET_PLANNER_SUMMARY_CACHE_SIZE", "10000"))
+SUMMARY_CACHE_TTL_SECONDS = float(os.environ.get("BUDGET_PLANNER_SUMMARY_CACHE_TTL", "3600"))
+SUMMARY_CACHE_PATH = os.environ.get("BUDGET_PLANNER_SUMMARY_CACHE_PATH")
 
-        while month_to_query <= 0: # Adjust for year change
-            month_to_query += 12
-            year_to_query -= 1
+Month = Tuple[int, int]
+
+class MemoryCacheBackend:
+    """In-process LRU of summaries (one per worker). Entries are checked against the user's data version."""
+
+    shared = False # Other workers' invalidations do not reach it
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[int, int, int], Tuple[float, int | None, Dict[str, Any]]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock() # Never held across I/O
+
+    def get_many(self, user_id: int, months: Iterable[Month],
+                 version: int | None = None) -> Tuple[Dict[Month, Dict[str, Any]], int]:
+        """Returns the live entries found (and marks them recently used) plus the number of expired ones dropped.
+        Entries stored at another data version than 'version' count as expired."""
+        now = self.clock()
+        found, expired = {}, 0
+        with self._lock:
+            for year, month in months:
+                key = (user_id, year, month)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now or entry[1] != version:
+                    del self._entries[key]
+                    expired += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[(year, month)] = entry[2]
+        return found, expired
+
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    def put_many(self, user_id: int, generation: int, summaries: Dict[Month, Dict[str, Any]],
+                 version: int | None = None) -> int | None:
+        """Stores summaries computed at 'generation' and data 'version'. Returns the number of LRU evictions,
+        or None if stale."""
+        expires_at = self.clock() + self.ttl_seconds
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return None
+            for (year, month), summary in summaries.items():
+                self._entries[(user_id, year, month)] = (expires_at, version, summary)
+                self._entries.move_to_end((user_id, year, month))
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def invalidate(self, user_id: int, months: Iterable[Month] | None) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if months is None:
+                keys = [key for key in self._entries if key[0] == user_id]
+            else:
+                keys = [(user_id, year, month) for year, month in months]
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations = {user_id: generation + 1 for user_id, generation in self._generations.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """
+    Summaries in a small SQLite file (WAL) shared by every worker process on the host, so a month
+    computed by one worker is warm for all and an invalidation in one worker applies to all.
+    Uses the wall clock for expiry since entries outlive any single process. Data versions are
+    accepted for the same interface and ignored: every invalidation already reaches this cache.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._local = threading.local() # sqlite3 connections are per thread
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    user_id INTEGER NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL,
+                    payload TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL,
+                    PRIMARY KEY (user_id, year, month)) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_summary_cache_last_used ON summary_cache (last_used);
+                CREATE TABLE IF NOT EXISTS summary_cache_generations (
+                    user_id INTEGER PRIMARY KEY, generation INTEGER NOT NULL);
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None) # Explicit BEGINs below
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextlib.contextmanager
+    def _write(self):
+        """A write transaction: committed if the block completes, rolled back (and the error raised) if not."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            if connection.in_transaction: # SQLite may already have rolled back (e.g. disk full)
+                connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get_many(self, user_id: int, months: Iterable[Month],
+                 version: int | None = None) -> Tuple[Dict[Month, Dict[str, Any]], int]:
+        months = list(months)
+        now = self.clock()
+        connection = self._connection()
+        placeholders = ",".join("(?, ?)" for _ in months)
+        rows = connection.execute(
+            f"SELECT year, month, payload, expires_at FROM summary_cache "
+            f"WHERE user_id = ? AND (year, month) IN (VALUES {placeholders})",
+            [user_id] + [part for month in months for part in month]).fetchall()
+        found = {(year, month): json.loads(payload) for year, month, payload, expires_at in rows if expires_at > now}
+        expired = len(rows) - len(found)
+        if found:
+            connection.executemany("UPDATE summary_cache SET last_used = ? WHERE user_id = ? AND year = ? AND month = ?",
+                                   [(now, user_id, year, month) for year, month in found])
+        return found, expired
+
+    def generation(self, user_id: int) -> int:
+        row = self._connection().execute(
+            "SELECT generation FROM summary_cache_generations WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def put_many(self, user_id: int, generation: int, summaries: Dict[Month, Dict[str, Any]],
+                 version: int | None = None) -> int | None:
+        now = self.clock()
+        with self._write() as connection:
+            if self.generation(user_id) != generation:
+                return None
+            connection.executemany("INSERT OR REPLACE INTO summary_cache VALUES (?, ?, ?, ?, ?, ?)", [
+                (user_id, year, month, json.dumps(summary), now + self.ttl_seconds, now)
+                for (year, month), summary in summaries.items()])
+            connection.execute("DELETE FROM summary_cache WHERE expires_at <= ?", (now,))
+            overflow = connection.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                connection.execute("DELETE FROM summary_cache WHERE (user_id, year, month) IN (SELECT user_id, year, month "
+                                   "FROM summary_cache ORDER BY last_used LIMIT ?)", (overflow,))
+            return max(overflow, 0)
+
+    def invalidate(self, user_id: int, months: Iterable[Month] | None) -> None:
+        with self._write() as connection:
+            connection.execute("INSERT INTO summary_cache_generations VALUES (?, 1) ON CONFLICT (user_id) "
+                               "DO UPDATE SET generation = generation + 1", (user_id,))
+            if months is None:
+                connection.execute("DELETE FROM summary_cache WHERE user_id = ?", (user_id,))
+            else:
+                connection.executemany("DELETE FROM summary_cache WHERE user_id = ? AND year = ? AND month = ?",
+                                       [(user_id, year, month) for year, month in months])
+
+    def clear(self) -> None:
+        with self._write() as connection:
+            connection.execute("DELETE FROM summary_cache")
+            connection.execute("UPDATE summary_cache_generations SET generation = generation + 1")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+
+class SummaryCache:
+    """Front for a cache backend that keeps hit/miss/eviction/expiry/invalidation counters (per process)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counters[name] += delta
+
+    def lookup(self, user_id: int, months: List[Month],
+               version: int | None = None) -> Tuple[int, Dict[Month, Dict[str, Any]]]:
+        """Returns (generation, cached summaries) at the user's data 'version'. Pass the generation and the
+        version to store() with what was computed."""
+        generation = self.backend.generation(user_id) # Read first: anything invalidated after this is not stored
+        unique_months = list(dict.fromkeys(months))
+        found, expired = self.backend.get_many(user_id, unique_months, version)
+        self._count(hits=len(found), misses=len(unique_months) - len(found), expirations=expired)
+        return generation, found
+
+    def store(self, user_id: int, generation: int, summaries: Dict[Month, Dict[str, Any]],
+              version: int | None = None) -> None:
+        evicted = self.backend.put_many(user_id, generation, summaries, version)
+        if evicted:
+            self._count(evictions=evicted)
+
+    def invalidate(self, user_id: int, months: Iterable[Month] | None = None) -> None:
+        """Drops the user's cached summaries for 'months' (all of them when None)."""
+        self.backend.invalidate(user_id, None if months is None else set(months))
+        self._count(invalidations=1)
+
+    def clear(self) -> None:
+        self.backend.clear()
 
-        monthly_summary = get_monthly_summary(db, user_id, year_to_query, month_to_query)
-        trend_data.append(monthly_summary)
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, size=len(self.backend))
 
-    return trend_data # Data will be from most recent month to oldest
+summary_cache = SummaryCache(
+    SQLiteCacheBackend(SUMMARY_CACHE_PATH, SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL_SECONDS) if SUMMARY_CACHE_PATH
+    else MemoryCacheBackend(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL_SECONDS)
+)
@@ -1,11 +1,22 @@
 from sqlalchemy.orm import Session
 from budget_planner.models.data_models import User
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from budget_planner.models.database import session_runner
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+
+# bcrypt cost factor. Hashes below it are transparently re-hashed on the next successful login.
+BCRYPT_ROUNDS = int(os.environ.get("BUDGET_PLANNER_BCRYPT_ROUNDS", "12"))
 
 # Initialize CryptContext for password hashing
 # Schemes chosen: bcrypt. Others like argon2 could also be used.
 # Deprecated="auto" will handle upgrading password hashes if schemes change in the future.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     """Hashes a password using bcrypt."""
@@ -15,10 +26,68 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
 
+# --- Bounded worker pool for bcrypt ---
+
+class PasswordHashingBusyError(RuntimeError):
+    """Raised when the password worker pool and its queue are full; callers should retry later (HTTP 429)."""
+
+class PasswordWorkerPool:
+    """
+    Runs bcrypt work on a small dedicated thread pool (bcrypt releases the GIL) so logins cannot
+    starve the request threadpool. At most max_workers + max_queue jobs are admitted at once;
+    beyond that submissions fail fast with PasswordHashingBusyError.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._admitted = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(self, fn, *args):
+        if not self._admitted.acquire(blocking=False):
+            raise PasswordHashingBusyError("Password hashing capacity exhausted")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._admitted.release()
+
+password_pool = PasswordWorkerPool(
+    max_workers=int(os.environ.get("BUDGET_PLANNER_PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.environ.get("BUDGET_PLANNER_PASSWORD_QUEUE", "32")),
+)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded worker pool. Raises PasswordHashingBusyError when saturated."""
+    return await password_pool.run(hash_password, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifies on the bounded worker pool. Returns (verified, new_hash); new_hash is set when the stored
+    hash uses outdated settings (e.g. fewer rounds) and should be replaced.
+    """
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def get_user_by_username(db: Session, username: str) -> User | None:
     """Retrieves a user by their username."""
     return db.query(User).filter(User.username == username).first()
 
+def get_data_version(db: Session, user_id: int) -> int | None:
+    """Returns the user's data version (see bump_data_version), or None if the user does not exist."""
+    return db.query(User.data_version).filter(User.id == user_id).scalar()
+
+def bump_data_version(db: Session, user_id: int | None) -> int | None:
+    """
+    Increments the data version of one user (or everyone, when user_id is None) inside the caller's
+    DB transaction; the caller commits. Called by every write that can change the user's data.
+    Returns the user's new version (None when bumping everyone).
+    """
+    statement = update(User).values(data_version=User.data_version + 1)
+    if user_id is None:
+        db.execute(statement)
+        return None
+    return db.execute(statement.where(User.id == user_id).returning(User.data_version)).scalar()
+
 def create_user(db: Session, username: str, password: str) -> User | None:
     """
     Creates a new user.
@@ -44,6 +113,70 @@ def authenticate_user(db: Session, username: str, password: str) -> User | None:
     user = get_user_by_username(db, username)
     if not user:
         return None # User not found
-    if not verify_password(password, user.password_hash):
+    verified, new_hash = pwd_context.verify_and_update(password, user.password_hash)
+    if not verified:
+        return None # Incorrect password
+    if new_hash:
+        _store_rehashed_password(db, user, new_hash)
+    return user
+
+def _store_rehashed_password(db: Session, user: User, new_hash: str) -> None:
+    """Replaces an outdated password hash after a successful login."""
+    user.password_hash = new_hash
+    db.commit()
+    db.refresh(user)
+
+async def create_user_async(db, username: str, password: str) -> User | None:
+    """
+    create_user for async handlers ('db' is a Session, an AsyncSession or a session runner): bcrypt
+    runs on the bounded worker pool and the short DB statements through the runner.
+    Raises PasswordHashingBusyError when saturated.
+    """
+    runner = session_runner(db)
+    if await runner.run(get_user_by_username, username): # The runner releases the connection before bcrypt runs
+        return None
+    hashed_pass = await hash_password_async(password)
+
+    def _insert(session: Session) -> User | None:
+        db_user = User(username=username, password_hash=hashed_pass)
+        session.add(db_user)
+        try:
+            session.commit()
+        except IntegrityError: # Registered concurrently while the password was hashed
+            session.rollback()
+            return None
+        session.refresh(db_user)
+        return db_user
+    return await runner.run(_insert)
+
+async def authenticate_user_async(db, username: str, password: str) -> User | None:
+    """
+    authenticate_user for async handlers, with transparent rehash-on-login.
+    Raises PasswordHashingBusyError when the password worker pool is saturated.
+    """
+    runner = session_runner(db)
+    user = await runner.run(_get_user_detached, username)
+    if not user:
+        return None # User not found
+    verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+    if not verified:
         return None # Incorrect password
+    if new_hash:
+        user = await runner.run(_reattach_with_new_hash, user, new_hash)
+    return user
+
+def _reattach_with_new_hash(db: Session, user: User, new_hash: str) -> User:
+    attached_user = db.merge(user, load=False)
+    _store_rehashed_password(db, attached_user, new_hash)
+    return attached_user
+
+def _get_user_detached(db: Session, username: str) -> User | None:
+    """
+    Loads a user, then detaches it and ends the transaction so the pooled connection is not
+    held while the request waits for bcrypt (otherwise a login storm exhausts the pool).
+    """
+    user = get_user_by_username(db, username)
+    if user:
+        db.expunge(user)
+    db.rollback()
     return user
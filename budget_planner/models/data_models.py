@@ -1,26 +1,42 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SAEnum
+from sqlalchemy import (Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SAEnum, case, inspect, text,
+                        insert, select, exists, extract, func)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from .database import Base # Assuming database.py is in the same directory (models)
 import datetime
 import enum
 
+# Money is stored as integers in minor units (cents) with an ISO 4217 currency code;
+# see budget_planner.core.money for the conversions. All supported currencies use two decimals.
+MINOR_UNITS = 100
+DEFAULT_CURRENCY = "USD"
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
+    # Bumped in the same DB transaction as every write that can change the user's data
+    # (analytics ETags, ledger store freshness, change_seq of the written rows for delta sync)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     categories = relationship("Category", back_populates="user")
     transactions = relationship("Transaction", back_populates="user")
     goals = relationship("Goal", back_populates="user")
 
+# Categories, transactions and goals carry change_seq: the owner's data_version set by the write that last
+# changed the row (deletes leave a Tombstone with theirs), so sync can select what changed since a version.
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_user_change_seq", "user_id", "change_seq"), # Delta sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="categories")
     transactions = relationship("Transaction", back_populates="category")
@@ -31,31 +47,284 @@ class TransactionType(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Date predicates are half-open ranges so these can be used for seeks
+        Index("ix_transactions_user_type_date", "user_id", "type", "date"), # Monthly summaries
+        Index("ix_transactions_user_date", "user_id", "date"), # Listing ordered by date
+        Index("ix_transactions_user_category_date", "user_id", "category_id", "date"), # Listing by category
+        Index("ix_transactions_user_amount", "user_id", "amount_minor"), # Amount bounds and amount sorts
+        Index("ix_transactions_user_change_seq", "user_id", "change_seq"), # Delta sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount_minor = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     type = Column(SAEnum(TransactionType), nullable=False)
     date = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     description = Column(String, nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     category = relationship("Category", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
 
+    @property
+    def amount(self) -> float:
+        """The amount in major units (for responses); stored exactly as amount_minor."""
+        return self.amount_minor / MINOR_UNITS
+
+class MonthlyRollup(Base):
+    """Per-user monthly totals, maintained incrementally by the transaction write functions."""
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    type = Column(SAEnum(TransactionType), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total_amount_minor = Column(Integer, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    category = relationship("Category")
+
+class RevokedToken(Base):
+    """Access tokens revoked before they expire (e.g. on logout). Rows can be purged after expires_at."""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+class Tombstone(Base):
+    """A deleted category, transaction or goal, kept so delta sync can tell clients to drop it."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False) # "category", "transaction" or "goal"
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False) # data_version set by the delete
+    deleted_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+class IdempotencyKey(Base):
+    """
+    A client-chosen Idempotency-Key and the response of the request that first used it, so a retried
+    request is answered from this copy instead of being applied again. Rows can be purged after expires_at.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ux_idempotency_keys_user_key", "user_id", "key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False) # SHA-256 of the request the key was first used for
+    status_code = Column(Integer, nullable=True) # Null (with response_body) while that request is running
+    claim_token = Column(String(32), nullable=True) # Held by the running request that claimed the key, if any
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_change_seq", "user_id", "change_seq"), # Delta sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, nullable=False, default=0.0)
+    target_amount_minor = Column(Integer, nullable=False)
+    current_amount_minor = Column(Integer, nullable=False, default=0)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     target_date = Column(DateTime, nullable=True)
     creation_date = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="goals")
 
+    @hybrid_property
+    def target_amount(self) -> float:
+        return self.target_amount_minor / MINOR_UNITS
+
+    @target_amount.expression
+    def target_amount(cls):
+        return cls.target_amount_minor / float(MINOR_UNITS) # Same IEEE division as above
+
+    @hybrid_property
+    def current_amount(self) -> float:
+        return self.current_amount_minor / MINOR_UNITS
+
+    @current_amount.expression
+    def current_amount(cls):
+        return cls.current_amount_minor / float(MINOR_UNITS)
+
+    @hybrid_property
+    def progress_percentage(self) -> float:
+        """Percent of the target saved (0 to 100, to 2 decimals, halves rounded up), from the exact cent amounts."""
+        if self.target_amount_minor <= 0:
+            return 0.0
+        # Hundredths of a percent in integer arithmetic, so SQL (below) gives exactly the same result. The amount is
+        # clamped at 0 first: // floors in Python but SQLite's integer division truncates, which differ below zero.
+        return min((max(self.current_amount_minor, 0) * 20000 + self.target_amount_minor) // (2 * self.target_amount_minor),
+                   10000) / 100
+
+    @progress_percentage.expression
+    def progress_percentage(cls):
+        # The same computation in SQL, so goal listings select it as a column
+        current = func.max(cls.current_amount_minor, 0) # SQLite's scalar max()
+        hundredths = (current * 20000 + cls.target_amount_minor) // (2 * cls.target_amount_minor)
+        return case((cls.target_amount_minor <= 0, 0.0), (hundredths >= 10000, 100.0), else_=hundredths / 100.0)
+
+class GoalContribution(Base):
+    """
+    One contribution to a goal. The goal's current_amount_minor is the running total, updated in place by the
+    same DB transaction that records the contribution (see goal_management.update_goal_progress).
+    """
+    __tablename__ = "goal_contributions"
+    __table_args__ = (
+        Index("ix_goal_contributions_goal", "goal_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    goal_id = Column(Integer, ForeignKey("goals.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    amount_minor = Column(Integer, nullable=False)
+    contributed_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+# Float money columns replaced by integer minor units: {table: [(old float column, new integer column)]}
+_MONEY_COLUMN_MIGRATIONS = {
+    "transactions": [("amount", "amount_minor")],
+    "goals": [("target_amount", "target_amount_minor"), ("current_amount", "current_amount_minor")],
+    "monthly_rollups": [("total_amount", "total_amount_minor")],
+}
+_CURRENCY_TABLES = ("transactions", "goals")
+
+def migrate_money_columns(engine_to_use) -> list[str]:
+    """
+    One-shot, idempotent migration of databases created before amounts were stored as integer
+    minor units: adds each integer column, fills it with ROUND(float * 100), drops the float column
+    and adds the currency columns. Runs in a single transaction. Returns the steps applied.
+    """
+    applied = []
+    with engine_to_use.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table, renames in _MONEY_COLUMN_MIGRATIONS.items():
+            if table not in existing_tables:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table)}
+            for old, new in renames:
+                if old in columns and new not in columns:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0"))
+                    connection.execute(text(f"UPDATE {table} SET {new} = CAST(ROUND({old} * {MINOR_UNITS}) AS INTEGER)"))
+                    connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+                    applied.append(f"{table}.{old} -> {table}.{new}")
+            if table in _CURRENCY_TABLES and "currency" not in columns:
+                connection.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN currency VARCHAR(3) NOT NULL DEFAULT '{DEFAULT_CURRENCY}'"))
+                applied.append(f"{table}.currency")
+    return applied
+
+# Columns added to existing tables since they were first created: {table: [(column, DDL type)]}
+_ADDED_COLUMNS = {
+    "users": [("data_version", "INTEGER NOT NULL DEFAULT 0")],
+    "categories": [("change_seq", "INTEGER NOT NULL DEFAULT 0")],
+    "transactions": [("change_seq", "INTEGER NOT NULL DEFAULT 0")],
+    "goals": [("change_seq", "INTEGER NOT NULL DEFAULT 0")],
+    "idempotency_keys": [("claim_token", "VARCHAR(32)")],
+}
+
+def migrate_added_columns(engine_to_use) -> list[str]:
+    """Adds any column in _ADDED_COLUMNS missing from an existing table. Idempotent; returns the columns added."""
+    applied = []
+    with engine_to_use.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table, added in _ADDED_COLUMNS.items():
+            if table not in existing_tables:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table)}
+            for column, ddl in added:
+                if column not in columns:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    applied.append(f"{table}.{column}")
+    return applied
+
+# Full-text index over transaction descriptions (SQLite FTS5). External content: the text is stored only in
+# transactions and the triggers keep the index in step with every write, ORM or raw SQL. user_id is indexed
+# as a token column as well, so a search is scoped to one user inside the index rather than after it.
+SEARCH_INDEX_TABLE = "transactions_fts"
+_SEARCH_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5(
+        user_id, description, content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    # Rank by BM25 over the description only (the user_id token matches every row of the user)
+    f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}, rank) VALUES ('rank', 'bm25(0.0, 1.0)')",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {SEARCH_INDEX_TABLE}(rowid, user_id, description) VALUES (new.id, new.user_id, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}, rowid, user_id, description)
+        VALUES ('delete', old.id, old.user_id, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_update AFTER UPDATE OF user_id, description ON transactions BEGIN
+        INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}, rowid, user_id, description)
+        VALUES ('delete', old.id, old.user_id, old.description);
+        INSERT INTO {SEARCH_INDEX_TABLE}(rowid, user_id, description) VALUES (new.id, new.user_id, new.description);
+    END""",
+]
+
+def rebuild_search_index(engine_to_use) -> int:
+    """Re-indexes every transaction description from scratch (backfill or repair). Returns the rows indexed."""
+    with engine_to_use.begin() as connection:
+        connection.execute(text(f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}) VALUES ('rebuild')"))
+        return connection.execute(text("SELECT count(*) FROM transactions")).scalar_one()
+
+def create_search_index(engine_to_use) -> bool:
+    """
+    Creates the search index and its triggers if missing. An index created on a database that already
+    has transactions is backfilled in the same step. Idempotent; returns True if the index was created.
+    """
+    with engine_to_use.begin() as connection:
+        created = SEARCH_INDEX_TABLE not in inspect(connection).get_table_names()
+        for statement in _SEARCH_INDEX_DDL:
+            connection.execute(text(statement))
+    if created:
+        rebuild_search_index(engine_to_use)
+    return created
+
 # Function to create database tables
+def backfill_monthly_rollups(engine_to_use) -> int:
+    """
+    Fills monthly_rollups from the transactions if it is empty, e.g. just created by create_all on a database
+    that predates it (summaries read only the rollup, so they would show zero). One INSERT ... SELECT ...
+    GROUP BY, which inserts nothing once the rollup has any row. Returns the number of rollup rows written.
+    """
+    transactions = Transaction.__table__
+    year_col, month_col = extract('year', transactions.c.date), extract('month', transactions.c.date)
+    totals = (select(transactions.c.user_id, year_col, month_col, transactions.c.type, transactions.c.category_id,
+                     func.sum(transactions.c.amount_minor), func.count(transactions.c.id))
+              .where(~exists(select(MonthlyRollup.__table__.c.user_id)))
+              .group_by(transactions.c.user_id, year_col, month_col, transactions.c.type, transactions.c.category_id))
+    with engine_to_use.begin() as connection:
+        return connection.execute(insert(MonthlyRollup.__table__).from_select(
+            ["user_id", "year", "month", "type", "category_id", "total_amount_minor", "transaction_count"], totals
+        )).rowcount
+
 def create_tables(engine_to_use):
     Base.metadata.create_all(bind=engine_to_use)
+    migrate_money_columns(engine_to_use)
+    migrate_added_columns(engine_to_use)
+    backfill_monthly_rollups(engine_to_use)
+    # create_all skips tables that already exist, so add any indexes declared since they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine_to_use, checkfirst=True)
+    create_search_index(engine_to_use)
@@ -1,13 +1,143 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import functools
+import os
+import anyio
 
-DATABASE_URL = "sqlite:///./budget_app.db"
+# Storage configuration comes from the environment:
+#   BUDGET_PLANNER_DATABASE_URL   SQLAlchemy URL (default: sqlite:///./budget_app.db)
+#   BUDGET_PLANNER_DB_PROFILE     "default" (SQLite defaults) or "production" (WAL + tuned pragmas and pool)
+#   BUDGET_PLANNER_DB_MODE        "sync" (Session on the request threadpool) or "async" (AsyncSession; needs aiosqlite)
+# Production profile knobs (all optional):
+#   BUDGET_PLANNER_SQLITE_BUSY_TIMEOUT_MS, BUDGET_PLANNER_SQLITE_MMAP_SIZE, BUDGET_PLANNER_SQLITE_CACHE_SIZE_KB,
+#   BUDGET_PLANNER_DB_POOL_SIZE (defaults to BUDGET_PLANNER_WORKER_THREADS, itself defaulting to
+#   Starlette's threadpool size of 40, so every request thread can hold a connection without waiting)
+DATABASE_URL = os.environ.get("BUDGET_PLANNER_DATABASE_URL", "sqlite:///./budget_app.db")
+DB_PROFILE = os.environ.get("BUDGET_PLANNER_DB_PROFILE", "default")
+DB_MODE = os.environ.get("BUDGET_PLANNER_DB_MODE", "sync")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}) # check_same_thread for SQLite
+DEFAULT_WORKER_THREADS = 40
+
+def sqlite_pragmas(profile: str) -> dict[str, str | int]:
+    """PRAGMAs applied to every new SQLite connection for the given profile."""
+    if profile != "production":
+        return {}
+    return {
+        "journal_mode": "WAL", # Readers no longer block on the writer, and vice versa
+        "synchronous": "NORMAL", # Safe with WAL; fsync at checkpoints instead of every commit
+        "busy_timeout": int(os.environ.get("BUDGET_PLANNER_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.environ.get("BUDGET_PLANNER_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "cache_size": -int(os.environ.get("BUDGET_PLANNER_SQLITE_CACHE_SIZE_KB", str(64 * 1024))), # Negative = KiB
+        "temp_store": "MEMORY",
+    }
+
+def _engine_kwargs(url: str, profile: str) -> dict:
+    engine_kwargs = {}
+    if url.startswith("sqlite"):
+        engine_kwargs["connect_args"] = {"check_same_thread": False} # check_same_thread for SQLite
+    if profile == "production":
+        worker_threads = int(os.environ.get("BUDGET_PLANNER_WORKER_THREADS", str(DEFAULT_WORKER_THREADS)))
+        engine_kwargs["pool_size"] = int(os.environ.get("BUDGET_PLANNER_DB_POOL_SIZE", str(worker_threads)))
+        engine_kwargs["max_overflow"] = 0
+        engine_kwargs["pool_pre_ping"] = False # Local file; a dead connection is not a realistic failure mode
+    return engine_kwargs
+
+def _install_pragmas(sync_engine, url: str, profile: str) -> None:
+    pragmas = sqlite_pragmas(profile) if url.startswith("sqlite") else {}
+    if pragmas:
+        @event.listens_for(sync_engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+def create_storage_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Creates the engine for 'url' configured according to the storage profile."""
+    new_engine = create_engine(url, **_engine_kwargs(url, profile))
+    _install_pragmas(new_engine, url, profile)
+    return new_engine
+
+def async_database_url(url: str) -> str:
+    """Maps a sync SQLite URL onto the aiosqlite driver (other URLs are returned unchanged)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+def create_async_storage_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """The asyncio counterpart of create_storage_engine (same pool sizing and pragmas). Requires aiosqlite."""
+    from sqlalchemy.ext.asyncio import create_async_engine # Optional: only needed in async mode
+    async_url = async_database_url(url)
+    new_engine = create_async_engine(async_url, **_engine_kwargs(async_url, profile))
+    _install_pragmas(new_engine.sync_engine, async_url, profile)
+    return new_engine
+
+engine = create_storage_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    AsyncSessionLocal = async_sessionmaker(create_async_storage_engine(), autoflush=False)
+
+# --- Running the (sync) core functions from async code ---
+# Core functions take a Session as their first argument. A runner calls them as
+# fn(session, *args, **kwargs) without blocking the event loop, on either database path.
+
+def _call_and_release(session, fn, args, kwargs):
+    """
+    Calls fn(session, ...) then ends the session's transaction so the request does not pin a pooled
+    connection while it is suspended between calls (with hundreds of requests in flight that starves
+    the pool). Loaded objects are detached rather than expired, so results can still be serialized.
+    Uncommitted changes are left alone.
+    """
+    try:
+        return fn(session, *args, **kwargs)
+    finally:
+        _release(session)
+
+def _release(session) -> None:
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        session.expunge_all()
+        session.rollback()
+
+class ThreadSessionRunner:
+    """Runs core functions with a sync Session on the shared worker threadpool (the one Starlette uses)."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(_call_and_release, self.session, fn, args, kwargs))
+
+    async def close(self):
+        await anyio.to_thread.run_sync(self.session.close)
+
+class AsyncSessionRunner:
+    """
+    Runs core functions on an AsyncSession via run_sync: the ORM code runs in a greenlet on the
+    event loop and every statement is awaited on the async driver, so no thread is held per request.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        return await self.session.run_sync(_call_and_release, fn, args, kwargs)
+
+    async def close(self):
+        await self.session.close()
+
+def session_runner(db):
+    """Wraps a Session or AsyncSession in the matching runner (runners are returned as is)."""
+    if isinstance(db, (ThreadSessionRunner, AsyncSessionRunner)):
+        return db
+    if hasattr(db, "run_sync"):
+        return AsyncSessionRunner(db)
+    return ThreadSessionRunner(db)
+
 Base = declarative_base()
 
 def init_db():
@@ -36,6 +36,9 @@ const dashUsername = document.getElementById('dash-username');
 const categoriesTableBody = document.querySelector('#categories-table tbody');
 const transactionsTableBody = document.querySelector('#transactions-table tbody');
 const transactionCategorySelect = document.getElementById('transaction-category');
+const transactionFilterForm = document.getElementById('transaction-filter-form');
+const filterCategorySelect = document.getElementById('filter-category');
+const transactionTotals = document.getElementById('transaction-totals');
 
 function showView(viewToShow) {
     loginView.classList.add('hidden');
@@ -64,15 +67,12 @@ function updateNav() {
     }
 }
 
-async function apiRequest(endpoint, method = 'GET', body = null, token = null) {
+// Sends the request and returns the fetch Response, throwing the API's error detail if it failed
+async function apiResponse(endpoint, method = 'GET', body = null, token = null) {
     const headers = { 'Content-Type': 'application/json' };
     if (token) {
-        headers['Authorization'] = \`Bearer \${token}\`; // Standard token auth
+        headers['Authorization'] = `Bearer ${token}`; // Standard token auth
     }
-    // For placeholder auth, the user_id is part of the URL or handled by Depends in FastAPI
-    // This is a simplification for the dummy token.
-    // If your placeholder auth requires user_id in header, add it here.
-    // if (currentUserId) headers['X-User-ID'] = currentUserId; // Example if header needed
 
     const config = { method, headers };
     if (body) {
@@ -81,19 +81,59 @@ async function apiRequest(endpoint, method = 'GET', body = null, token = null) {
 
     try {
         const response = await fetch(API_BASE_URL + endpoint, config);
+        if (response.status === 401 && token) {
+            // Token expired or revoked: drop it and ask the user to log in again
+            authToken = null;
+            localStorage.removeItem('authToken');
+            updateNav();
+            showView(loginView);
+        }
         if (!response.ok) {
             const errorData = await response.json().catch(() => ({ detail: response.statusText }));
             console.error('API Error:', response.status, errorData);
-            throw new Error(errorData.detail || \`HTTP error! status: \${response.status}\`);
+            throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
         }
-        if (response.status === 204) return null; // No content
-        return await response.json();
+        return response;
     } catch (error) {
         console.error('API request failed:', error);
         throw error;
     }
 }
 
+async function apiRequest(endpoint, method = 'GET', body = null, token = null) {
+    const response = await apiResponse(endpoint, method, body, token);
+    if (response.status === 204) return null; // No content
+    return await response.json();
+}
+
+// --- Delta sync ---
+// Local copies of the user's categories and goals, kept current through GET /sync/: the first call downloads
+// them all, later ones only what changed since the last cursor, page by page. Transactions are not synced:
+// the dashboard lists them through the filtered, paginated /transactions/ listing (loadTransactions).
+const SYNCED_ENTITIES = ['categories', 'goals'];
+const TRANSACTIONS_SHOWN = 100; // Transactions listed on the dashboard (the first page of the filtered listing)
+let syncCache = newSyncCache();
+
+function newSyncCache() {
+    return { cursor: 0, categories: new Map(), goals: new Map() };
+}
+
+async function syncData() {
+    const query = `since=${syncCache.cursor}&` + SYNCED_ENTITIES.map(entity => `entity=${entity}`).join('&');
+    let changes = await apiRequest(`/sync/?${query}`, 'GET', null, authToken);
+    const cache = changes.full ? newSyncCache() : syncCache; // A snapshot replaces the cache once all its pages are in
+    for (;;) {
+        for (const entity of SYNCED_ENTITIES) {
+            changes.deleted[entity].forEach(id => cache[entity].delete(id)); // Deletions first: ids can be reused
+            changes[entity].forEach(row => cache[entity].set(row.id, row));
+        }
+        if (!changes.next_page) break;
+        changes = await apiRequest(`/sync/?${query}&page=${encodeURIComponent(changes.next_page)}`, 'GET', null, authToken);
+    }
+    cache.cursor = changes.cursor; // Only once every page is applied, so a failed sync is redone from the old cursor
+    syncCache = cache;
+}
+
 // --- Auth ---
 if (loginForm) {
     loginForm.addEventListener('submit', async (e) => {
@@ -103,11 +143,7 @@ if (loginForm) {
         const password = document.getElementById('login-password').value;
         try {
             const data = await apiRequest('/auth/login', 'POST', { username, password });
-            authToken = data.access_token;
-            // The dummy token contains user_id, extract it IF NEEDED for placeholder.
-            // currentUserId = authToken.split('_').pop(); // Example: "dummytoken_for_user_1" -> "1"
-            // For now, placeholder user is hardcoded in FastAPI dependencies.
-            // If your API returns user info on login, use that.
+            authToken = data.access_token; // Signed bearer token, sent on every API request
             localStorage.setItem('authToken', authToken);
             // localStorage.setItem('currentUserId', currentUserId);
             updateNav();
@@ -140,8 +176,12 @@ navRegister.addEventListener('click', (e) => { e.preventDefault(); showView(regi
 navDashboard.addEventListener('click', (e) => { e.preventDefault(); if(authToken) showView(dashboardView); loadDashboardData(); });
 navLogout.addEventListener('click', (e) => {
     e.preventDefault();
+    if (authToken) {
+        apiRequest('/auth/logout', 'POST', null, authToken).catch(() => {}); // Revoke server-side
+    }
     authToken = null;
     currentUserId = null;
+    syncCache = newSyncCache();
     localStorage.removeItem('authToken');
     localStorage.removeItem('currentUserId');
     updateNav();
@@ -153,33 +193,42 @@ navLogout.addEventListener('click', (e) => {
 async function loadCategories() {
     if (!authToken) return;
     try {
-        const categories = await apiRequest('/categories/', 'GET', null, authToken);
-        categoriesTableBody.innerHTML = ''; // Clear existing
-        transactionCategorySelect.innerHTML = '<option value="">Select Category</option>'; // Clear and add default
-        categories.forEach(cat => {
-            const row = categoriesTableBody.insertRow();
-            row.insertCell().textContent = cat.name;
-            const actionsCell = row.insertCell();
-            const editBtn = document.createElement('button');
-            editBtn.textContent = 'Edit';
-            editBtn.onclick = () => setupEditCategory(cat);
-            const deleteBtn = document.createElement('button');
-            deleteBtn.textContent = 'Delete';
-            deleteBtn.style.backgroundColor = '#d9534f'; // Red color for delete
-            deleteBtn.onclick = () => deleteCategory(cat.id);
-            actionsCell.appendChild(editBtn);
-            actionsCell.appendChild(deleteBtn);
-
-            const option = document.createElement('option');
-            option.value = cat.id;
-            option.textContent = cat.name;
-            transactionCategorySelect.appendChild(option);
-        });
+        await syncData();
+        renderCategories();
     } catch (error) {
-        categoryError.textContent = \`Error loading categories: \${error.message}\`;
+        categoryError.textContent = `Error loading categories: ${error.message}`;
     }
 }
 
+function renderCategories() {
+    const categories = [...syncCache.categories.values()].sort((a, b) => a.name.localeCompare(b.name));
+    categoriesTableBody.innerHTML = ''; // Clear existing
+    transactionCategorySelect.innerHTML = '<option value="">Select Category</option>'; // Clear and add default
+    const filteredCategory = filterCategorySelect.value;
+    filterCategorySelect.innerHTML = '<option value="">Any</option>';
+    categories.forEach(cat => {
+        const row = categoriesTableBody.insertRow();
+        row.insertCell().textContent = cat.name;
+        const actionsCell = row.insertCell();
+        const editBtn = document.createElement('button');
+        editBtn.textContent = 'Edit';
+        editBtn.onclick = () => setupEditCategory(cat);
+        const deleteBtn = document.createElement('button');
+        deleteBtn.textContent = 'Delete';
+        deleteBtn.style.backgroundColor = '#d9534f'; // Red color for delete
+        deleteBtn.onclick = () => deleteCategory(cat.id);
+        actionsCell.appendChild(editBtn);
+        actionsCell.appendChild(deleteBtn);
+
+        const option = document.createElement('option');
+        option.value = cat.id;
+        option.textContent = cat.name;
+        transactionCategorySelect.appendChild(option);
+        filterCategorySelect.appendChild(option.cloneNode(true));
+    });
+    filterCategorySelect.value = syncCache.categories.has(Number(filteredCategory)) ? filteredCategory : '';
+}
+
 if (categoryForm) {
     categoryForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -187,7 +236,7 @@ if (categoryForm) {
         const name = document.getElementById('category-name').value;
         const id = document.getElementById('category-id').value;
         const method = id ? 'PUT' : 'POST';
-        const endpoint = id ? \`/categories/\${id}\` : '/categories/';
+        const endpoint = id ? `/categories/${id}` : '/categories/';
         try {
             await apiRequest(endpoint, method, { name }, authToken);
             resetCategoryForm();
@@ -217,42 +266,89 @@ function resetCategoryForm() {
 async function deleteCategory(id) {
     if (!authToken || !confirm('Are you sure you want to delete this category?')) return;
     try {
-        await apiRequest(\`/categories/\${id}\`, 'DELETE', null, authToken);
+        await apiRequest(`/categories/${id}`, 'DELETE', null, authToken);
         loadCategories(); // Refresh list
     } catch (error) {
-        categoryError.textContent = \`Error deleting category: \${error.message}\`;
+        categoryError.textContent = `Error deleting category: ${error.message}`;
     }
 }
 
 // --- Transactions ---
+// The listing is filtered and sorted by the server; totals=true adds the count and income/expense totals of
+// every matching transaction (not just the page shown) as X-Total-* headers.
+function transactionQuery() {
+    const params = new URLSearchParams({ limit: TRANSACTIONS_SHOWN, sort: document.getElementById('filter-sort').value, totals: 'true' });
+    const startDate = document.getElementById('filter-start-date').value;
+    const endDate = document.getElementById('filter-end-date').value;
+    if (startDate) params.set('start_date', `${startDate}T00:00:00`);
+    if (endDate) { // The "To" day is included; end_date is exclusive
+        const dayAfter = new Date(endDate);
+        dayAfter.setUTCDate(dayAfter.getUTCDate() + 1);
+        params.set('end_date', `${dayAfter.toISOString().slice(0, 10)}T00:00:00`);
+    }
+    const type = document.getElementById('filter-type').value;
+    if (type) params.set('type', type);
+    if (filterCategorySelect.value) params.set('category_id', filterCategorySelect.value);
+    const minAmount = document.getElementById('filter-min-amount').value;
+    const maxAmount = document.getElementById('filter-max-amount').value;
+    if (minAmount) params.set('min_amount', minAmount);
+    if (maxAmount) params.set('max_amount', maxAmount);
+    return params.toString();
+}
+
 async function loadTransactions() {
     if (!authToken) return;
     try {
-        const transactions = await apiRequest('/transactions/', 'GET', null, authToken);
-        transactionsTableBody.innerHTML = ''; // Clear existing
-        transactions.forEach(tx => {
-            const row = transactionsTableBody.insertRow();
-            row.insertCell().textContent = new Date(tx.date).toLocaleString();
-            row.insertCell().textContent = tx.category.name; // Assuming category is nested
-            row.insertCell().textContent = tx.type;
-            row.insertCell().textContent = tx.amount.toFixed(2);
-            row.insertCell().textContent = tx.description || '';
-            const actionsCell = row.insertCell();
-            const editBtn = document.createElement('button');
-            editBtn.textContent = 'Edit';
-            editBtn.onclick = () => setupEditTransaction(tx);
-            const deleteBtn = document.createElement('button');
-            deleteBtn.textContent = 'Delete';
-            deleteBtn.style.backgroundColor = '#d9534f';
-            deleteBtn.onclick = () => deleteTransaction(tx.id);
-            actionsCell.appendChild(editBtn);
-            actionsCell.appendChild(deleteBtn);
-        });
+        const response = await apiResponse(`/transactions/?${transactionQuery()}`, 'GET', null, authToken);
+        renderTransactions(await response.json());
+        renderTransactionTotals(response.headers);
     } catch (error) {
-        transactionError.textContent = \`Error loading transactions: \${error.message}\`;
+        transactionError.textContent = `Error loading transactions: ${error.message}`;
     }
 }
 
+function renderTransactionTotals(headers) {
+    const count = Number(headers.get('X-Total-Count'));
+    const shown = count > TRANSACTIONS_SHOWN ? ` (showing ${TRANSACTIONS_SHOWN})` : '';
+    transactionTotals.textContent = `${count} transaction${count === 1 ? '' : 's'}${shown}. ` +
+        `Income: ${headers.get('X-Total-Income')}, Expenses: ${headers.get('X-Total-Expenses')}`;
+}
+
+function renderTransactions(transactions) {
+    transactionsTableBody.innerHTML = ''; // Clear existing
+    transactions.forEach(tx => {
+        const row = transactionsTableBody.insertRow();
+        row.insertCell().textContent = new Date(tx.date).toLocaleString();
+        // A renamed category is synced on its own, so take the name from the category list
+        row.insertCell().textContent = (syncCache.categories.get(tx.category_id) || tx.category).name;
+        row.insertCell().textContent = tx.type;
+        row.insertCell().textContent = tx.amount.toFixed(2);
+        row.insertCell().textContent = tx.description || '';
+        const actionsCell = row.insertCell();
+        const editBtn = document.createElement('button');
+        editBtn.textContent = 'Edit';
+        editBtn.onclick = () => setupEditTransaction(tx);
+        const deleteBtn = document.createElement('button');
+        deleteBtn.textContent = 'Delete';
+        deleteBtn.style.backgroundColor = '#d9534f';
+        deleteBtn.onclick = () => deleteTransaction(tx.id);
+        actionsCell.appendChild(editBtn);
+        actionsCell.appendChild(deleteBtn);
+    });
+}
+
+if (transactionFilterForm) {
+    transactionFilterForm.addEventListener('submit', (e) => {
+        e.preventDefault();
+        transactionError.textContent = '';
+        loadTransactions();
+    });
+    document.getElementById('filter-clear-btn').addEventListener('click', () => {
+        transactionFilterForm.reset();
+        loadTransactions();
+    });
+}
+
 if (transactionForm) {
     transactionForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -267,7 +363,7 @@ if (transactionForm) {
         };
 
         const method = id ? 'PUT' : 'POST';
-        const endpoint = id ? \`/transactions/\${id}\` : '/transactions/';
+        const endpoint = id ? `/transactions/${id}` : '/transactions/';
         try {
             await apiRequest(endpoint, method, transactionData, authToken);
             resetTransactionForm();
@@ -305,10 +401,10 @@ function resetTransactionForm() {
 async function deleteTransaction(id) {
     if (!authToken || !confirm('Are you sure you want to delete this transaction?')) return;
     try {
-        await apiRequest(\`/transactions/\${id}\`, 'DELETE', null, authToken);
+        await apiRequest(`/transactions/${id}`, 'DELETE', null, authToken);
         loadTransactions(); // Refresh list
     } catch (error) {
-        transactionError.textContent = \`Error deleting transaction: \${error.message}\`;
+        transactionError.textContent = `Error deleting transaction: ${error.message}`;
     }
 }
 
@@ -320,9 +416,21 @@ function loadDashboardData() {
         // Try to get actual username from a /users/me endpoint if it exists
         // For now, just indicate logged in
         dashUsername.textContent = "User"; // Placeholder
-        loadCategories(); // This will also populate transaction category dropdown
-        loadTransactions();
+        refreshDashboard();
+    }
+}
+
+async function refreshDashboard() {
+    // One sync for the whole dashboard instead of one full listing per table
+    try {
+        await syncData();
+    } catch (error) {
+        categoryError.textContent = `Error loading data: ${error.message}`;
+        return;
     }
+    renderCategories(); // This will also populate transaction category dropdown
+    renderGoals();
+    await loadTransactions();
 }
 
 // Check auth status on page load
@@ -351,82 +459,89 @@ const goalsTableBody = document.querySelector('#goals-table tbody');
 async function loadGoals() {
     if (!authToken || !goalsTableBody) return; // Check if element exists
     try {
-        const goals = await apiRequest('/goals/', 'GET', null, authToken);
-        goalsTableBody.innerHTML = ''; // Clear existing
-        goals.forEach(goal => {
-            const row = goalsTableBody.insertRow();
-            row.insertCell().textContent = goal.name;
-            row.insertCell().textContent = goal.target_amount.toFixed(2);
-            row.insertCell().textContent = goal.current_amount.toFixed(2);
-
-            const progressCell = row.insertCell();
-            const progressBar = document.createElement('div');
-            progressBar.style.width = '100px';
-            progressBar.style.height = '20px';
-            progressBar.style.border = '1px solid #ccc';
-            progressBar.style.backgroundColor = '#e9ecef';
-            progressBar.style.position = 'relative'; // For text overlay
-            const progressFill = document.createElement('div');
-            progressFill.style.width = `${goal.progress_percentage}%`;
-            progressFill.style.height = '100%';
-            progressFill.style.backgroundColor = '#5cb85c';
-
-            const progressText = document.createElement('span'); // For text
-            progressText.textContent = `${goal.progress_percentage}%`;
-            progressText.style.position = 'absolute';
-            progressText.style.left = '50%';
-            progressText.style.top = '50%';
-            progressText.style.transform = 'translate(-50%, -50%)';
-            progressText.style.fontSize = '12px';
-            progressText.style.color = goal.progress_percentage > 40 ? 'white' : 'black';
-
-
-            progressBar.appendChild(progressFill);
-            progressBar.appendChild(progressText);
-            progressCell.appendChild(progressBar);
-
-            row.insertCell().textContent = goal.target_date ? new Date(goal.target_date).toLocaleDateString() : 'N/A';
-
-            const actionsCell = row.insertCell();
-            const editBtn = document.createElement('button');
-            editBtn.textContent = 'Edit';
-            editBtn.onclick = () => setupEditGoal(goal);
-            actionsCell.appendChild(editBtn);
-
-            const deleteBtn = document.createElement('button');
-            deleteBtn.textContent = 'Delete';
-            deleteBtn.style.backgroundColor = '#d9534f';
-            deleteBtn.onclick = () => deleteGoal(goal.id);
-            actionsCell.appendChild(deleteBtn);
-
-            const contributeInput = document.createElement('input');
-            contributeInput.type = 'number';
-            contributeInput.placeholder = 'Amount';
-            contributeInput.style.width = '70px';
-            contributeInput.step = '0.01';
-            contributeInput.className = 'contribute-input'; // For styling/selection
-            actionsCell.appendChild(contributeInput);
-
-            const contributeBtn = document.createElement('button');
-            contributeBtn.textContent = 'Save';
-            contributeBtn.className = 'contribute-btn';
-            contributeBtn.onclick = () => {
-                const amount = parseFloat(contributeInput.value);
-                if (isNaN(amount)) {
-                    if(goalError) goalError.textContent = 'Invalid amount for contribution.';
-                    return;
-                }
-                contributeToGoal(goal.id, amount);
-                contributeInput.value = ''; // Clear input after attempt
-            };
-            actionsCell.appendChild(contributeBtn);
-        });
+        await syncData();
+        renderGoals();
     } catch (error) {
         if(goalError) goalError.textContent = `Error loading goals: ${error.message}`;
         console.error("Error loading goals:", error);
     }
 }
 
+function renderGoals() {
+    if (!goalsTableBody) return;
+    // Newest first, like GET /goals/
+    const goals = [...syncCache.goals.values()].sort((a, b) => (b.creation_date > a.creation_date) - (b.creation_date < a.creation_date));
+    goalsTableBody.innerHTML = ''; // Clear existing
+    goals.forEach(goal => {
+        const row = goalsTableBody.insertRow();
+        row.insertCell().textContent = goal.name;
+        row.insertCell().textContent = goal.target_amount.toFixed(2);
+        row.insertCell().textContent = goal.current_amount.toFixed(2);
+
+        const progressCell = row.insertCell();
+        const progressBar = document.createElement('div');
+        progressBar.style.width = '100px';
+        progressBar.style.height = '20px';
+        progressBar.style.border = '1px solid #ccc';
+        progressBar.style.backgroundColor = '#e9ecef';
+        progressBar.style.position = 'relative'; // For text overlay
+        const progressFill = document.createElement('div');
+        progressFill.style.width = `${goal.progress_percentage}%`;
+        progressFill.style.height = '100%';
+        progressFill.style.backgroundColor = '#5cb85c';
+
+        const progressText = document.createElement('span'); // For text
+        progressText.textContent = `${goal.progress_percentage}%`;
+        progressText.style.position = 'absolute';
+        progressText.style.left = '50%';
+        progressText.style.top = '50%';
+        progressText.style.transform = 'translate(-50%, -50%)';
+        progressText.style.fontSize = '12px';
+        progressText.style.color = goal.progress_percentage > 40 ? 'white' : 'black';
+
+
+        progressBar.appendChild(progressFill);
+        progressBar.appendChild(progressText);
+        progressCell.appendChild(progressBar);
+
+        row.insertCell().textContent = goal.target_date ? new Date(goal.target_date).toLocaleDateString() : 'N/A';
+
+        const actionsCell = row.insertCell();
+        const editBtn = document.createElement('button');
+        editBtn.textContent = 'Edit';
+        editBtn.onclick = () => setupEditGoal(goal);
+        actionsCell.appendChild(editBtn);
+
+        const deleteBtn = document.createElement('button');
+        deleteBtn.textContent = 'Delete';
+        deleteBtn.style.backgroundColor = '#d9534f';
+        deleteBtn.onclick = () => deleteGoal(goal.id);
+        actionsCell.appendChild(deleteBtn);
+
+        const contributeInput = document.createElement('input');
+        contributeInput.type = 'number';
+        contributeInput.placeholder = 'Amount';
+        contributeInput.style.width = '70px';
+        contributeInput.step = '0.01';
+        contributeInput.className = 'contribute-input'; // For styling/selection
+        actionsCell.appendChild(contributeInput);
+
+        const contributeBtn = document.createElement('button');
+        contributeBtn.textContent = 'Save';
+        contributeBtn.className = 'contribute-btn';
+        contributeBtn.onclick = () => {
+            const amount = parseFloat(contributeInput.value);
+            if (isNaN(amount)) {
+                if(goalError) goalError.textContent = 'Invalid amount for contribution.';
+                return;
+            }
+            contributeToGoal(goal.id, amount);
+            contributeInput.value = ''; // Clear input after attempt
+        };
+        actionsCell.appendChild(contributeBtn);
+    });
+}
+
 if (goalForm) {
     goalForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -512,30 +627,3 @@ async function contributeToGoal(id, amount) {
         if(goalError) goalError.textContent = `Error contributing to goal: ${error.message}`;
     }
 }
-
-// Modify loadDashboardData to include loading goals
-// This requires loadDashboardData to be defined before this modification.
-// Ensure this script block is appended at the very end of main.js or structure carefully.
-// A safer way is to redefine loadDashboardData if we know its full previous content.
-// For now, assuming it's defined and this append approach works.
-// This is a common pattern: store old function, redefine, call old one inside new one.
-if (typeof loadDashboardData === 'function') {
-    const original_loadDashboardData = loadDashboardData;
-    loadDashboardData = function() {
-        original_loadDashboardData();
-        if (authToken) {
-            loadGoals();
-        }
-    };
-} else {
-    // If loadDashboardData was not defined, define it now (less ideal)
-    console.warn("loadDashboardData was not previously defined. Defining now with goals.")
-    loadDashboardData = function() {
-        if (authToken) {
-            dashUsername.textContent = "User"; // Placeholder
-            loadCategories();
-            loadTransactions();
-            loadGoals(); // Add goals here
-        }
-    }
-}
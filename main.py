@@ -1,9 +1,55 @@
-from budget_planner.models.database import engine, init_db
-from budget_planner.models.data_models import create_tables
+import argparse
+from budget_planner.models.database import engine, SessionLocal, init_db
+from budget_planner.models.data_models import create_tables, migrate_money_columns, rebuild_search_index
+from budget_planner.core import rollup_management
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Initialize and maintain the budget planner database.")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="Recompute the monthly_rollups table from raw transactions.")
+    parser.add_argument("--verify-rollups", action="store_true",
+                        help="Compare monthly_rollups with raw transactions and report any drift.")
+    parser.add_argument("--rebuild-search-index", action="store_true",
+                        help="Re-index every transaction description for full-text search.")
+    parser.add_argument("--user-id", type=int, default=None,
+                        help="Limit rollup rebuild/verify to a single user.")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     print("Initializing database and creating tables...")
     # init_db() # init_db in the template doesn't create tables
+    migrated = migrate_money_columns(engine) # Float amounts -> integer cents (no-op once applied)
     create_tables(engine) # Explicitly create tables
     print("Database initialized and tables created (if they didn't exist).")
-    print("Run this script again to ensure it doesn't crash, but it won't recreate tables.")
+    if migrated:
+        print(f"Migrated money columns to integer cents: {', '.join(migrated)}")
+        if not args.rebuild_rollups:
+            # Rollup totals were rounded from float sums; recompute them exactly from the migrated rows
+            db = SessionLocal()
+            try:
+                rows = rollup_management.rebuild_monthly_rollups(db)
+                print(f"Rebuilt monthly rollups after migration: {rows} rows written.")
+            finally:
+                db.close()
+
+    if args.rebuild_search_index:
+        print(f"Rebuilt the search index: {rebuild_search_index(engine)} transactions indexed.")
+
+    if args.rebuild_rollups or args.verify_rollups:
+        db = SessionLocal()
+        try:
+            if args.rebuild_rollups:
+                rows = rollup_management.rebuild_monthly_rollups(db, user_id=args.user_id)
+                print(f"Rebuilt monthly rollups: {rows} rows written.")
+            if args.verify_rollups:
+                drift = rollup_management.verify_monthly_rollups(db, user_id=args.user_id)
+                for entry in drift:
+                    print(f"Drift: {entry}")
+                print(f"Verified monthly rollups: {len(drift)} drifted entries.")
+                if drift:
+                    raise SystemExit(1)
+        finally:
+            db.close()
+    else:
+        print("Run this script again to ensure it doesn't crash, but it won't recreate tables.")
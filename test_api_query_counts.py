@@ -0,0 +1,373 @@
+import asyncio
+import json
+import os
+import tempfile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from budget_planner.api.main import app
+from budget_planner.api import dependencies
+from budget_planner.core import idempotency_management
+from budget_planner.models.data_models import create_tables
+from budget_planner.models.database import AsyncSessionRunner, create_async_storage_engine
+from budget_planner.core.trend_analysis import summary_cache
+from budget_planner.core.ledger_store import ledger_store
+from budget_planner.core.suggestion_index import suggestion_store
+
+# Maximum SQL statements each endpoint may issue. A per-row lazy load (N+1) blows through these.
+# Authentication is a signed-token check, so requests issue no users query.
+# Transaction writes include the bump of the user's data version (analytics ETags).
+QUERY_BUDGETS = {
+    "GET /transactions/": 1,
+    "GET /transactions/ (filtered, totals)": 2, # Page plus one aggregate for the X-Total-* headers
+    "GET /transactions/ (ledger store)": 1, # Data version lookup only once the ledger is loaded
+    "GET /transactions/{id}": 1,
+    "GET /transactions/search": 1, # Index lookup joined to the rows and their categories
+    "GET /transactions/suggest": 1, # Data version lookup only once the index is loaded
+    "GET /transactions/export": 1, # One keyset query per EXPORT_BATCH_SIZE rows
+    "POST /transactions/": 5,
+    "POST /transactions/ (Idempotency-Key)": 8, # Plus the key lookup, the key insert (committed with the write) and the periodic purge
+    "POST /transactions/ (replayed)": 1, # One unique index lookup
+    "PUT /transactions/{id}": 8,
+    "DELETE /transactions/{id}": 6, # Includes the tombstone for delta sync
+    "GET /categories/": 1,
+    "GET /goals/": 1,
+    "POST /goals/{id}/contribute": 3, # Data version, UPDATE ... RETURNING the goal, the ledger row
+    "POST /goals/contribute": 3, # The same three statements for any number of contributions
+    "GET /analytics/monthly": 3,
+    "GET /analytics/monthly (If-None-Match)": 1, # Data version lookup only, no aggregation
+    "GET /analytics/trend": 3,
+    "GET /sync/ (delta)": 5, # Data version, then one indexed range per table and the tombstones
+    "GET /sync/ (next page)": 3, # The cursor is in the page token; one range per table, no tombstones
+}
+
+class StatementCounter:
+    """Counts SQL statements sent to the database while active."""
+
+    def __init__(self, engine_to_watch):
+        self.engine = engine_to_watch
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+def assert_within_budget(client, test_engine, endpoint: str, method: str, url: str, **kwargs):
+    with StatementCounter(test_engine) as counter:
+        response = client.request(method, url, **kwargs)
+    assert response.status_code < 400, f"{endpoint} failed: {response.status_code} {response.text}"
+    print(f"{endpoint}: {counter.count} statements (budget {QUERY_BUDGETS[endpoint]})")
+    assert counter.count <= QUERY_BUDGETS[endpoint], \
+        f"{endpoint} issued {counter.count} SQL statements, budget is {QUERY_BUDGETS[endpoint]}"
+    return response
+
+def run_api_query_count_tests():
+    print("Running API SQL statement budget tests...")
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="budget_api_test_")
+    os.close(fd)
+    test_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    create_tables(test_engine)
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+    def override_get_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[dependencies.get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        assert client.post("/auth/register", json={"username": "query_budget_user", "password": "budget_pass"}).status_code == 200
+        token = client.post("/auth/login", json={"username": "query_budget_user", "password": "budget_pass"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        food = client.post("/categories/", json={"name": "Food"}).json()
+        rent = client.post("/categories/", json={"name": "Rent"}).json()
+
+        created = assert_within_budget(client, test_engine, "POST /transactions/", "POST", "/transactions/",
+                                       json={"amount": 12.5, "type": "expense", "category_id": food["id"]}).json()
+        assert created["category"]["name"] == "Food"
+        for i in range(60):
+            client.post("/transactions/", json={"amount": 1 + i, "type": "expense",
+                                                "category_id": food["id"] if i % 2 else rent["id"]})
+
+        print("Testing the listing does not lazy-load categories per row...")
+        page = assert_within_budget(client, test_engine, "GET /transactions/", "GET", "/transactions/?limit=50").json()
+        assert len(page) == 50 and {tx["category"]["name"] for tx in page} == {"Food", "Rent"}
+
+        print("Testing filtered, sorted listings with totals headers...")
+        filtered = assert_within_budget(client, test_engine, "GET /transactions/ (filtered, totals)", "GET",
+                                        f"/transactions/?category_id={food['id']}&min_amount=10&max_amount=40"
+                                        "&sort=amount_desc&limit=5&totals=true")
+        amounts = [tx["amount"] for tx in filtered.json()]
+        assert amounts == sorted(amounts, reverse=True) and all(10 <= amount <= 40 for amount in amounts)
+        assert {tx["category"]["name"] for tx in filtered.json()} == {"Food"}
+        assert filtered.headers["X-Total-Count"] == "17" and filtered.headers["X-Total-Expenses"] == "412.50"
+        assert filtered.headers["X-Total-Income"] == "0.00"
+        next_page = client.get(f"/transactions/?category_id={food['id']}&min_amount=10&max_amount=40&sort=amount_desc"
+                               f"&limit=5&cursor={filtered.headers['X-Next-Cursor']}").json()
+        assert [tx["amount"] for tx in next_page] == [amounts[-1] - 2 * i for i in range(1, 6)]
+        assert "X-Total-Count" not in client.get("/transactions/?limit=1").headers
+        assert client.get("/transactions/?sort=description").status_code == 422
+
+        print("Testing the listing is served from the ledger store when enabled...")
+        original_budget, ledger_store.budget_bytes = ledger_store.budget_bytes, 16 * 1024 * 1024
+        ledger_store.discard() # Keyed by user id, which other test databases reuse
+        try:
+            assert client.get("/transactions/?limit=50").json() == page # Loads the ledger
+            stored = assert_within_budget(client, test_engine, "GET /transactions/ (ledger store)", "GET", "/transactions/?limit=50")
+            assert stored.json() == page and stored.headers["X-Next-Cursor"]
+        finally:
+            ledger_store.budget_bytes = original_budget
+            ledger_store.discard()
+
+        print("Testing full-text search...")
+        bakery = client.post("/transactions/", json={"amount": 3, "type": "expense", "category_id": food["id"],
+                                                     "description": "Corner bakery"}).json()
+        found = assert_within_budget(client, test_engine, "GET /transactions/search", "GET", "/transactions/search?q=bak*").json()
+        assert [tx["description"] for tx in found] == ["Corner bakery"] and found[0]["category"]["name"] == "Food"
+        assert client.get("/transactions/search?q=").status_code == 422
+
+        print("Testing the streaming export...")
+        exported = assert_within_budget(client, test_engine, "GET /transactions/export", "GET", "/transactions/export")
+        assert exported.headers["content-encoding"] == "gzip" # httpx sends Accept-Encoding: gzip and decodes it
+        lines = exported.text.splitlines()
+        assert lines[0] == "id,date,amount,currency,type,category,description" and len(lines) == 63
+        assert client.get("/transactions/export?format=xml").status_code == 422
+        monthly = client.get("/analytics/export?format=ndjson", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in monthly.headers
+        assert sum(json.loads(line)["transaction_count"] for line in monthly.text.splitlines()) == 62
+
+        print("Testing description suggestions...")
+        suggestion_store.discard() # Keyed by user id, which other test databases reuse
+        assert client.get("/transactions/suggest?prefix=corner").json() == [
+            {"description": "Corner bakery", "category_id": food["id"], "uses": 1}] # Loads the index
+        assert_within_budget(client, test_engine, "GET /transactions/suggest", "GET", "/transactions/suggest?prefix=C")
+        assert client.get("/transactions/suggest?prefix=").status_code == 422
+        client.delete(f"/transactions/{bakery['id']}")
+        assert client.get("/transactions/suggest?prefix=corner").json() == []
+        assert client.get("/transactions/search?q=bakery").json() == []
+
+        assert_within_budget(client, test_engine, "GET /transactions/{id}", "GET", f"/transactions/{created['id']}")
+        updated = assert_within_budget(client, test_engine, "PUT /transactions/{id}", "PUT", f"/transactions/{created['id']}",
+                                       json={"amount": 13, "type": "expense", "category_id": rent["id"]}).json()
+        assert updated["category"]["name"] == "Rent"
+        assert_within_budget(client, test_engine, "DELETE /transactions/{id}", "DELETE", f"/transactions/{created['id']}")
+        assert_within_budget(client, test_engine, "GET /categories/", "GET", "/categories/")
+
+        print("Testing analytics ETags answer conditional GETs without aggregating...")
+        summary_cache.clear() # The cache is per process and keyed by user id; this is a fresh database
+        monthly = assert_within_budget(client, test_engine, "GET /analytics/monthly", "GET", "/analytics/monthly")
+        etag = monthly.headers["ETag"]
+        assert etag.startswith('"') and monthly.json()["total_expenses"] == sum(1 + i for i in range(60)), monthly.json()
+        not_modified = assert_within_budget(client, test_engine, "GET /analytics/monthly (If-None-Match)", "GET",
+                                            "/analytics/monthly", headers={"If-None-Match": f'"other", W/{etag}'})
+        assert not_modified.status_code == 304 and not_modified.headers["ETag"] == etag and not not_modified.content
+        trend = assert_within_budget(client, test_engine, "GET /analytics/trend", "GET", "/analytics/trend?months=2")
+        assert len(trend.json()) == 2 and trend.headers["ETag"] != etag
+        assert client.get("/analytics/trend?months=2", headers={"If-None-Match": trend.headers["ETag"]}).status_code == 304
+        client.post("/transactions/", json={"amount": 5, "type": "income", "category_id": food["id"]})
+        after_write = client.get("/analytics/monthly", headers={"If-None-Match": etag})
+        assert after_write.status_code == 200 and after_write.headers["ETag"] != etag
+        assert after_write.json()["total_income"] == 5
+        assert client.get("/analytics/trend?months=0").status_code == 422
+        report = client.get("/analytics/report?months=2")
+        assert report.status_code == 200 and len(report.json()["months"]) == 2, report.text
+        assert report.json()["months"][-1]["total_income"] == 5 and report.json()["categories"][0]["name"] in ("Food", "Rent")
+        assert client.get("/analytics/report?months=2", headers={"If-None-Match": report.headers["ETag"]}).status_code == 304
+
+        print("Testing batch writes with per-operation results...")
+        batch = client.post("/batch/", json={"operations": [
+            {"action": "create", "entity": "transaction", "data": {"amount": 2, "type": "expense", "category_id": food["id"]}},
+            {"action": "create", "entity": "goal", "data": {"name": "Holiday", "target_amount": 300}},
+            {"action": "create", "entity": "transaction", "data": {"type": "expense", "category_id": food["id"]}},
+        ], "atomic": False})
+        assert batch.status_code == 200 and batch.json()["committed"] and batch.json()["applied"] == 2, batch.text
+        results = batch.json()["results"]
+        assert [r["status"] for r in results] == ["ok", "ok", "error"] and "amount" in results[2]["error"]
+        assert client.get(f"/transactions/{results[0]['id']}").json()["amount"] == 2
+        rejected = client.post("/batch/", json={"operations": [
+            {"action": "delete", "entity": "goal", "id": results[1]["id"]},
+            {"action": "delete", "entity": "transaction", "id": 10 ** 9},
+        ]}).json()
+        assert not rejected["committed"] and [r["status"] for r in rejected["results"]] == ["rolled_back", "error"]
+        cleanup = client.post("/batch/", json={"operations": [{"action": "delete", "entity": "goal", "id": results[1]["id"]}]})
+        assert cleanup.json()["results"][0]["status"] == "ok", "The rolled back batch deleted the goal"
+        assert client.post("/batch/", json={"operations": [{"action": "rename", "entity": "goal"}]}).status_code == 422
+
+        print("Testing retries with an Idempotency-Key are answered from the stored response...")
+        before = len(client.get("/transactions/?limit=1000").json())
+        keyed = {"Idempotency-Key": "retry-1"}
+        payload = {"amount": 6.5, "type": "expense", "category_id": food["id"], "description": "Taxi"}
+        first = assert_within_budget(client, test_engine, "POST /transactions/ (Idempotency-Key)", "POST", "/transactions/",
+                                     json=payload, headers=keyed)
+        replay = assert_within_budget(client, test_engine, "POST /transactions/ (replayed)", "POST", "/transactions/",
+                                      json=payload, headers=keyed)
+        assert first.status_code == replay.status_code == 201 and replay.content == first.content
+        assert replay.headers["Idempotent-Replayed"] == "true" and "Idempotent-Replayed" not in first.headers
+        assert first.json()["category"]["name"] == "Food"
+        assert len(client.get("/transactions/?limit=1000").json()) == before + 1, "The retry created a second transaction"
+        assert client.post("/transactions/", json={**payload, "amount": 7}, headers=keyed).status_code == 422
+        bad_category = client.post("/transactions/", json={**payload, "category_id": 10 ** 9}, headers={"Idempotency-Key": "retry-2"})
+        assert bad_category.status_code == 400
+        assert client.post("/transactions/", json=payload, headers={"Idempotency-Key": "retry-2"}).status_code == 201, \
+            "A failed request kept its key"
+        # A concurrent retry that looked the key up before the first request committed: its write is rolled back
+        find_response = idempotency_management.find_response
+        lookups = []
+        idempotency_management.find_response = lambda db, **kwargs: (find_response(db, **kwargs) if lookups.append(1) or
+                                                                     len(lookups) > 1 else None)
+        try:
+            raced = client.post("/transactions/", json=payload, headers=keyed)
+        finally:
+            idempotency_management.find_response = find_response
+        assert raced.status_code == 201 and raced.content == first.content and raced.headers["Idempotent-Replayed"] == "true"
+        assert len(client.get("/transactions/?limit=1000").json()) == before + 2, "The lost race created a transaction"
+        upload = {"file": ("bank.csv", b"date,amount,category\n2024-03-01,-2.25,Food\n", "text/csv")}
+        imported = client.post("/transactions/import", files=upload, headers={"Idempotency-Key": "import-1"})
+        reimported = client.post("/transactions/import", files=upload, headers={"Idempotency-Key": "import-1"})
+        assert imported.json()["imported"] == 1 and reimported.json() == imported.json()
+        assert reimported.headers["Idempotent-Replayed"] == "true"
+        goal_batch = {"operations": [{"action": "create", "entity": "goal", "data": {"name": "Bike", "target_amount": 50}}]}
+        batched = client.post("/batch/", json=goal_batch, headers={"Idempotency-Key": "batch-1"}).json()
+        assert client.post("/batch/", json=goal_batch, headers={"Idempotency-Key": "batch-1"}).json() == batched
+        assert len(client.get("/transactions/?limit=1000").json()) == before + 3
+        client.post("/batch/", json={"operations": [{"action": "delete", "entity": "goal", "id": batched["results"][0]["id"]}]})
+
+        print("Testing goal contributions are single UPDATE ... RETURNING statements...")
+        bike = client.post("/goals/", json={"name": "Bike", "target_amount": 200})
+        assert bike.status_code == 201 and bike.json()["progress_percentage"] == 0, bike.text
+        bike_id = bike.json()["id"]
+        boat_id = client.post("/goals/", json={"name": "Boat", "target_amount": 1000}).json()["id"]
+        contributed = assert_within_budget(client, test_engine, "POST /goals/{id}/contribute", "POST",
+                                           f"/goals/{bike_id}/contribute", json={"amount": 50}).json()
+        assert contributed["current_amount"] == 50 and contributed["progress_percentage"] == 25
+        contributions = [{"goal_id": boat_id, "amount": 100}, {"goal_id": bike_id, "amount": 25.5}, {"goal_id": boat_id, "amount": 0.25}]
+        batched = assert_within_budget(client, test_engine, "POST /goals/contribute", "POST", "/goals/contribute",
+                                       json={"contributions": contributions}).json()
+        assert [(goal["id"], goal["current_amount"]) for goal in batched] == [(boat_id, 100.25), (bike_id, 75.5)]
+        missing = client.post("/goals/contribute", json={"contributions": [{"goal_id": bike_id, "amount": 1}, {"goal_id": 10 ** 9, "amount": 1}]})
+        assert missing.status_code == 404 and client.get(f"/goals/{bike_id}").json()["current_amount"] == 75.5
+        assert client.post(f"/goals/{10 ** 9}/contribute", json={"amount": 1}).status_code == 404
+        assert client.post("/goals/contribute", json={"contributions": [{"goal_id": bike_id, "amount": 0}]}).status_code == 422
+        listing = assert_within_budget(client, test_engine, "GET /goals/", "GET", "/goals/").json()
+        assert [goal["id"] for goal in listing] == [boat_id, bike_id], "Newest goal first"
+        assert listing == [client.get(f"/goals/{goal['id']}").json() for goal in listing], "Listing differs from the models"
+        assert [goal["progress_percentage"] for goal in listing] == [10.03, 37.75]
+        for goal_id in (bike_id, boat_id):
+            assert client.delete(f"/goals/{goal_id}").status_code == 204
+
+        print("Testing delta sync returns only what changed...")
+        snapshot = client.get("/sync/").json()
+        assert snapshot["full"] and len(snapshot["transactions"]) == len(client.get("/transactions/?limit=1000").json())
+        assert {c["name"] for c in snapshot["categories"]} == {"Food", "Rent"}
+        client.post("/transactions/", json={"amount": 4, "type": "expense", "category_id": rent["id"]})
+        client.delete(f"/transactions/{results[0]['id']}")
+        goal_op = {"action": "create", "entity": "goal", "data": {"name": "Car", "target_amount": 100, "current_amount": 25}}
+        car_id = client.post("/batch/", json={"operations": [goal_op]}).json()["results"][0]["id"]
+        delta = assert_within_budget(client, test_engine, "GET /sync/ (delta)", "GET", f"/sync/?since={snapshot['cursor']}").json()
+        assert not delta["full"] and [tx["amount"] for tx in delta["transactions"]] == [4]
+        assert delta["transactions"][0]["category"]["name"] == "Rent"
+        assert delta["deleted"] == {"categories": [], "transactions": [results[0]["id"]], "goals": []}
+        assert [(goal["id"], goal["progress_percentage"]) for goal in delta["goals"]] == [(car_id, 25.0)]
+        assert client.get(f"/sync/?since={delta['cursor']}").json()["transactions"] == []
+        client.post("/batch/", json={"operations": [{"action": "delete", "entity": "goal", "id": car_id}]})
+        assert client.get("/sync/?since=-1").status_code == 422
+
+        print("Testing sync pages and entity filters...")
+        first = client.get("/sync/?limit=1").json()
+        second = client.get(f"/sync/?limit=1&page={first['next_page']}").json()
+        assert len(first["categories"]) == 1 and first["transactions"] == [] and second["cursor"] == first["cursor"]
+        assert second["categories"][0]["id"] > first["categories"][0]["id"]
+        assert assert_within_budget(client, test_engine, "GET /sync/ (next page)", "GET",
+                                    f"/sync/?limit=1&page={first['next_page']}").json() == second
+        only = client.get("/sync/?entity=categories&entity=goals").json()
+        assert only["transactions"] == [] and len(only["categories"]) == 2 and only["next_page"] is None
+        assert client.get("/sync/?page=garbage").status_code == 400
+        assert client.get("/sync/?entity=users").status_code == 422
+
+        print("Testing authentication issues no SQL and rejects bad or revoked tokens...")
+        with StatementCounter(test_engine) as counter:
+            assert client.get("/categories/", headers={"Authorization": "Bearer not.a.token"}).status_code == 401
+            assert client.get("/categories/", headers={"Authorization": ""}).status_code == 401
+        assert counter.count == 0, f"Rejecting tokens issued {counter.count} SQL statements"
+        assert_within_budget(client, test_engine, "GET /goals/", "GET", "/goals/")
+
+        assert client.post("/auth/logout").status_code == 204
+        assert client.get("/goals/").status_code == 401, "Revoked token was accepted"
+    finally:
+        app.dependency_overrides.pop(dependencies.get_db, None)
+        test_engine.dispose()
+        os.remove(db_path)
+    print("API SQL statement budget tests completed successfully.")
+
+def run_async_session_tests():
+    print("Running API tests on the async (aiosqlite) session path...")
+    try:
+        import aiosqlite # noqa: F401 - optional dependency of the async mode
+    except ImportError:
+        print("aiosqlite is not installed, skipping async session tests.")
+        return
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="budget_api_async_test_")
+    os.close(fd)
+    create_tables(create_engine(f"sqlite:///{db_path}"))
+    async_engine = create_async_storage_engine(f"sqlite:///{db_path}", "production")
+    TestAsyncSession = async_sessionmaker(async_engine, autoflush=False)
+
+    async def override_get_db_runner():
+        session = TestAsyncSession()
+        try:
+            yield AsyncSessionRunner(session)
+        finally:
+            await session.close()
+
+    app.dependency_overrides[dependencies.get_db_runner] = override_get_db_runner
+    try:
+        client = TestClient(app)
+        assert client.post("/auth/register", json={"username": "async_user", "password": "async_pass"}).status_code == 200
+        token = client.post("/auth/login", json={"username": "async_user", "password": "async_pass"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        food = client.post("/categories/", json={"name": "Food"}).json()
+        rent = client.post("/categories/", json={"name": "Rent"}).json()
+        created = client.post("/transactions/", json={"amount": 12.5, "type": "expense", "category_id": food["id"]})
+        assert created.status_code == 201 and created.json()["category"]["name"] == "Food", created.text
+        tx_id = created.json()["id"]
+        keyed = {"amount": 1, "type": "expense", "category_id": food["id"]}
+        first = client.post("/transactions/", json=keyed, headers={"Idempotency-Key": "async-1"})
+        replay = client.post("/transactions/", json=keyed, headers={"Idempotency-Key": "async-1"})
+        assert replay.status_code == 201 and replay.content == first.content and replay.headers["Idempotent-Replayed"] == "true"
+        assert client.delete(f"/transactions/{first.json()['id']}").status_code == 204
+        updated = client.put(f"/transactions/{tx_id}", json={"amount": 13, "type": "expense", "category_id": rent["id"]})
+        assert updated.status_code == 200 and updated.json()["category"]["name"] == "Rent", updated.text
+        report = client.get("/analytics/report?months=2") # The ledger is streamed through the async session
+        assert report.status_code == 200 and report.json()["months"][-1]["total_expenses"] == 13, report.text
+        assert [category["name"] for category in report.json()["categories"]] == ["Rent"]
+        listing = client.get("/transactions/")
+        assert [tx["id"] for tx in listing.json()] == [tx_id]
+        exported = client.get("/transactions/export?format=ndjson")
+        assert exported.headers["content-encoding"] == "gzip" and json.loads(exported.text)["category"] == "Rent"
+        assert client.get("/goals/").json() == []
+        assert client.delete(f"/transactions/{tx_id}").status_code == 204
+        assert client.get(f"/transactions/{tx_id}").status_code == 404
+        assert client.post("/auth/logout").status_code == 204
+        assert client.get("/goals/").status_code == 401, "Revoked token was accepted"
+    finally:
+        app.dependency_overrides.pop(dependencies.get_db_runner, None)
+        asyncio.run(async_engine.dispose())
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    print("Async session API tests completed successfully.")
+
+if __name__ == "__main__":
+    run_api_query_count_tests()
+    run_async_session_tests()
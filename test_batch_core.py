@@ -0,0 +1,127 @@
+import datetime
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, Category, Goal, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username, get_data_version
+from budget_planner.core.transaction_management import create_category, create_transaction
+from budget_planner.core.rollup_management import verify_monthly_rollups
+from budget_planner.core.ledger_store import ledger_store
+from budget_planner.core.batch_management import apply_batch, MAX_BATCH_OPERATIONS
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Goal).filter(Goal.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def count_commits(run):
+    """Returns (run's result, number of COMMITs sent to the database)."""
+    commits = []
+    listener = lambda conn: commits.append(1)
+    event.listen(engine, "commit", listener)
+    try:
+        return run(), len(commits)
+    finally:
+        event.remove(engine, "commit", listener)
+
+def run_batch_tests():
+    print("Running batch write tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    original_budget = ledger_store.budget_bytes
+    try:
+        cleanup_user(db, "batch_user1")
+        cleanup_user(db, "batch_user2")
+        user = create_user(db, username="batch_user1", password="batch_password123")
+        other = create_user(db, username="batch_user2", password="batch_password123")
+        user_id, other_id = user.id, other.id
+        food_id = create_category(db, name="Food", user_id=user_id).id
+        foreign_id = create_category(db, name="Theirs", user_id=other_id).id
+        date = datetime.datetime(2024, 3, 10)
+        existing_id = create_transaction(db, amount=10, type=TransactionType.EXPENSE, date=date, user_id=user_id,
+                                         category_id=food_id, description="Groceries").id
+        ledger_store.budget_bytes = 64 * 1024 * 1024
+        ledger_store.read(db, user_id, len) # Loaded, so the batch must keep it in step
+
+        def expense(category_id, amount=5.0, description="Offline"):
+            return {"action": "create", "entity": "transaction",
+                    "data": {"amount": amount, "type": TransactionType.EXPENSE, "date": date,
+                             "category_id": category_id, "description": description}}
+
+        print("Testing many mixed operations are applied with one commit...")
+        operations = [expense(food_id, amount=i + 1) for i in range(50)] + [
+            {"action": "create", "entity": "category", "data": {"name": "Travel"}},
+            {"action": "update", "entity": "transaction", "id": existing_id, "data": {"amount": 12.5, "description": "Market"}},
+            {"action": "create", "entity": "goal", "data": {"name": "Trip", "target_amount": 500, "target_date": None}},
+        ]
+        version = get_data_version(db, user_id)
+        report, commits = count_commits(lambda: apply_batch(db, user_id, operations))
+        assert commits == 1 and report["committed"] and report["applied"] == 53 and report["failed"] == 0, (commits, report)
+        assert get_data_version(db, user_id) == version + 1, "One data version bump for the whole batch"
+        goal_id = report["results"][52]["id"]
+        assert db.query(Goal).filter_by(id=goal_id, user_id=user_id).one().target_amount_minor == 50000
+        assert db.query(Transaction).filter_by(id=existing_id).one().amount_minor == 1250
+        assert verify_monthly_rollups(db, user_id) == []
+        cached = ledger_store.read(db, user_id, lambda ledger: (len(ledger), ledger.summarize()["total_expenses_minor"]))
+        assert cached == (51, sum(range(1, 51)) * 100 + 1250), cached
+
+        print("Testing an atomic batch rolls back entirely on one bad operation...")
+        report = apply_batch(db, user_id, [expense(food_id), expense(foreign_id),
+                                           {"action": "delete", "entity": "goal", "id": goal_id}])
+        assert not report["committed"] and report["applied"] == 0 and report["failed"] == 1
+        assert [r["status"] for r in report["results"]] == ["rolled_back", "error", "rolled_back"]
+        assert "category" in report["results"][1]["error"]
+        assert db.query(Transaction).filter_by(user_id=user_id).count() == 51 and db.query(Goal).filter_by(id=goal_id).count() == 1
+
+        print("Testing a non-atomic batch commits the operations that succeed...")
+        travel_id = db.query(Category.id).filter_by(user_id=user_id, name="Travel").scalar()
+        report = apply_batch(db, user_id, [
+            {"action": "update", "entity": "transaction", "id": existing_id, "data": {"currency": "US1"}}, # Fails after the rollup was touched
+            {"action": "update", "entity": "transaction", "id": existing_id, "data": {"category_id": travel_id}},
+            {"action": "delete", "entity": "category", "id": food_id}, # Still has transactions
+            {"action": "update", "entity": "category", "id": travel_id, "data": {"name": "food"}}, # Name taken
+            {"action": "delete", "entity": "goal", "id": goal_id},
+            {"action": "delete", "entity": "goal", "id": goal_id}, # Already gone
+            {"action": "update", "entity": "goal", "id": None, "data": {}},
+            {"action": "create", "entity": "goal", "error": "name: field required"}, # Rejected by request validation
+        ], atomic=False)
+        assert report["committed"] and report["applied"] == 2 and report["failed"] == 6, report
+        assert [r["status"] for r in report["results"]] == ["error", "ok", "error", "error", "ok", "error", "error", "error"]
+        assert report["results"][5]["error"] == "Goal not found" and report["results"][7]["error"] == "name: field required"
+        moved = db.query(Transaction).filter_by(id=existing_id).one()
+        assert moved.category_id == travel_id and moved.currency == "USD"
+        assert verify_monthly_rollups(db, user_id) == [], "A failed operation's rollup changes were not undone"
+        assert db.query(Goal).filter_by(user_id=user_id).count() == 0
+
+        print("Testing updates and deletes only reach the user's own rows...")
+        report = apply_batch(db, other_id, [{"action": "delete", "entity": "transaction", "id": existing_id},
+                                            {"action": "update", "entity": "category", "id": food_id, "data": {"name": "Mine"}}],
+                             atomic=False)
+        assert report["failed"] == 2 and db.query(Transaction).filter_by(id=existing_id).count() == 1
+
+        print("Testing deletes and the batch size limit...")
+        ids = [tx_id for (tx_id,) in db.query(Transaction.id).filter_by(user_id=user_id, category_id=food_id)]
+        report = apply_batch(db, user_id, [{"action": "delete", "entity": "transaction", "id": tx_id} for tx_id in ids] +
+                             [{"action": "delete", "entity": "category", "id": food_id}])
+        assert report["applied"] == len(ids) + 1 and db.query(Category).filter_by(id=food_id).count() == 0
+        assert verify_monthly_rollups(db, user_id) == []
+        assert ledger_store.read(db, user_id, len) == 1
+        try:
+            apply_batch(db, user_id, [{"action": "delete", "entity": "goal", "id": 1}] * (MAX_BATCH_OPERATIONS + 1))
+            assert False, "An oversized batch was accepted"
+        except ValueError:
+            pass
+    finally:
+        ledger_store.discard()
+        ledger_store.budget_bytes = original_budget
+        cleanup_user(db, "batch_user1")
+        cleanup_user(db, "batch_user2")
+        db.close()
+    print("Batch write tests completed successfully.")
+
+if __name__ == "__main__":
+    run_batch_tests()
@@ -0,0 +1,129 @@
+import asyncio
+import csv
+import datetime
+import functools
+import gzip
+import io
+import json
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine, ThreadSessionRunner
+from budget_planner.models.data_models import create_tables, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.transaction_management import create_category, create_transaction
+from budget_planner.core import export_management
+from budget_planner.core.export_management import format_minor, transaction_export_query, monthly_export_query
+from budget_planner.api.exports import export_response, accepts_gzip
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def collect(db, query_for, file_format, kind, accept_encoding=None):
+    """Runs an export to completion, returning (response headers, body bytes, SQL statements issued)."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    response = export_response(ThreadSessionRunner(db), query_for, file_format, kind, "export", accept_encoding)
+    async def drain():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        body = asyncio.run(drain())
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return response.headers, body, statements
+
+def run_export_tests():
+    print("Running streaming export tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    original_batch_size = export_management.EXPORT_BATCH_SIZE
+    export_management.EXPORT_BATCH_SIZE = 4 # Several batches from a handful of rows
+    try:
+        cleanup_user(db, "export_user1")
+        user = create_user(db, username="export_user1", password="export_password123")
+        food = create_category(db, name='Food, "fresh"', user_id=user.id)
+        salary = create_category(db, name="Salary", user_id=user.id)
+        base = datetime.datetime(2024, 1, 30, 9, 15)
+        created = [create_transaction(db, amount=0.1 * (i + 1) if i % 5 else 1000 + i, date=base + datetime.timedelta(days=i),
+                                      type=TransactionType.EXPENSE if i % 5 else TransactionType.INCOME,
+                                      user_id=user.id, category_id=food.id if i % 5 else salary.id,
+                                      description=None if i == 3 else f"Line {i}\nsecond, line")
+                   for i in range(11)]
+        # The export ends a read transaction per page by detaching everything from the session, so keep plain values
+        created = [(tx.id, tx.date, tx.amount_minor, tx.type) for tx in created]
+
+        print("Testing amounts are exact decimal text...")
+        assert format_minor(1234) == "12.34" and format_minor(5) == "0.05" and format_minor(-100) == "-1.00"
+
+        print("Testing CSV export of every row across batches, with category names...")
+        headers, body, statements = collect(db, functools.partial(transaction_export_query, user.id), "csv", "transactions")
+        assert len(statements) == 3, "One keyset query per batch of 4 rows" # 11 rows
+        plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statements[-1], (user.id, str(base), 0, 4, 0)).fetchall()
+        db.rollback()
+        assert "ix_transactions_user_date" in str(plan) and "TEMP B-TREE" not in str(plan), plan
+        assert headers["content-type"].startswith("text/csv") and "Content-Encoding" not in headers
+        assert headers["content-disposition"] == 'attachment; filename="export.csv"'
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        assert [int(row["id"]) for row in rows] == [tx_id for tx_id, _, _, _ in created]
+        assert [row["amount"] for row in rows[:3]] == ["1000.00", "0.20", "0.30"]
+        assert rows[1]["category"] == 'Food, "fresh"' and rows[0]["category"] == "Salary" and rows[0]["type"] == "income"
+        assert rows[1]["description"] == "Line 1\nsecond, line" and rows[3]["description"] == ""
+        assert rows[2]["date"] == "2024-02-01T09:15:00"
+
+        print("Testing NDJSON export with a date range...")
+        start, end = datetime.datetime(2024, 2, 1), datetime.datetime(2024, 2, 5)
+        _, body, _ = collect(db, functools.partial(transaction_export_query, user.id, start, end), "ndjson", "transactions")
+        records = [json.loads(line) for line in body.decode().splitlines()]
+        assert [record["id"] for record in records] == [tx_id for tx_id, date, _, _ in created if start <= date < end]
+        assert records[0] == {"id": created[2][0], "date": "2024-02-01T09:15:00", "amount": 0.3, "currency": "USD",
+                              "type": "expense", "category": 'Food, "fresh"', "description": "Line 2\nsecond, line"}
+
+        print("Testing gzip is applied on the fly when accepted...")
+        headers, body, _ = collect(db, functools.partial(transaction_export_query, user.id), "csv", "transactions", "deflate, gzip;q=0.8")
+        assert headers["content-encoding"] == "gzip" and headers["vary"] == "Accept-Encoding"
+        assert gzip.decompress(body).decode().count("\n") > 11
+        assert accepts_gzip("gzip") and accepts_gzip("*") and not accepts_gzip("gzip;q=0") and not accepts_gzip(None)
+        assert not accepts_gzip("br, deflate")
+
+        print("Testing the monthly summary export...")
+        _, body, _ = collect(db, functools.partial(monthly_export_query, user.id), "csv", "monthly")
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        totals = {(row["year"], row["month"], row["type"]): row for row in rows}
+        assert totals[("2024", "2", "expense")]["amount"] == format_minor(sum(
+            amount for _, date, amount, tx_type in created if date.month == 2 and tx_type == TransactionType.EXPENSE))
+        assert sum(int(row["transaction_count"]) for row in rows) == len(created)
+
+        print("Testing a write commits while an export is being downloaded...")
+        response = export_response(ThreadSessionRunner(db), functools.partial(transaction_export_query, user.id),
+                                   "csv", "transactions", "export", None)
+        async def drain_with_write():
+            chunks = [await response.body_iterator.__anext__() for _ in range(2)] # The header, then the first page
+            writer = SessionLocal() # Without WAL this waits for any open read transaction, then fails
+            try:
+                create_transaction(writer, amount=7, type=TransactionType.EXPENSE, date=base + datetime.timedelta(days=30),
+                                   user_id=user.id, category_id=food.id, description="Written mid-export")
+            finally:
+                writer.close()
+            return b"".join(chunks + [chunk async for chunk in response.body_iterator])
+        rows = list(csv.DictReader(io.StringIO(asyncio.run(drain_with_write()).decode())))
+        assert len(rows) == len(created) + 1 and rows[-1]["description"] == "Written mid-export"
+
+        print("Testing an empty export still has its header...")
+        _, body, _ = collect(db, functools.partial(transaction_export_query, user.id, end_date=base), "csv", "transactions")
+        assert body.decode() == "id,date,amount,currency,type,category,description\r\n"
+        _, body, _ = collect(db, functools.partial(transaction_export_query, user.id, end_date=base), "ndjson", "transactions")
+        assert body == b""
+    finally:
+        export_management.EXPORT_BATCH_SIZE = original_batch_size
+        cleanup_user(db, "export_user1")
+        db.close()
+    print("Streaming export tests completed successfully.")
+
+if __name__ == "__main__":
+    run_export_tests()
@@ -1,12 +1,22 @@
 import datetime
+import threading
 import time # To ensure distinct creation_date for ordering tests
+from sqlalchemy import func
 from budget_planner.models.database import SessionLocal, engine
-from budget_planner.models.data_models import create_tables, User, Goal # Corrected import path if needed
+from budget_planner.models.data_models import create_tables, User, Goal, GoalContribution # Corrected import path if needed
 from budget_planner.core.user_management import create_user, get_user_by_username
 from budget_planner.core.goal_management import (
-    create_goal, get_goals_by_user, get_goal_by_id, update_goal, delete_goal, update_goal_progress
+    create_goal, get_goals_by_user, get_goal_by_id, update_goal, delete_goal, update_goal_progress, contribute_to_goals
 )
 
+def delete_test_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(GoalContribution).filter(GoalContribution.user_id == user.id).delete()
+        db.query(Goal).filter(Goal.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
 def run_goal_tests():
     print("Running goal management core logic tests...")
     # Explicitly call create_tables here to ensure schema is updated before tests
@@ -21,6 +31,7 @@ def run_goal_tests():
     user = get_user_by_username(db, test_username)
     if user:
         print(f"Found existing test user '{test_username}', cleaning up their goals...")
+        db.query(GoalContribution).filter(GoalContribution.user_id == user.id).delete()
         db.query(Goal).filter(Goal.user_id == user.id).delete()
         # Do not delete the user here if other tests might rely on it or if cleanup is complex.
         # For full idempotency, user should be deleted and recreated.
@@ -59,6 +70,23 @@ def run_goal_tests():
         assert user_goals[1].name == "Vacation Fund", f"Order incorrect, expected Vacation Fund second, got {user_goals[1].name}"
     print("Goals fetched and order verified.")
 
+    print("Testing the listing computes progress in SQL exactly as Goal.progress_percentage does...")
+    for goal_row in user_goals:
+        assert goal_row.progress_percentage == get_goal_by_id(db, goal_row.id, user_id).progress_percentage
+    assert [goal_row.progress_percentage for goal_row in user_goals] == [6.67, 0.0] # 100 of 1500, 0 of 1000
+    tie = create_goal(db, user_id=user_id, name="Halfway Tie", target_amount=0.96, current_amount=0.75) # 78.125%
+    full = create_goal(db, user_id=user_id, name="Overfunded", target_amount=10.0, current_amount=12.0)
+    progress = {goal_row.name: goal_row.progress_percentage for goal_row in get_goals_by_user(db, user_id=user_id)}
+    assert progress["Halfway Tie"] == tie.progress_percentage == 78.13, "Halves are rounded up on both sides"
+    assert progress["Overfunded"] == full.progress_percentage == 100.0
+    db.query(Goal).filter(Goal.id == full.id).update({"current_amount_minor": -1501}) # e.g. legacy data
+    db.commit()
+    db.refresh(full)
+    progress = {goal_row.name: goal_row.progress_percentage for goal_row in get_goals_by_user(db, user_id=user_id)}
+    assert progress["Overfunded"] == full.progress_percentage == 0.0, "A negative amount is clamped on both sides"
+    delete_goal(db, tie.id, user_id)
+    delete_goal(db, full.id, user_id)
+
     print("Testing fetching goal by ID...")
     fetched_goal = get_goal_by_id(db, goal_id=goal1.id, user_id=user_id)
     assert fetched_goal is not None and fetched_goal.name == "Vacation Fund"
@@ -84,12 +112,24 @@ def run_goal_tests():
     # current amount for goal1 (Dream Vacation) is 50.0
     progress_updated_goal = update_goal_progress(db, goal_id=goal1.id, user_id=user_id, contributed_amount=100.0)
     assert progress_updated_goal is not None and progress_updated_goal.current_amount == 150.0 # 50 + 100
+    assert [c.amount_minor for c in db.query(GoalContribution).filter_by(goal_id=goal1.id)] == [10000], "Contribution not in the ledger"
+    assert update_goal_progress(db, goal_id=goal1.id, user_id=user_id + 1, contributed_amount=5.0) is None
     print("Goal progress updated.")
 
+    print("Testing many contributions applied at once...")
+    updated = contribute_to_goals(db, user_id, [(goal2.id, 10.0), (goal1.id, 0.5), (goal2.id, 2.25)])
+    assert [(goal.id, goal.current_amount) for goal in updated] == [(goal2.id, 112.25), (goal1.id, 150.5)]
+    assert db.query(GoalContribution).filter_by(goal_id=goal2.id).count() == 2
+    assert contribute_to_goals(db, user_id, [(goal2.id, 1.0), (10 ** 9, 1.0)]) is None, "A missing goal must fail the batch"
+    assert get_goal_by_id(db, goal2.id, user_id).current_amount == 112.25, "A failed batch changed a goal"
+    assert contribute_to_goals(db, user_id, []) == []
+    print("Batch contributions applied.")
+
     print("Testing goal deletion...")
     del_goal_result = delete_goal(db, goal_id=goal1.id, user_id=user_id)
     assert del_goal_result is True, "Goal deletion failed for goal1"
     assert get_goal_by_id(db, goal1.id, user_id) is None, "Deleted goal1 still found"
+    assert db.query(GoalContribution).filter_by(goal_id=goal1.id).count() == 0, "Deleted goal1 kept its contributions"
 
     remaining_goals = get_goals_by_user(db, user_id=user_id)
     assert len(remaining_goals) == 1, f"Expected 1 goal after deleting one, got {len(remaining_goals)}"
@@ -98,6 +138,7 @@ def run_goal_tests():
 
     # Clean up remaining goal and test user
     print(f"Cleaning up remaining goal ID {goal2.id} and user ID {user_id}")
+    db.query(GoalContribution).filter(GoalContribution.goal_id == goal2.id).delete()
     db.delete(goal2)
     db.delete(user) # User created in this test run
     db.commit()
@@ -106,5 +147,46 @@ def run_goal_tests():
     db.close()
     print("Goal management core logic tests completed successfully.")
 
+def run_goal_contribution_concurrency_tests(contributors: int = 8, contributions_each: int = 25):
+    print(f"Testing {contributors} parallel contributors to one goal lose no updates...")
+    create_tables(engine)
+    db = SessionLocal()
+    test_username = "goal_contention_user"
+    delete_test_user(db, test_username)
+    user_id = create_user(db, username=test_username, password="goal_password123").id
+    goal_id = create_goal(db, user_id=user_id, name="Shared Fund", target_amount=10_000.0).id
+    errors = []
+
+    def contribute(worker: int):
+        session = SessionLocal() # One session (and connection) per contributor, as per request
+        try:
+            for i in range(contributions_each):
+                assert update_goal_progress(session, goal_id, user_id, 0.01 * (worker + 1)) is not None
+        except Exception as error:
+            errors.append(error)
+        finally:
+            session.close()
+
+    try:
+        threads = [threading.Thread(target=contribute, args=(worker,)) for worker in range(contributors)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        assert not errors, errors
+        expected_minor = sum(worker + 1 for worker in range(contributors)) * contributions_each
+        goal = get_goal_by_id(db, goal_id, user_id)
+        assert goal.current_amount_minor == expected_minor, f"Lost updates: {goal.current_amount_minor} != {expected_minor}"
+        count, total = db.query(func.count(GoalContribution.id), func.sum(GoalContribution.amount_minor)).filter(
+            GoalContribution.goal_id == goal_id).one()
+        assert (count, total) == (contributors * contributions_each, expected_minor), "Ledger disagrees with the goal"
+        print(f"{count} contributions in {elapsed:.2f}s ({count / elapsed:,.0f}/s), total exact at {goal.current_amount:.2f}")
+    finally:
+        delete_test_user(db, test_username)
+        db.close()
+
 if __name__ == "__main__":
     run_goal_tests()
+    run_goal_contribution_concurrency_tests()
@@ -0,0 +1,113 @@
+import datetime
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, IdempotencyKey
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.idempotency_management import (
+    find_response, store_response, claim_request, complete_request, release_request, purge_expired_keys,
+    request_fingerprint, IdempotencyKeyReused, IdempotencyKeyInProgress
+)
+
+def assert_raises(error_type, fn, *args):
+    try:
+        fn(*args)
+    except error_type:
+        return
+    assert False, f"Expected {error_type.__name__}"
+
+def run_idempotency_tests():
+    print("Running idempotency key core logic tests...")
+    create_tables(engine)
+    db = SessionLocal()
+
+    test_username = "idempotency_user1"
+    existing_user = get_user_by_username(db, test_username)
+    if existing_user:
+        db.query(IdempotencyKey).filter(IdempotencyKey.user_id == existing_user.id).delete()
+        db.delete(existing_user)
+        db.commit()
+    user = create_user(db, username=test_username, password="idempotency_password123")
+    assert user is not None, "Test user setup failed."
+    user_id = user.id
+    fingerprint = request_fingerprint("POST /transactions/", b'{"amount": 5}')
+    assert fingerprint != request_fingerprint("POST /batch/", b'{"amount": 5}'), "The endpoint is part of the fingerprint"
+
+    try:
+        print("Testing a response stored with the write is replayed, and a key reused for another request is refused...")
+        assert find_response(db, user_id, "key-1", fingerprint) is None
+        store_response(db, user_id, "key-1", fingerprint, 201, '{"id": 7}')
+        db.rollback() # The request's write failed: its key goes with it
+        assert find_response(db, user_id, "key-1", fingerprint) is None
+        store_response(db, user_id, "key-1", fingerprint, 201, '{"id": 7}')
+        db.commit()
+        assert find_response(db, user_id, "key-1", fingerprint) == (201, '{"id": 7}')
+        assert_raises(IdempotencyKeyReused, find_response, db, user_id, "key-1", request_fingerprint("POST /transactions/", b"{}"))
+        assert_raises(IdempotencyKeyInProgress, store_response, db, user_id, "key-1", fingerprint, 201, '{"id": 8}')
+        assert find_response(db, user_id, "key-1", fingerprint) == (201, '{"id": 7}'), "The first response was overwritten"
+
+        print("Testing a retry is one unique index lookup, not a scan...")
+        statements = []
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            find_response(db, user_id, "key-1", fingerprint)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert len(statements) == 1, statements
+        plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statements[0],
+                                               (user_id, "key-1")).fetchall()
+        assert "ux_idempotency_keys_user_key" in str(plan), plan
+
+        print("Testing a claim holds its key until completed, and only its own token completes or releases it...")
+        token = claim_request(db, user_id, "key-2", fingerprint)
+        assert isinstance(token, str)
+        assert_raises(IdempotencyKeyInProgress, claim_request, db, user_id, "key-2", fingerprint)
+        assert_raises(IdempotencyKeyInProgress, find_response, db, user_id, "key-2", fingerprint)
+        release_request(db, user_id, "key-2", "0" * 32) # A stale request's release must not free another's claim
+        complete_request(db, user_id, "key-2", "0" * 32, 500, '{"stale": true}')
+        assert_raises(IdempotencyKeyInProgress, claim_request, db, user_id, "key-2", fingerprint)
+        release_request(db, user_id, "key-2", token)
+        retry_token = claim_request(db, user_id, "key-2", fingerprint)
+        assert isinstance(retry_token, str) and retry_token != token, "The released key could not be claimed again"
+        complete_request(db, user_id, "key-2", token, 500, '{"stale": true}') # The first request, finishing late
+        release_request(db, user_id, "key-2", token)
+        assert_raises(IdempotencyKeyInProgress, claim_request, db, user_id, "key-2", fingerprint)
+        complete_request(db, user_id, "key-2", retry_token, 200, '{"imported": 3}')
+        assert claim_request(db, user_id, "key-2", fingerprint) == (200, '{"imported": 3}')
+        release_request(db, user_id, "key-2", retry_token) # Completed: the token no longer holds anything
+        assert find_response(db, user_id, "key-2", fingerprint) == (200, '{"imported": 3}')
+
+        print("Testing claims are never taken over, but expired keys are free to reuse...")
+        now = datetime.datetime.utcnow()
+        claim_request(db, user_id, "key-3", fingerprint)
+        db.query(IdempotencyKey).filter_by(user_id=user_id, key="key-3").update(
+            {"created_at": now - datetime.timedelta(days=1, seconds=-1)}) # Its worker died mid-request
+        db.query(IdempotencyKey).filter_by(user_id=user_id, key="key-1").update(
+            {"expires_at": now - datetime.timedelta(seconds=1)})
+        db.commit()
+        assert_raises(IdempotencyKeyInProgress, claim_request, db, user_id, "key-3", fingerprint)
+        other = request_fingerprint("POST /transactions/", b'{"amount": 6}')
+        assert isinstance(claim_request(db, user_id, "key-1", other), str), "An expired key is free to reuse"
+
+        print("Testing keys are per user and the purge drops expired ones...")
+        other_user = create_user(db, username="idempotency_user2", password="idempotency_password123")
+        other_user_id = other_user.id
+        assert isinstance(claim_request(db, other_user_id, "key-1", fingerprint), str)
+        db.query(IdempotencyKey).filter_by(user_id=other_user_id).update({"expires_at": now - datetime.timedelta(seconds=1)})
+        db.commit()
+        assert purge_expired_keys(db) >= 1
+        assert db.query(IdempotencyKey).filter_by(user_id=other_user_id).count() == 0
+        assert db.query(IdempotencyKey).filter_by(user_id=user_id).count() == 3
+    finally:
+        for username in (test_username, "idempotency_user2"):
+            test_user = get_user_by_username(db, username)
+            if test_user:
+                db.query(IdempotencyKey).filter(IdempotencyKey.user_id == test_user.id).delete()
+                db.delete(test_user)
+        db.commit()
+        db.close()
+    print("Idempotency key tests completed successfully.")
+
+if __name__ == "__main__":
+    run_idempotency_tests()
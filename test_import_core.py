@@ -0,0 +1,121 @@
+import io
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.transaction_management import create_category, get_category_by_name, get_transactions_by_user
+from budget_planner.core.rollup_management import verify_monthly_rollups
+from budget_planner.core.import_management import import_transactions, detect_format
+
+CSV_DATA = """Date,Amount,Type,Category,Description
+2024-01-02,12.50,expense,Groceries,Corner shop
+2024-01-15,2000,income,Salary,January pay
+2024-01-20,-30.00,,Groceries,Market
+2024-02-01,45.00,expense,Books,Bookstore
+not-a-date,10,expense,Groceries,Broken row
+2024-02-03,abc,expense,Groceries,Bad amount
+2024-02-04,0,expense,Groceries,Zero amount
+"""
+
+OFX_DATA = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240305120000[-5:EST]
+<TRNAMT>-42.50
+<NAME>AMAZON MKTPLACE
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240301<TRNAMT>2000.00<NAME>Payroll</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF_DATA = """!Type:Bank
+D04/05/2024
+T-18.00
+PCinema
+LFun
+^
+D04/06'24
+T-7.25
+PBakery
+LGroceries
+^
+"""
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def run_import_tests():
+    print("Running bulk import core logic tests...")
+    create_tables(engine)
+    db = SessionLocal()
+
+    test_username = "import_user1"
+    cleanup_user(db, test_username)
+    user = create_user(db, username=test_username, password="import_password123")
+    assert user is not None, "Test user setup failed."
+    user_id = user.id
+    groceries = create_category(db, name="Groceries", user_id=user_id)
+    create_category(db, name="Salary", user_id=user_id)
+
+    print("Testing format detection...")
+    assert detect_format("bank.OFX") == "ofx" and detect_format("export.qfx") == "ofx"
+    assert detect_format("money.qif") == "qif" and detect_format("data.csv") == "csv" and detect_format(None) == "csv"
+
+    print("Testing CSV import without creating missing categories...")
+    report = import_transactions(db, user_id, io.StringIO(CSV_DATA), "csv", batch_size=2)
+    print(f"Report: {report}")
+    assert report["imported"] == 3, f"Expected 3 imported rows, got {report['imported']}"
+    assert report["failed"] == 4
+    assert [error["row"] for error in report["errors"]] == [5, 6, 7, 8]
+    assert "Unknown category 'Books'" in report["errors"][0]["error"]
+    assert report["created_categories"] == []
+
+    transactions = get_transactions_by_user(db, user_id)
+    assert len(transactions) == 3
+    market = next(tx for tx in transactions if tx.description == "Market")
+    assert market.type == TransactionType.EXPENSE and market.amount == 30.0 and market.category_id == groceries.id
+    assert verify_monthly_rollups(db, user_id) == []
+
+    print("Testing OFX import with a default category created on request...")
+    report = import_transactions(db, user_id, io.StringIO(OFX_DATA), "ofx",
+                                 create_missing_categories=True, default_category="Uncategorized")
+    assert report["imported"] == 2 and report["failed"] == 0, report
+    assert report["created_categories"] == ["Uncategorized"]
+
+    print("Testing QIF import maps categories case-insensitively...")
+    report = import_transactions(db, user_id, io.StringIO(QIF_DATA.replace("LGroceries", "Lgroceries")), "qif",
+                                 create_missing_categories=True)
+    assert report["imported"] == 2 and report["created_categories"] == ["Fun"], report
+    assert len(get_transactions_by_user(db, user_id)) == 7
+    assert verify_monthly_rollups(db, user_id) == []
+
+    print("Testing auto-categorization from past descriptions...")
+    fun = get_category_by_name(db, "Fun", user_id)
+    history_ofx = OFX_DATA.replace("AMAZON MKTPLACE", "CORNER  SHOP 0042").replace("Payroll", "cinema")
+    report = import_transactions(db, user_id, io.StringIO(history_ofx + OFX_DATA.replace("AMAZON MKTPLACE", "Hardware store")),
+                                 "ofx", default_category="Uncategorized", auto_categorize=True)
+    assert report["imported"] == 4 and report["auto_categorized"] == 3, report # Payroll was filed earlier too
+    imported = {tx.description: tx.category_id for tx in get_transactions_by_user(db, user_id)}
+    assert imported["CORNER  SHOP 0042"] == groceries.id and imported["cinema"] == fun.id, imported
+    uncategorized = get_category_by_name(db, "Uncategorized", user_id)
+    assert imported["Hardware store"] == uncategorized.id and imported["Payroll"] == uncategorized.id, imported
+    report = import_transactions(db, user_id, io.StringIO(history_ofx), "ofx", default_category="Uncategorized")
+    assert report["auto_categorized"] == 0, "Auto-categorization is opt-in"
+    assert verify_monthly_rollups(db, user_id) == []
+
+    print("Testing a file with missing required columns...")
+    report = import_transactions(db, user_id, io.StringIO("when,how much\n2024-01-01,5\n"), "csv")
+    assert report["imported"] == 0 and report["failed"] == 1 and "Missing required column" in report["errors"][0]["error"]
+
+    cleanup_user(db, test_username)
+    db.close()
+    print("Bulk import core logic tests completed successfully.")
+
+if __name__ == "__main__":
+    run_import_tests()
@@ -0,0 +1,135 @@
+import datetime
+from sqlalchemy import event, update
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, User, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username, bump_data_version
+from budget_planner.core.transaction_management import (
+    create_category, create_transaction, update_transaction, delete_transaction, update_category,
+    get_transactions_by_user, encode_transaction_cursor, summarize_transactions
+)
+from budget_planner.core.trend_analysis import get_monthly_summary, month_bounds
+from budget_planner.core.ledger_store import ledger_store, LedgerTransaction
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def listing_ids(db, user_id, **kwargs):
+    return [(tx.id, tx.date, tx.amount_minor, tx.description, tx.category.name)
+            for tx in get_transactions_by_user(db, user_id, **kwargs)]
+
+def orm_call(fn, *args, **kwargs):
+    budget = ledger_store.budget_bytes
+    ledger_store.budget_bytes = 0 # Disabled: served by the ORM query
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        ledger_store.budget_bytes = budget
+
+def orm_listing_ids(db, user_id, **kwargs):
+    return orm_call(listing_ids, db, user_id, **kwargs)
+
+def count_statements(run) -> int:
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return len(statements)
+
+def run_ledger_store_tests():
+    print("Running in-process ledger store tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    original_budget = ledger_store.budget_bytes
+    ledger_store.budget_bytes = 64 * 1024 * 1024
+    ledger_store.discard()
+    try:
+        for username in ("ledger_user1", "ledger_user2"):
+            cleanup_user(db, username)
+        user = create_user(db, username="ledger_user1", password="ledger_password123")
+        food = create_category(db, name="Food", user_id=user.id)
+        salary = create_category(db, name="Salary", user_id=user.id)
+        base = datetime.datetime(2024, 3, 1)
+        for i in range(30):
+            # Pairs of transactions share a date, so the id breaks ties
+            create_transaction(db, amount=1 + i, type=TransactionType.INCOME if i % 10 == 0 else TransactionType.EXPENSE,
+                               date=base + datetime.timedelta(days=i // 2 * 3), user_id=user.id,
+                               category_id=salary.id if i % 10 == 0 else food.id, description=f"tx {i % 4}")
+
+        print("Testing listings match the ORM query...")
+        stats = ledger_store.stats()
+        page = get_transactions_by_user(db, user.id, limit=7)
+        assert all(isinstance(tx, LedgerTransaction) for tx in page) and ledger_store.stats()["loads"] == stats["loads"] + 1
+        march, april = month_bounds(2024, 3), month_bounds(2024, 4)
+        for kwargs in ({}, {"skip": 5, "limit": 4}, {"limit": 0}, {"start_date": march[0], "end_date": march[1]},
+                       {"start_date": april[0], "limit": 3}, {"end_date": base + datetime.timedelta(days=3)},
+                       {"cursor": encode_transaction_cursor(page[-1]), "limit": 5},
+                       {"type": TransactionType.EXPENSE, "skip": 2, "limit": 5}, {"category_ids": [salary.id]},
+                       {"min_amount": 5, "max_amount": 20.5, "sort": "date_asc", "skip": 1},
+                       {"cursor": encode_transaction_cursor(page[-1], "date_asc"), "sort": "date_asc", "limit": 6},
+                       {"start_date": march[0], "end_date": march[1], "sort": "date_asc", "category_ids": [food.id]}):
+            assert listing_ids(db, user.id, **kwargs) == orm_listing_ids(db, user.id, **kwargs), kwargs
+        assert ledger_store.stats()["loads"] == stats["loads"] + 1
+
+        for kwargs in ({}, {"type": TransactionType.INCOME}, {"category_ids": [food.id], "min_amount": 10},
+                       {"start_date": march[0], "end_date": march[1], "max_amount": 15}):
+            assert summarize_transactions(db, user.id, **kwargs) == orm_call(summarize_transactions, db, user.id, **kwargs), kwargs
+
+        print("Testing a cached listing issues only the data version lookup...")
+        assert count_statements(lambda: get_transactions_by_user(db, user.id, limit=50)) == 1
+
+        print("Testing writes are applied to the loaded ledger...")
+        loads = ledger_store.stats()["loads"]
+        created = create_transaction(db, amount=99, type=TransactionType.EXPENSE, date=base + datetime.timedelta(days=4),
+                                     user_id=user.id, category_id=food.id, description="new")
+        update_transaction(db, page[0].id, user.id, amount=12.34, date=base - datetime.timedelta(days=1))
+        delete_transaction(db, page[1].id, user.id)
+        update_category(db, food.id, user.id, name="Groceries")
+        assert listing_ids(db, user.id) == orm_listing_ids(db, user.id)
+        assert ledger_store.stats()["loads"] == loads, "A write made in this process forced a reload"
+        assert any(row[0] == created.id and row[4] == "Groceries" for row in listing_ids(db, user.id))
+
+        print("Testing a write from another process is noticed through the data version...")
+        other_session = SessionLocal()
+        other_session.execute(update(Transaction).where(Transaction.id == created.id).values(description="changed elsewhere"))
+        bump_data_version(other_session, user.id)
+        other_session.commit()
+        other_session.close()
+        db.rollback() # A new request: fresh transaction, no identity-map state
+        assert listing_ids(db, user.id) == orm_listing_ids(db, user.id)
+        assert ledger_store.stats()["loads"] == loads + 1
+
+        print("Testing range summaries match the monthly summary...")
+        summary = ledger_store.read(db, user.id, lambda ledger: ledger.summarize(*march))
+        expected = get_monthly_summary(db, user.id, 2024, 3)
+        assert summary["total_income_minor"] == round(expected["total_income"] * 100)
+        assert summary["total_expenses_minor"] == round(expected["total_expenses"] * 100)
+        assert summary["expenses_by_category_minor"] == {name: round(total * 100) for name, total in expected["expenses_by_category"].items()}
+
+        print("Testing ledgers are evicted least recently used first under the memory budget...")
+        other = create_user(db, username="ledger_user2", password="ledger_password123")
+        other_food = create_category(db, name="Food", user_id=other.id)
+        create_transaction(db, amount=5, type=TransactionType.EXPENSE, date=base, user_id=other.id, category_id=other_food.id)
+        ledger_store.budget_bytes = ledger_store.stats()["bytes"] + 10 # Not enough for both ledgers
+        evictions = ledger_store.stats()["evictions"]
+        assert [row[0] for row in listing_ids(db, other.id)] == [row[0] for row in orm_listing_ids(db, other.id)]
+        assert ledger_store.stats()["evictions"] == evictions + 1 and ledger_store.stats()["users"] == 1
+    finally:
+        ledger_store.budget_bytes = original_budget
+        ledger_store.discard()
+        for username in ("ledger_user1", "ledger_user2"):
+            cleanup_user(db, username)
+        db.close()
+    print("In-process ledger store tests completed successfully.")
+
+if __name__ == "__main__":
+    run_ledger_store_tests()
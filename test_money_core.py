@@ -0,0 +1,103 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+from sqlalchemy import create_engine, inspect
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, migrate_money_columns, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.money import to_minor, to_major, normalize_currency
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.transaction_management import create_category, create_transaction
+from budget_planner.core.trend_analysis import get_monthly_summary
+
+# Schema of the money tables before amounts were stored as integer cents
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL, password_hash VARCHAR NOT NULL);
+CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, user_id INTEGER NOT NULL);
+CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, type VARCHAR(7) NOT NULL,
+    date DATETIME NOT NULL, description VARCHAR, category_id INTEGER NOT NULL, user_id INTEGER NOT NULL);
+CREATE TABLE goals (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, target_amount FLOAT NOT NULL,
+    current_amount FLOAT NOT NULL, target_date DATETIME, creation_date DATETIME NOT NULL, user_id INTEGER NOT NULL);
+INSERT INTO users VALUES (1, 'legacy', 'x');
+INSERT INTO categories VALUES (1, 'Food', 1);
+INSERT INTO transactions VALUES (1, 19.99, 'EXPENSE', '2024-01-05 00:00:00', NULL, 1, 1);
+INSERT INTO transactions VALUES (2, 0.3, 'EXPENSE', '2024-01-06 00:00:00', NULL, 1, 1);
+INSERT INTO goals VALUES (1, 'Bike', 1000.1, 250.05, NULL, '2024-01-01 00:00:00', 1);
+"""
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def run_money_tests():
+    print("Running money representation tests...")
+
+    print("Testing conversions to and from integer cents...")
+    assert to_minor(0.1) == 10 and to_minor("19.99") == 1999 and to_minor(2000) == 200000
+    assert to_minor(1.005) == 101 and to_minor(0.004) == 0 # Half up on the decimal value, not the binary float
+    assert to_major(1999) == 19.99 and to_major(10) == 0.1
+    assert normalize_currency(None) == "USD" and normalize_currency("eur") == "EUR"
+    try:
+        normalize_currency("E$R")
+        assert False, "Malformed currency code was accepted"
+    except ValueError:
+        pass
+
+    print("Testing monthly totals are exact...")
+    create_tables(engine)
+    db = SessionLocal()
+    test_username = "money_user1"
+    cleanup_user(db, test_username)
+    user = create_user(db, username=test_username, password="money_password123")
+    food = create_category(db, name="Food", user_id=user.id)
+    day = datetime.datetime(2023, 3, 10)
+    for _ in range(10):
+        create_transaction(db, amount=0.1, type=TransactionType.EXPENSE, date=day, user_id=user.id, category_id=food.id)
+    tx = create_transaction(db, amount=0.2, type=TransactionType.INCOME, date=day, user_id=user.id,
+                            category_id=food.id, currency="eur")
+    assert tx.amount_minor == 20 and tx.amount == 0.2 and tx.currency == "EUR"
+    summary = get_monthly_summary(db, user.id, 2023, 3)
+    # Summing ten float 0.1s gives 0.9999999999999999
+    assert summary["total_expenses"] == 1.0 and summary["expenses_by_category"] == {"Food": 1.0}, summary
+    assert summary["net_savings"] == -0.8, summary
+    cleanup_user(db, test_username)
+    db.close()
+
+    print("Testing the migration of a database with float amounts...")
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="budget_money_test_")
+    os.close(fd)
+    connection = sqlite3.connect(db_path)
+    connection.executescript(LEGACY_SCHEMA)
+    connection.close()
+    legacy_engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        applied = migrate_money_columns(legacy_engine)
+        assert "transactions.amount -> transactions.amount_minor" in applied and "goals.currency" in applied, applied
+        assert migrate_money_columns(legacy_engine) == [], "Migration is not idempotent"
+        create_tables(legacy_engine)
+        columns = {column["name"] for column in inspect(legacy_engine).get_columns("transactions")}
+        assert "amount" not in columns and {"amount_minor", "currency"} <= columns
+        assert "data_version" in {column["name"] for column in inspect(legacy_engine).get_columns("users")}
+        with legacy_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT amount_minor, currency FROM transactions ORDER BY id").all() == \
+                [(1999, "USD"), (30, "USD")]
+            assert conn.exec_driver_sql("SELECT target_amount_minor, current_amount_minor FROM goals").one() == (100010, 25005)
+            # The rollup table is new to this database: filled from its transactions, not left empty
+            assert conn.exec_driver_sql("SELECT user_id, year, month, type, category_id, total_amount_minor, transaction_count "
+                                        "FROM monthly_rollups").all() == [(1, 2024, 1, "EXPENSE", 1, 2029, 2)]
+        create_tables(legacy_engine)
+        with legacy_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM monthly_rollups").scalar() == 1, "The backfill ran twice"
+    finally:
+        legacy_engine.dispose()
+        os.remove(db_path)
+
+    print("Money representation tests completed successfully.")
+
+if __name__ == "__main__":
+    run_money_tests()
@@ -0,0 +1,88 @@
+import datetime
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.transaction_management import create_category, create_transaction
+from budget_planner.core.trend_analysis import get_monthly_summary
+from budget_planner.core.report_analysis import get_analytics_report, load_ledger
+
+TODAY = datetime.date(2024, 6, 15)
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def run_report_tests():
+    print("Running vectorized analytics report tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    cleanup_user(db, "report_user1")
+    cleanup_user(db, "report_user2")
+    user = create_user(db, username="report_user1", password="report_password123")
+    other = create_user(db, username="report_user2", password="report_password123")
+    salary = create_category(db, name="Salary", user_id=user.id)
+    food = create_category(db, name="Food", user_id=user.id)
+    rent = create_category(db, name="Rent", user_id=user.id)
+    fun = create_category(db, name="Fun", user_id=user.id)
+    other_food = create_category(db, name="Food", user_id=other.id)
+
+    def add(amount, type, date, category):
+        create_transaction(db, amount=amount, type=type, date=date, user_id=category.user_id, category_id=category.id)
+    add(100, TransactionType.EXPENSE, datetime.datetime(2023, 6, 10), food) # Warm-up only: base of the year-over-year delta
+    add(1000, TransactionType.INCOME, datetime.datetime(2024, 4, 1), salary)
+    add(100, TransactionType.EXPENSE, datetime.datetime(2024, 4, 3), food)
+    add(500, TransactionType.EXPENSE, datetime.datetime(2024, 4, 2), rent)
+    add(1000, TransactionType.INCOME, datetime.datetime(2024, 5, 1), salary)
+    add(200, TransactionType.EXPENSE, datetime.datetime(2024, 5, 31, 23, 59), food)
+    add(2000, TransactionType.INCOME, datetime.datetime(2024, 6, 1), salary)
+    add(300, TransactionType.EXPENSE, datetime.datetime(2024, 6, 1, 0, 0), food)
+    add(20, TransactionType.EXPENSE, datetime.datetime(2024, 6, 20), fun)
+    add(30, TransactionType.EXPENSE, datetime.datetime(2024, 6, 30, 23, 59, 59), fun)
+    add(999, TransactionType.EXPENSE, datetime.datetime(2024, 7, 1), food) # After the reported window
+    add(777, TransactionType.EXPENSE, datetime.datetime(2024, 6, 5), other_food) # Another user
+
+    print("Testing the ledger loads only the user's rollup rows in range...")
+    ledger = load_ledger(db, user.id, (2023, 6), (2024, 6))
+    assert len(ledger) == 9 and ledger["amount_minor"].sum() == 525000, ledger
+    assert ledger["income"].sum() == 3
+    assert ledger["amount_minor"][(ledger["month"] == (2024 - 1970) * 12 + 5) & (ledger["category_id"] == fun.id)] == 5000
+
+    print("Testing monthly series, rolling averages and year-over-year deltas...")
+    report = get_analytics_report(db, user.id, period_count=3, today=TODAY)
+    months = report["months"]
+    assert [(m["year"], m["month"]) for m in months] == [(2024, 4), (2024, 5), (2024, 6)]
+    for entry in months: # Same totals as the SQL summaries
+        summary = get_monthly_summary(db, user.id, entry["year"], entry["month"])
+        assert (entry["total_income"], entry["total_expenses"]) == (summary["total_income"], summary["total_expenses"])
+    june = months[-1]
+    assert june["total_income"] == 2000 and june["total_expenses"] == 350 and june["net_savings"] == 1650
+    assert [m["cumulative_savings"] for m in months] == [400, 1200, 2850]
+    assert june["savings_rate"] == 82.5
+    assert june["rolling_expenses"] == {"3": 383.33, "6": 191.67, "12": 95.83}, june["rolling_expenses"]
+    assert june["yoy_expenses_delta"] == 250 and june["yoy_expenses_change_pct"] == 250
+    assert months[0]["yoy_expenses_delta"] == 600 and months[0]["yoy_expenses_change_pct"] is None # No spend a year before
+
+    print("Testing per-category percentiles of monthly spend...")
+    categories = report["categories"]
+    assert [c["name"] for c in categories] == ["Food", "Rent", "Fun"]
+    assert categories[0]["total_expenses"] == 600
+    assert categories[0]["monthly_percentiles"] == {"p50": 200, "p75": 250, "p90": 280}
+    assert categories[1]["monthly_percentiles"] == {"p50": 0, "p75": 250, "p90": 400}
+
+    print("Testing a user without transactions gets an all-zero report...")
+    empty = get_analytics_report(db, other.id, period_count=2, today=datetime.date(2000, 1, 1))
+    assert [m["total_expenses"] for m in empty["months"]] == [0, 0] and empty["categories"] == []
+    assert empty["months"][0]["savings_rate"] is None
+
+    cleanup_user(db, "report_user1")
+    cleanup_user(db, "report_user2")
+    db.close()
+    print("Vectorized analytics report tests completed successfully.")
+
+if __name__ == "__main__":
+    run_report_tests()
@@ -0,0 +1,101 @@
+import datetime
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, Category, Transaction, TransactionType, MonthlyRollup
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.transaction_management import (
+    create_category, create_transaction, update_transaction, delete_transaction
+)
+from budget_planner.core.suggestion_index import (
+    suggestion_store, suggest_descriptions, get_category_map, match_category, load_description_index, DescriptionIndex
+)
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+
+def count_statements(run) -> int:
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return len(statements)
+
+def run_description_index_tests():
+    print("Running description index unit tests...")
+    index = DescriptionIndex(user_id=1, version=0)
+    for description, category_id, uses in (("Amazon Prime", 1, 3), ("amazon  prime", 2, 1), ("Amazon Fresh", 3, 5),
+                                           ("Aldi", 3, 2), ("  ", 1, 1), (None, 1, 1), ("Bakery", 3, 1)):
+        index.add(description, category_id, uses)
+    assert index.keys == ["aldi", "amazon fresh", "amazon prime", "bakery"], index.keys
+    assert index.suggest("am") == [
+        {"description": "Amazon Fresh", "category_id": 3, "uses": 5},
+        {"description": "amazon prime", "category_id": 1, "uses": 4}, # Latest spelling, most frequent category
+    ]
+    assert [s["description"] for s in index.suggest("A", limit=2)] == ["Amazon Fresh", "amazon prime"]
+    assert index.suggest("AMAZON P")[0]["uses"] == 4 and index.suggest("x") == [] and index.suggest(" ") == []
+
+    print("Testing incremental removal and category ties...")
+    index.add("Amazon Prime", 1, -2)
+    assert index.suggest("amazon p")[0]["category_id"] == 2, "Equal counts go to the most recently used category"
+    index.add("Bakery", 3, -1)
+    assert "bakery" not in index.keys and index.suggest("b") == []
+    assert match_category(index.category_map(), "AMAZON FRESH  order 1234") == 3
+    assert match_category(index.category_map(), "Amazon") is None and match_category({}, "Aldi") is None
+    print("Description index unit tests completed successfully.")
+
+def run_suggestion_store_tests():
+    print("Running description suggestion store tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    suggestion_store.discard()
+    try:
+        cleanup_user(db, "suggest_user1")
+        user = create_user(db, username="suggest_user1", password="suggest_password123")
+        food = create_category(db, name="Food", user_id=user.id)
+        fun = create_category(db, name="Fun", user_id=user.id)
+        date = datetime.datetime(2024, 6, 1)
+        def add(description, category):
+            return create_transaction(db, amount=5, type=TransactionType.EXPENSE, date=date, user_id=user.id,
+                                      category_id=category.id, description=description)
+        for description, category in (("Cinema", fun), ("Cafe Nero", food), ("Cafe Nero", food), ("Cafe Nero", fun),
+                                      ("Cafeteria", food), ("Corner shop", food)):
+            add(description, category)
+
+        print("Testing suggestions match a fresh load and cost one lookup when cached...")
+        assert [s["description"] for s in suggest_descriptions(db, user.id, "caf")] == ["Cafe Nero", "Cafeteria"]
+        assert suggest_descriptions(db, user.id, "cafe n")[0] == {"description": "Cafe Nero", "category_id": food.id, "uses": 3}
+        assert count_statements(lambda: suggest_descriptions(db, user.id, "c")) == 1
+
+        print("Testing writes update the loaded index without a reload...")
+        loads = suggestion_store.stats()["loads"]
+        pizza = add("Pizza place", food)
+        cinema = db.query(Transaction).filter_by(user_id=user.id, description="Cinema").one()
+        update_transaction(db, cinema.id, user.id, description="Cinema City", category_id=food.id)
+        nero = db.query(Transaction).filter_by(user_id=user.id, description="Cafe Nero", category_id=food.id).first()
+        update_transaction(db, nero.id, user.id, category_id=fun.id) # Nero is now 2 fun, 1 food
+        delete_transaction(db, pizza.id, user.id)
+        cached = suggestion_store.read(db, user.id, lambda index: (index.keys[:], index.category_map()))
+        assert suggestion_store.stats()["loads"] == loads, "A write made in this process forced a reload"
+        fresh = load_description_index(db, user.id, 0)
+        assert cached == (fresh.keys, fresh.category_map()), (cached, fresh.keys)
+        assert cached[1]["cafe nero"] == fun.id and "cinema" not in cached[1] and "pizza place" not in cached[1]
+        assert match_category(get_category_map(db, user.id), "Cinema City 2") == food.id
+    finally:
+        suggestion_store.discard()
+        cleanup_user(db, "suggest_user1")
+        db.close()
+    print("Description suggestion store tests completed successfully.")
+
+if __name__ == "__main__":
+    run_description_index_tests()
+    run_suggestion_store_tests()
@@ -0,0 +1,139 @@
+import datetime
+import io
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import (create_tables, Category, Goal, Transaction, TransactionType, MonthlyRollup,
+                                              Tombstone, User)
+from budget_planner.core.user_management import create_user, get_user_by_username, get_data_version
+from budget_planner.core.transaction_management import (
+    create_category, update_category, delete_category, create_transaction, update_transaction, delete_transaction
+)
+from budget_planner.core.goal_management import create_goal, update_goal_progress, delete_goal
+from budget_planner.core.import_management import import_transactions
+from budget_planner.core.batch_management import apply_batch
+from budget_planner.core.sync_management import get_changes
+
+def cleanup_user(db, username):
+    user = get_user_by_username(db, username)
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Goal).filter(Goal.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.query(Tombstone).filter(Tombstone.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+    # Other test scripts delete their users without their tombstones; drop those orphans so a reused user id
+    # does not inherit them
+    db.query(Tombstone).filter(~Tombstone.user_id.in_(db.query(User.id))).delete(synchronize_session=False)
+    db.commit()
+
+def ids(changes):
+    """The ids in a get_changes result, per entity, for comparisons."""
+    return {entity: [row.id for row in changes[entity]] for entity in ("categories", "transactions", "goals")}
+
+def count_statements(run):
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        return run(), len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+def run_sync_tests():
+    print("Running delta sync tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    try:
+        cleanup_user(db, "sync_user1")
+        user = create_user(db, username="sync_user1", password="sync_password123")
+        user_id = user.id
+        date = datetime.datetime(2024, 4, 2)
+        food = create_category(db, name="Food", user_id=user_id)
+        food_id = food.id
+        tx_ids = [create_transaction(db, amount=i + 1, type=TransactionType.EXPENSE, date=date, user_id=user_id,
+                                     category_id=food_id).id for i in range(5)]
+        goal_id = create_goal(db, user_id=user_id, name="Bike", target_amount=400).id
+
+        print("Testing since=0 returns a full snapshot and the cursor...")
+        full = get_changes(db, user_id)
+        assert full["full"] and full["cursor"] == get_data_version(db, user_id)
+        assert ids(full) == {"categories": [food_id], "transactions": tx_ids, "goals": [goal_id]}
+        assert full["transactions"][0].category.name == "Food"
+        assert get_changes(db, user_id, full["cursor"])["transactions"] == [], "Nothing changed since the cursor"
+        assert get_changes(db, 10 ** 9) is None
+
+        print("Testing a snapshot is paged at one cursor and can be limited to some entities...")
+        pages = [get_changes(db, user_id, page_size=2)]
+        while pages[-1]["next_page"]:
+            create_transaction(db, amount=1, type=TransactionType.EXPENSE, date=date, user_id=user_id, category_id=food_id)
+            pages.append(get_changes(db, user_id, page=pages[-1]["next_page"], page_size=2))
+        assert all(page["cursor"] == full["cursor"] for page in pages), "Writes between pages wait for the next delta"
+        assert [row_id for page in pages for row_id in ids(page)["transactions"]] == tx_ids
+        assert [ids(page) for page in pages[:2]] == [{"categories": [food_id], "transactions": tx_ids[:1], "goals": []},
+                                                     {"categories": [], "transactions": tx_ids[1:3], "goals": []}]
+        assert ids(pages[-1])["goals"] == [goal_id]
+        late = get_changes(db, user_id, full["cursor"])
+        assert len(late["transactions"]) == len(pages) - 1
+        for tx in late["transactions"]:
+            delete_transaction(db, tx.id, user_id)
+        only = get_changes(db, user_id, entities=["categories", "goals"])
+        assert ids(only) == {"categories": [food_id], "transactions": [], "goals": [goal_id]} and only["next_page"] is None
+        assert get_changes(db, user_id, full["cursor"], entities=["goals"])["deleted"]["transactions"] == []
+        for page in ("not-a-page", "MXw5fDA"): # Garbage, and an entity index out of range
+            try:
+                get_changes(db, user_id, page=page)
+                raise AssertionError(f"Accepted the page {page!r}")
+            except ValueError:
+                pass
+        full = get_changes(db, user_id)
+
+        print("Testing every write path stamps the rows it changes...")
+        cursor = full["cursor"]
+        update_transaction(db, tx_ids[1], user_id, amount=20)
+        delete_transaction(db, tx_ids[2], user_id)
+        new_tx = create_transaction(db, amount=7, type=TransactionType.INCOME, date=date, user_id=user_id, category_id=food_id).id
+        update_goal_progress(db, goal_id, user_id, 50)
+        fun_id = create_category(db, name="Fun", user_id=user_id).id
+        update_category(db, food_id, user_id, name="Groceries")
+        changes = get_changes(db, user_id, cursor)
+        assert not changes["full"] and changes["cursor"] == cursor + 6
+        assert ids(changes) == {"categories": [food_id, fun_id], "transactions": [tx_ids[1], new_tx], "goals": [goal_id]}, ids(changes)
+        assert changes["deleted"] == {"categories": [], "transactions": [tx_ids[2]], "goals": []}
+        assert changes["goals"][0].progress_percentage == 12.5
+
+        print("Testing deletes leave tombstones and a row created then deleted is only a tombstone...")
+        cursor = changes["cursor"]
+        delete_category(db, fun_id, user_id)
+        delete_goal(db, goal_id, user_id)
+        short_lived = create_transaction(db, amount=1, type=TransactionType.EXPENSE, date=date, user_id=user_id, category_id=food_id).id
+        delete_transaction(db, short_lived, user_id)
+        changes = get_changes(db, user_id, cursor)
+        assert ids(changes) == {"categories": [], "transactions": [], "goals": []}
+        assert changes["deleted"] == {"categories": [fun_id], "transactions": [short_lived], "goals": [goal_id]}
+
+        print("Testing imports and batches are stamped too...")
+        cursor = changes["cursor"]
+        import_transactions(db, user_id, io.StringIO("date,amount,category\n2024-04-05,-3.50,Travel\n"),
+                            create_missing_categories=True)
+        report = apply_batch(db, user_id, [{"action": "delete", "entity": "transaction", "id": tx_ids[0]},
+                                           {"action": "update", "entity": "transaction", "id": tx_ids[3], "data": {"amount": 9}}])
+        assert report["committed"]
+        changes = get_changes(db, user_id, cursor)
+        travel_id = db.query(Category.id).filter_by(user_id=user_id, name="Travel").scalar()
+        assert [c.id for c in changes["categories"]] == [travel_id]
+        assert len(changes["transactions"]) == 2 and tx_ids[3] in ids(changes)["transactions"]
+        assert changes["deleted"]["transactions"] == [tx_ids[0]] and changes["cursor"] == cursor + 2
+
+        print("Testing a delta costs the same few statements whatever the data size...")
+        _, statements = count_statements(lambda: get_changes(db, user_id, changes["cursor"]))
+        assert statements == 5, f"{statements} statements" # Version, categories, transactions, goals, tombstones
+    finally:
+        cleanup_user(db, "sync_user1")
+        db.close()
+    print("Delta sync tests completed successfully.")
+
+if __name__ == "__main__":
+    run_sync_tests()
@@ -0,0 +1,87 @@
+import datetime
+from sqlalchemy import event
+from budget_planner.models.database import SessionLocal, engine
+from budget_planner.models.data_models import create_tables, RevokedToken
+from budget_planner.core.user_management import create_user, get_user_by_username
+from budget_planner.core.token_management import (
+    create_access_token, decode_access_token, revoke_token, revocation_list, InvalidTokenError
+)
+
+def assert_rejected(token: str, reason: str):
+    try:
+        decode_access_token(token)
+    except InvalidTokenError as error:
+        assert reason in str(error), f"Expected '{reason}', got '{error}'"
+        return
+    assert False, f"Token should have been rejected ({reason})"
+
+def run_token_tests():
+    print("Running access token core logic tests...")
+    create_tables(engine)
+    db = SessionLocal()
+
+    test_username = "token_user1"
+    existing_user = get_user_by_username(db, test_username)
+    if existing_user:
+        db.query(RevokedToken).filter(RevokedToken.user_id == existing_user.id).delete()
+        db.delete(existing_user)
+        db.commit()
+    user = create_user(db, username=test_username, password="token_password123")
+    assert user is not None, "Test user setup failed."
+
+    print("Testing token round trip...")
+    token = create_access_token(user.id, user.username)
+    claims = decode_access_token(token)
+    assert claims["sub"] == user.id and claims["name"] == test_username
+    assert claims["exp"] > claims["iat"] and claims["jti"]
+
+    print("Testing tampered, malformed and expired tokens are rejected...")
+    header, payload, signature = token.split(".")
+    other_claims = create_access_token(user.id + 1, "someone_else").split(".")[1]
+    assert_rejected(f"{header}.{other_claims}.{signature}", "signature")
+    assert_rejected("garbage", "Malformed")
+    assert_rejected(create_access_token(user.id, user.username, ttl_seconds=-1), "expired")
+
+    print("Testing revocation is applied locally and reloaded from the table...")
+    revoke_token(db, claims)
+    assert_rejected(token, "revoked")
+    assert db.get(RevokedToken, claims["jti"]) is not None
+    revocation_list.refresh(db) # Simulates another worker picking up the revocation
+    assert_rejected(token, "revoked")
+    assert decode_access_token(create_access_token(user.id, user.username))["sub"] == user.id
+
+    print("Testing refresh is read-only and skips expired revocations, which revoking purges...")
+    db.add(RevokedToken(jti="expired-jti", user_id=user.id, expires_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=1)))
+    db.commit()
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        revocation_list.refresh(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert [statement.split()[0] for statement in statements] == ["SELECT"], statements
+    assert not revocation_list.is_revoked("expired-jti") and db.get(RevokedToken, "expired-jti") is not None
+    revoke_token(db, decode_access_token(create_access_token(user.id, user.username)))
+    assert db.get(RevokedToken, "expired-jti") is None
+
+    print("Testing a refresh already in progress is not waited on...")
+    revocation_list._refreshing.acquire() # As if another request were suspended mid-refresh
+    try:
+        loaded_at = revocation_list._loaded_at
+        revocation_list.refresh(db) # Must return at once instead of blocking (the event loop, in async mode)
+        assert revocation_list._loaded_at == loaded_at
+        revocation_list.add("added-meanwhile")
+        assert revocation_list.is_revoked("added-meanwhile")
+    finally:
+        revocation_list._refreshing.release()
+
+    db.query(RevokedToken).filter(RevokedToken.user_id == user.id).delete()
+    db.delete(user)
+    db.commit()
+    db.close()
+    print("Access token core logic tests completed successfully.")
+
+if __name__ == "__main__":
+    run_token_tests()
@@ -1,11 +1,17 @@
 import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+import os
+import tempfile
 from budget_planner.models.database import SessionLocal, engine
-from budget_planner.models.data_models import create_tables, User, Category, Transaction, TransactionType
+from budget_planner.models.data_models import create_tables, SEARCH_INDEX_TABLE, User, Category, Transaction, TransactionType, MonthlyRollup
 from budget_planner.core.user_management import create_user, get_user_by_username # For test setup
 from budget_planner.core.transaction_management import (
     create_category, get_categories_by_user, get_category_by_name, update_category, delete_category, get_category_by_id,
-    create_transaction, get_transactions_by_user, get_transaction_by_id, update_transaction, delete_transaction
+    create_transaction, get_transactions_by_user, get_transaction_by_id, update_transaction, delete_transaction,
+    encode_transaction_cursor, summarize_transactions, search_transactions
 )
+from budget_planner.core.rollup_management import verify_monthly_rollups
 
 def run_transaction_tests():
     print("Running transaction and category management core logic tests...")
@@ -19,6 +25,7 @@ def run_transaction_tests():
     user = get_user_by_username(db, test_username)
     if user: # Clean up existing user and their data for idempotency
         db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
         db.query(Category).filter(Category.user_id == user.id).delete()
         db.delete(user)
         db.commit()
@@ -98,6 +105,19 @@ def run_transaction_tests():
     assert user_txs[1].id == tx1.id
     print("Transactions fetched.")
 
+    print("Testing cursor pagination...")
+    first_page = get_transactions_by_user(db, user_id=user_id, limit=1)
+    assert [tx.id for tx in first_page] == [tx2.id]
+    second_page = get_transactions_by_user(db, user_id=user_id, limit=1, cursor=encode_transaction_cursor(first_page[0]))
+    assert [tx.id for tx in second_page] == [tx1.id]
+    assert get_transactions_by_user(db, user_id=user_id, limit=1, cursor=encode_transaction_cursor(second_page[0])) == []
+    try:
+        get_transactions_by_user(db, user_id=user_id, cursor="not-a-cursor")
+        assert False, "Malformed cursor should raise ValueError"
+    except ValueError:
+        pass
+    print("Cursor pagination works.")
+
     print("Testing fetching transaction by ID...")
     fetched_tx = get_transaction_by_id(db, transaction_id=tx1.id, user_id=user_id)
     assert fetched_tx is not None and fetched_tx.description == "Weekly shopping"
@@ -109,6 +129,18 @@ def run_transaction_tests():
     assert get_transaction_by_id(db, tx1.id, user_id).amount == 55.0
     print("Transaction updated.")
 
+    print("Testing monthly rollup follows moves between months and categories...")
+    assert verify_monthly_rollups(db, user_id) == []
+    moved_tx = update_transaction(db, transaction_id=tx1.id, user_id=user_id,
+                                  date=tx1_date - datetime.timedelta(days=62), category_id=cat2.id)
+    assert moved_tx is not None and moved_tx.category_id == cat2.id
+    assert verify_monthly_rollups(db, user_id) == []
+    update_transaction(db, transaction_id=tx1.id, user_id=user_id, date=tx1_date, category_id=cat1.id)
+    assert verify_monthly_rollups(db, user_id) == []
+    rollup_rows = db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user_id).all()
+    assert sum(row.transaction_count for row in rollup_rows) == 2, "Rollup should count exactly the 2 transactions"
+    print("Monthly rollup kept consistent.")
+
     print("Testing transaction update with category change to invalid category...")
     fail_update_tx = update_transaction(db, transaction_id=tx1.id, user_id=user_id, category_id=other_cat.id)
     assert fail_update_tx is None, "Transaction update to invalid category should fail"
@@ -121,6 +153,7 @@ def run_transaction_tests():
     assert del_tx_result is True, "Transaction deletion failed"
     assert get_transaction_by_id(db, tx1.id, user_id) is None, "Deleted transaction still found"
     assert len(get_transactions_by_user(db, user_id=user_id)) == 1
+    assert verify_monthly_rollups(db, user_id) == []
     print("Transaction deleted.")
 
     print("Testing category deletion (with linked transaction - should fail)...")
@@ -159,5 +192,181 @@ def run_transaction_tests():
     db.close()
     print("Transaction and category management core logic tests completed successfully.")
 
+def run_transaction_filter_tests():
+    print("Running transaction listing filter and sort tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    user = get_user_by_username(db, "tx_filter_user")
+    if user:
+        db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+        db.query(Category).filter(Category.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+    user = create_user(db, username="tx_filter_user", password="tx_password123")
+    food = create_category(db, name="Food", user_id=user.id)
+    rent = create_category(db, name="Rent", user_id=user.id)
+    salary = create_category(db, name="Salary", user_id=user.id)
+    base = datetime.datetime(2024, 5, 1)
+    rows = [] # (amount, type, day, category)
+    for i in range(12):
+        category = (food, rent, salary)[i % 3]
+        tx_type = TransactionType.INCOME if category is salary else TransactionType.EXPENSE
+        rows.append(create_transaction(db, amount=10 + (i * 7) % 25, type=tx_type, date=base + datetime.timedelta(days=i // 2),
+                                       user_id=user.id, category_id=category.id))
+
+    def ids(**kwargs):
+        return [tx.id for tx in get_transactions_by_user(db, user.id, **kwargs)]
+
+    def expected(predicate, key, reverse):
+        return [tx.id for tx in sorted((tx for tx in rows if predicate(tx)), key=lambda tx: (key(tx), tx.id), reverse=reverse)]
+
+    print("Testing filters...")
+    assert ids(type=TransactionType.INCOME) == expected(lambda tx: tx.type == TransactionType.INCOME, lambda tx: tx.date, True)
+    assert ids(category_ids=[food.id, rent.id]) == expected(lambda tx: tx.category_id != salary.id, lambda tx: tx.date, True)
+    assert ids(min_amount=15, max_amount=25.5) == expected(lambda tx: 15 <= tx.amount <= 25.5, lambda tx: tx.date, True)
+    start, end = base + datetime.timedelta(days=1), base + datetime.timedelta(days=4)
+    assert ids(start_date=start, end_date=end, category_ids=[food.id]) == expected(
+        lambda tx: start <= tx.date < end and tx.category_id == food.id, lambda tx: tx.date, True)
+
+    print("Testing sort orders and cursor paging in each...")
+    for sort, key, reverse in (("date_desc", lambda tx: tx.date, True), ("date_asc", lambda tx: tx.date, False),
+                               ("amount_desc", lambda tx: tx.amount_minor, True), ("amount_asc", lambda tx: tx.amount_minor, False)):
+        full = expected(lambda tx: tx.type == TransactionType.EXPENSE, key, reverse)
+        assert ids(sort=sort, type=TransactionType.EXPENSE) == full, sort
+        assert ids(sort=sort, type=TransactionType.EXPENSE, skip=3, limit=2) == full[3:5], sort
+        paged, cursor = [], None
+        while True:
+            page = get_transactions_by_user(db, user.id, limit=3, cursor=cursor, sort=sort, type=TransactionType.EXPENSE)
+            paged += [tx.id for tx in page]
+            if len(page) < 3:
+                break
+            cursor = encode_transaction_cursor(page[-1], sort)
+        assert paged == full, sort
+    try:
+        get_transactions_by_user(db, user.id, sort="description")
+        assert False, "An unknown sort should raise ValueError"
+    except ValueError:
+        pass
+    try: # A date cursor is not valid for an amount sort
+        get_transactions_by_user(db, user.id, sort="amount_desc", cursor=encode_transaction_cursor(rows[0]))
+        assert False, "A cursor from another sort should raise ValueError"
+    except ValueError:
+        pass
+
+    print("Testing totals over all matching rows...")
+    totals = summarize_transactions(db, user.id, category_ids=[food.id, salary.id], min_amount=12)
+    matching = [tx for tx in rows if tx.category_id in (food.id, salary.id) and tx.amount >= 12]
+    assert totals == {
+        "transaction_count": len(matching),
+        "total_income_minor": sum(tx.amount_minor for tx in matching if tx.type == TransactionType.INCOME),
+        "total_expenses_minor": sum(tx.amount_minor for tx in matching if tx.type == TransactionType.EXPENSE),
+    }, totals
+    assert summarize_transactions(db, user.id, type=TransactionType.INCOME, max_amount=1)["transaction_count"] == 0
+
+    print("Testing category and amount filters are index seeks...")
+    for sql, params in (
+        ("SELECT id FROM transactions WHERE user_id = :u AND category_id IN (:a, :b) ORDER BY date DESC", {"a": food.id, "b": rent.id}),
+        ("SELECT id FROM transactions WHERE user_id = :u AND amount_minor BETWEEN 1000 AND 2000 ORDER BY amount_minor DESC, id DESC", {}),
+    ):
+        plan = " ".join(str(row[-1]) for row in db.execute(text("EXPLAIN QUERY PLAN " + sql), dict(params, u=user.id)))
+        assert "SCAN transactions" not in plan, plan
+
+    db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+    db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+    db.query(Category).filter(Category.user_id == user.id).delete()
+    db.delete(user)
+    db.commit()
+    db.close()
+    print("Transaction listing filter and sort tests completed successfully.")
+
+def run_transaction_search_tests():
+    print("Running transaction full-text search tests...")
+    create_tables(engine)
+    db = SessionLocal()
+    for username in ("tx_search_user1", "tx_search_user2"):
+        user = get_user_by_username(db, username)
+        if user:
+            db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+            db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
+            db.query(Category).filter(Category.user_id == user.id).delete()
+            db.delete(user)
+            db.commit()
+    user = create_user(db, username="tx_search_user1", password="tx_password123")
+    other = create_user(db, username="tx_search_user2", password="tx_password123")
+    shop = create_category(db, name="Shopping", user_id=user.id)
+    other_shop = create_category(db, name="Shopping", user_id=other.id)
+    date = datetime.datetime(2024, 2, 1)
+
+    def add(description, owner=user, category=shop, days=0):
+        return create_transaction(db, amount=10, type=TransactionType.EXPENSE, date=date + datetime.timedelta(days=days),
+                                  user_id=owner.id, category_id=category.id, description=description)
+
+    books = add("Amazon books and more books for the long winter holiday", days=1)
+    prime = add("AMAZON Prime", days=2)
+    cafe = add("Café de Flore", days=3)
+    add(None)
+    add("Amazon Prime", owner=other, category=other_shop)
+
+    def found(query, **kwargs):
+        return [tx.id for tx in search_transactions(db, user.id, query, **kwargs)]
+
+    print("Testing matches are scoped to the user and ranked...")
+    assert found("amazon") == [prime.id, books.id], "The shorter, denser match ranks first"
+    assert found("amazon books") == [books.id]
+    assert found("amaz*") == [prime.id, books.id] and found("am*", limit=1) == [prime.id]
+    assert found("amazon", skip=1) == [books.id]
+    assert found("cafe") == [cafe.id], "Diacritics are folded"
+    assert found("walmart") == [] and found("  ") == [] and found("*") == []
+    assert found('amazon" OR "x') == [] and found("NEAR(amazon") == [], "Operators in the input are taken literally"
+    assert found("amazon", order="recent") == [prime.id, books.id] and found("a*", order="recent") == [prime.id, books.id]
+    assert found("amazon", order="recent", skip=1, limit=5) == [books.id]
+    try:
+        found("amazon", order="date")
+        assert False, "An unknown order should raise ValueError"
+    except ValueError:
+        pass
+    assert search_transactions(db, other.id, "books") == []
+    assert search_transactions(db, user.id, "prime")[0].category.name == "Shopping"
+
+    print("Testing the index follows updates and deletes...")
+    update_transaction(db, cafe.id, user.id, description="Corner bakery")
+    assert found("cafe") == [] and found("bakery") == [cafe.id]
+    delete_transaction(db, prime.id, user.id)
+    assert found("amazon") == [books.id]
+
+    print("Testing a database without the index is backfilled...")
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="budget_search_test_")
+    os.close(fd)
+    legacy_engine = create_engine(f"sqlite:///{path}")
+    try:
+        create_tables(legacy_engine)
+        with legacy_engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE {SEARCH_INDEX_TABLE}"))
+            for trigger in ("insert", "delete", "update"):
+                connection.execute(text(f"DROP TRIGGER {SEARCH_INDEX_TABLE}_{trigger}"))
+            connection.execute(text("INSERT INTO users (id, username, password_hash) VALUES (1, 'legacy', 'x')"))
+            connection.execute(text("INSERT INTO categories (id, name, user_id) VALUES (1, 'Food', 1)"))
+            connection.execute(text("INSERT INTO transactions (amount_minor, currency, type, date, description, category_id, user_id) "
+                                    "VALUES (500, 'USD', 'EXPENSE', '2024-01-05 00:00:00', 'Farmers market', 1, 1)"))
+        create_tables(legacy_engine)
+        legacy_db = sessionmaker(bind=legacy_engine)()
+        assert [tx.description for tx in search_transactions(legacy_db, 1, "farm*")] == ["Farmers market"]
+        legacy_db.close()
+    finally:
+        legacy_engine.dispose()
+        os.remove(path)
+
+    for owner in (user, other):
+        db.query(Transaction).filter(Transaction.user_id == owner.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == owner.id).delete()
+        db.query(Category).filter(Category.user_id == owner.id).delete()
+        db.delete(owner)
+    db.commit()
+    db.close()
+    print("Transaction full-text search tests completed successfully.")
+
 if __name__ == "__main__":
     run_transaction_tests()
+    run_transaction_filter_tests()
+    run_transaction_search_tests()
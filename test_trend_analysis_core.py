@@ -1,12 +1,100 @@
 import datetime
+import os
+import sqlite3
+import tempfile
 from decimal import Decimal # For precise assertions if needed, though models use Float
+from sqlalchemy import event
 from sqlalchemy.orm import Session # Import Session
 from budget_planner.models.database import SessionLocal, engine
-from budget_planner.models.data_models import create_tables, User, Category, Transaction, TransactionType
+from budget_planner.models.data_models import create_tables, User, Category, Transaction, TransactionType, MonthlyRollup
 from budget_planner.core.user_management import create_user, get_user_by_username
 from budget_planner.core.transaction_management import create_category as core_create_category
 from budget_planner.core.transaction_management import create_transaction as core_create_transaction
-from budget_planner.core.trend_analysis import get_monthly_summary, get_spending_trend
+from budget_planner.core.transaction_management import get_transactions_by_user, update_category, delete_transaction
+from budget_planner.core.rollup_management import _transaction_totals_query, rebuild_monthly_rollups, verify_monthly_rollups
+from budget_planner.core.trend_analysis import get_monthly_summary, get_monthly_summaries, get_spending_trend, _monthly_totals_query, month_bounds
+from budget_planner.core.trend_analysis import summary_cache, SummaryCache, MemoryCacheBackend, SQLiteCacheBackend
+
+def explain_query_plan(db: Session, run_query) -> list[str]:
+    """Runs 'run_query', then returns the EXPLAIN QUERY PLAN details of the last statement it executed."""
+    captured = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run_query()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    return [row[3] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+def count_rollup_queries(run) -> int:
+    """Runs 'run' and returns how many statements it sent to the monthly_rollups table."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "monthly_rollups" in statement:
+            statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return len(statements)
+
+def run_summary_cache_backend_tests():
+    print("Testing summary cache LRU eviction, TTL expiry and stale stores...")
+    now = [0.0]
+    cache = SummaryCache(MemoryCacheBackend(max_entries=2, ttl_seconds=60, clock=lambda: now[0]))
+    generation, found = cache.lookup(1, [(2024, 1), (2024, 2), (2024, 3)])
+    assert found == {} and cache.stats()["misses"] == 3
+    cache.store(1, generation, {(2024, 1): {"m": 1}, (2024, 2): {"m": 2}, (2024, 3): {"m": 3}})
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+    _, found = cache.lookup(1, [(2024, 1), (2024, 3)])
+    assert list(found) == [(2024, 3)], found # The least recently used month was evicted
+    now[0] = 61
+    _, found = cache.lookup(1, [(2024, 2), (2024, 3)])
+    assert found == {} and cache.stats()["expirations"] == 2 and cache.stats()["size"] == 0
+    generation, _ = cache.lookup(1, [(2024, 1)])
+    cache.invalidate(1, [(2024, 5)]) # A write lands while (2024, 1) is being computed
+    cache.store(1, generation, {(2024, 1): {"m": "stale"}})
+    assert cache.lookup(1, [(2024, 1)])[1] == {}, "A summary computed before an invalidation was cached"
+
+    print("Testing in-process summaries are dropped once another worker changes the data version...")
+    generation, _ = cache.lookup(1, [(2024, 1)], version=4)
+    cache.store(1, generation, {(2024, 1): {"m": 4}}, version=4)
+    assert cache.lookup(1, [(2024, 1)], version=4)[1] == {(2024, 1): {"m": 4}}
+    assert cache.lookup(1, [(2024, 1)], version=5)[1] == {}, "Served a summary from an older data version"
+    assert cache.stats()["size"] == 0
+
+    print("Testing the SQLite cache backend is shared between instances...")
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="budget_summary_cache_test_")
+    os.close(fd)
+    try:
+        worker_a = SummaryCache(SQLiteCacheBackend(path, max_entries=10, ttl_seconds=60))
+        worker_b = SummaryCache(SQLiteCacheBackend(path, max_entries=10, ttl_seconds=60))
+        generation, _ = worker_a.lookup(7, [(2024, 1)])
+        worker_a.store(7, generation, {(2024, 1): {"year": 2024, "expenses_by_category": {"Food": 1.5}}})
+        assert worker_b.lookup(7, [(2024, 1)])[1] == {(2024, 1): {"year": 2024, "expenses_by_category": {"Food": 1.5}}}
+        worker_b.invalidate(7, [(2024, 1)])
+        assert worker_a.lookup(7, [(2024, 1)])[1] == {} and worker_a.stats()["size"] == 0
+        generation, _ = worker_a.lookup(7, [(2024, 1)])
+        worker_a.store(7, generation, {(2024, 1): {"m": 1}})
+        try:
+            worker_a.invalidate(7, [(2024, 1), (2024, object())]) # Fails after the first DELETE
+            raise AssertionError("A failed invalidation did not raise")
+        except sqlite3.Error:
+            pass
+        assert worker_b.backend.generation(7) == generation, "A failed invalidation was partly committed"
+        assert worker_b.lookup(7, [(2024, 1)])[1] == {(2024, 1): {"m": 1}}
+        worker_b.invalidate(7) # The failed write left no transaction open
+        small = SummaryCache(SQLiteCacheBackend(path, max_entries=1, ttl_seconds=60))
+        generation, _ = small.lookup(7, [(2024, 2), (2024, 3)])
+        small.store(7, generation, {(2024, 2): {}, (2024, 3): {}})
+        assert small.stats()["evictions"] == 1 and small.stats()["size"] == 1
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
 
 def setup_test_data(db: Session, user_id: int):
     # Categories
@@ -61,6 +149,7 @@ def run_trend_analysis_tests():
     if user:
         print(f"Cleaning up old test user '{test_username}' and their data...")
         db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+        db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
         db.query(Category).filter(Category.user_id == user.id).delete()
         db.delete(user)
         db.commit()
@@ -125,10 +214,91 @@ def run_trend_analysis_tests():
     assert len(trend_data_1) == 1
     assert trend_data_1[0]["month"] == dates_info["current_month"]
 
+    print("Testing get_monthly_summaries matches per-month summaries...")
+    months = [(dates_info["two_months_ago_year"], dates_info["two_months_ago_month"]),
+              (1990, 1),
+              (dates_info["current_year"], dates_info["current_month"])]
+    batched = get_monthly_summaries(db, user_id, months)
+    assert batched == [get_monthly_summary(db, user_id, year, month) for year, month in months]
+    assert get_monthly_summaries(db, user_id, []) == []
+
+    # --- Query plans: date predicates must seek on the composite indexes, never scan ---
+    print("Testing query plans use the (user_id, type, date) and (user_id, date) indexes...")
+    totals_plan = explain_query_plan(db, lambda: _transaction_totals_query(db, user_id, months).all())
+    print(f"Transaction totals plan: {totals_plan}")
+    assert not any(detail.startswith("SCAN transactions") for detail in totals_plan), totals_plan
+    assert any("ix_transactions_user_type_date" in detail for detail in totals_plan), totals_plan
+
+    summary_plan = explain_query_plan(db, lambda: _monthly_totals_query(db, user_id, months).all())
+    print(f"Rollup summary plan: {summary_plan}")
+    assert not any(detail.startswith("SCAN monthly_rollups") for detail in summary_plan), summary_plan
+
+    month_start, month_end = month_bounds(dates_info["current_year"], dates_info["current_month"])
+    listing_plan = explain_query_plan(db, lambda: get_transactions_by_user(db, user_id, start_date=month_start, end_date=month_end))
+    print(f"Listing plan: {listing_plan}")
+    assert not any(detail.startswith("SCAN transactions") for detail in listing_plan), listing_plan
+    assert len(get_transactions_by_user(db, user_id, start_date=month_start, end_date=month_end)) == 5
+
+
+    # --- Monthly rollup consistency ---
+    print("Testing monthly rollup matches raw transactions, and rebuild reproduces it...")
+    assert verify_monthly_rollups(db, user_id) == []
+    db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user_id).delete()
+    db.commit()
+    drift = verify_monthly_rollups(db, user_id)
+    assert len(drift) == 10, f"Expected 10 drifted rollup keys after wiping the rollup, got {len(drift)}"
+    assert rebuild_monthly_rollups(db, user_id) == 10
+    assert verify_monthly_rollups(db, user_id) == []
+    assert get_monthly_summary(db, user_id, dates_info["current_year"], dates_info["current_month"]) == summary_cm
+
+    # --- Summary cache ---
+    print("Testing repeated summaries are served from the cache...")
+    current = (dates_info["current_year"], dates_info["current_month"])
+    last = (dates_info["last_year"], dates_info["last_month"])
+    get_monthly_summaries(db, user_id, [current, last])
+    hits = summary_cache.stats()["hits"]
+    assert count_rollup_queries(lambda: get_monthly_summaries(db, user_id, [current, last])) == 0
+    assert summary_cache.stats()["hits"] == hits + 2
+    get_monthly_summary(db, user_id, *current)["expenses_by_category"].clear() # Callers get copies
+    assert get_monthly_summary(db, user_id, *current) == summary_cm
+
+    print("Testing the in-process cache recomputes once the data version changes...")
+    food_id = db.query(Category.id).filter(Category.user_id == user_id, Category.name == "Food").scalar()
+    extra = core_create_transaction(db, 10.00, TransactionType.EXPENSE, datetime.datetime(*current, 20), user_id, food_id, "Extra CM")
+    assert count_rollup_queries(lambda: get_monthly_summary(db, user_id, *last)) == 1, "Another worker may have written it"
+    assert get_monthly_summary(db, user_id, *current)["total_expenses"] == 760.00
+    assert delete_transaction(db, extra.id, user_id)
+    assert get_monthly_summary(db, user_id, *current)["total_expenses"] == 750.00
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="budget_summary_cache_test_")
+    os.close(fd)
+    in_process = summary_cache.backend
+    summary_cache.backend = SQLiteCacheBackend(path, max_entries=100, ttl_seconds=60) # As with BUDGET_PLANNER_SUMMARY_CACHE_PATH
+    try:
+        print("Testing writes invalidate only the months they touch in the shared cache...")
+        get_monthly_summaries(db, user_id, [current, last])
+        extra = core_create_transaction(db, 10.00, TransactionType.EXPENSE, datetime.datetime(*current, 20), user_id, food_id, "Extra CM")
+        assert count_rollup_queries(lambda: get_monthly_summary(db, user_id, *last)) == 0
+        assert get_monthly_summary(db, user_id, *current)["total_expenses"] == 760.00
+        assert delete_transaction(db, extra.id, user_id)
+        assert get_monthly_summary(db, user_id, *current)["total_expenses"] == 750.00
+
+        print("Testing a category rename invalidates the months it appears in...")
+        get_monthly_summaries(db, user_id, [current, last, (1990, 1)])
+        update_category(db, food_id, user_id, name="Groceries")
+        assert count_rollup_queries(lambda: get_monthly_summary(db, user_id, 1990, 1)) == 0
+        assert get_monthly_summary(db, user_id, *current)["expenses_by_category"]["Groceries"] == 180.00
+        assert get_monthly_summary(db, user_id, *last)["expenses_by_category"]["Groceries"] == 160.00
+    finally:
+        summary_cache.backend = in_process
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
 
     # --- Cleanup ---
     print(f"Cleaning up test user '{test_username}' and their data...")
     db.query(Transaction).filter(Transaction.user_id == user.id).delete()
+    db.query(MonthlyRollup).filter(MonthlyRollup.user_id == user.id).delete()
     db.query(Category).filter(Category.user_id == user.id).delete() # Categories created in setup_test_data
     db.delete(user)
     db.commit()
@@ -137,4 +307,5 @@ def run_trend_analysis_tests():
     print("Trend analysis core logic tests completed successfully.")
 
 if __name__ == "__main__":
+    run_summary_cache_backend_tests()
     run_trend_analysis_tests()
@@ -1,5 +1,8 @@
 from budget_planner.models.database import SessionLocal, engine
 from budget_planner.models.data_models import create_tables, User
+import asyncio
+from passlib.context import CryptContext
+from budget_planner.core import user_management
 from budget_planner.core.user_management import create_user, authenticate_user, get_user_by_username, verify_password
 
 def run_user_tests():
@@ -60,6 +63,62 @@ def run_user_tests():
     assert non_existent_user is None, "Authentication succeeded for non-existent user."
     print("Authentication correctly failed for non-existent user.")
 
+    # Test rehash-on-login when the stored hash uses fewer rounds than configured
+    print("Testing transparent rehash of outdated password hashes...")
+    weak_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    fetched_user.password_hash = weak_context.hash(test_password)
+    db.commit()
+    assert user_management.pwd_context.needs_update(fetched_user.password_hash)
+    rehashed_user = authenticate_user(db, username=test_username, password=test_password)
+    assert rehashed_user is not None, "Authentication with an outdated hash failed."
+    assert not user_management.pwd_context.needs_update(rehashed_user.password_hash), "Outdated hash was not replaced."
+    assert verify_password(test_password, rehashed_user.password_hash)
+    print("Outdated hash replaced on login.")
+
+    # Test the async paths that run bcrypt on the bounded worker pool
+    print("Testing async authentication on the password worker pool...")
+    fetched_user.password_hash = weak_context.hash(test_password)
+    db.commit()
+    async_user = asyncio.run(user_management.authenticate_user_async(db, username=test_username, password=test_password))
+    assert async_user is not None and async_user.id == fetched_user.id
+    assert not user_management.pwd_context.needs_update(async_user.password_hash), "Async login did not rehash."
+    assert asyncio.run(user_management.authenticate_user_async(db, username=test_username, password="wrongpassword")) is None
+    assert asyncio.run(user_management.create_user_async(db, username=test_username, password="whatever")) is None
+    print("Async authentication works.")
+
+    print("Testing concurrent registrations of the same username create one user...")
+    race_username = "testuser_core_race"
+    stale = user_management.get_user_by_username(db, race_username)
+    if stale:
+        db.delete(stale)
+        db.commit()
+    sessions = [SessionLocal(), SessionLocal()]
+
+    async def register_twice():
+        # Both check the name before either inserts: the check and the insert are split by bcrypt
+        return await asyncio.gather(*[user_management.create_user_async(session, username=race_username, password="race_pw")
+                                      for session in sessions])
+    try:
+        registered = asyncio.run(register_twice())
+        assert sum(user is not None for user in registered) == 1, registered
+    finally:
+        for session in sessions:
+            session.close()
+    db.delete(user_management.get_user_by_username(db, race_username))
+    db.commit()
+
+    print("Testing the password worker pool rejects work when saturated...")
+    tiny_pool = user_management.PasswordWorkerPool(max_workers=1, max_queue=1)
+
+    async def storm():
+        jobs = [tiny_pool.run(weak_context.hash, "pw") for _ in range(6)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+    outcomes = asyncio.run(storm())
+    rejected = [o for o in outcomes if isinstance(o, user_management.PasswordHashingBusyError)]
+    assert len(rejected) == 4, f"Expected 4 rejected jobs with capacity 2, got {len(rejected)}"
+    assert all(isinstance(o, str) for o in outcomes if o not in rejected)
+    print("Saturated pool correctly applies backpressure.")
+
     # Clean up test user
     db.delete(fetched_user)
     db.commit()